@@ -0,0 +1,29 @@
+"""Add version columns for optimistic concurrency
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE subtasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        ALTER TABLE tasks DROP COLUMN IF EXISTS version;
+        ALTER TABLE subtasks DROP COLUMN IF EXISTS version;
+        ALTER TABLE users DROP COLUMN IF EXISTS version;
+    """)
@@ -0,0 +1,45 @@
+"""Add fractional rank to tasks for manual ordering within columns
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Byte-wise collation so keys sort the same way in Postgres and Python
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS rank TEXT COLLATE "C";
+
+        CREATE INDEX idx_tasks_status_rank ON tasks(status, rank);
+    """)
+
+    # Backfill each column in creation order. Zero-padded digits followed by
+    # a non-zero digit are valid base-62 rank keys; the first rebalance of a
+    # column replaces them with short evenly spaced keys.
+    op.execute("""
+        UPDATE tasks t
+        SET rank = ranked.rank
+        FROM (
+            SELECT id,
+                   LPAD((ROW_NUMBER() OVER (
+                       PARTITION BY status ORDER BY created_at, id
+                   ))::text, 8, '0') || 'V' AS rank
+            FROM tasks
+        ) ranked
+        WHERE t.id = ranked.id;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP INDEX IF EXISTS idx_tasks_status_rank;
+        ALTER TABLE tasks DROP COLUMN IF EXISTS rank;
+    """)
@@ -0,0 +1,41 @@
+"""Add denormalized subtask progress counters to tasks
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS subtask_total INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS subtask_completed INTEGER NOT NULL DEFAULT 0;
+    """)
+
+    op.execute("""
+        UPDATE tasks t
+        SET subtask_total = counts.total,
+            subtask_completed = counts.completed
+        FROM (
+            SELECT task_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE completed) AS completed
+            FROM subtasks
+            GROUP BY task_id
+        ) counts
+        WHERE t.id = counts.task_id;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        ALTER TABLE tasks DROP COLUMN IF EXISTS subtask_total;
+        ALTER TABLE tasks DROP COLUMN IF EXISTS subtask_completed;
+    """)
@@ -0,0 +1,124 @@
+"""Scope tasks to families and version each family's dependency graph
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS family_id INTEGER
+            REFERENCES family_accounts(id) ON DELETE CASCADE;
+
+        CREATE INDEX idx_tasks_family_id ON tasks(family_id);
+    """)
+
+    # One row per family graph (family_key 0 holds tasks without a family).
+    # Versions come from a global sequence so a value is never reused, and
+    # previous_version lets a writer tell whether only its own statement
+    # changed the graph since its cached copy was loaded.
+    op.execute("""
+        CREATE SEQUENCE dependency_graph_version_seq;
+
+        CREATE TABLE dependency_graph_versions (
+            family_key INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL,
+            previous_version BIGINT NOT NULL DEFAULT 0
+        );
+
+        INSERT INTO dependency_graph_versions (family_key, version)
+        SELECT keys.family_key, nextval('dependency_graph_version_seq')
+        FROM (
+            SELECT DISTINCT COALESCE(t.family_id, 0) AS family_key
+            FROM dependencies d
+            JOIN tasks t ON t.id = d.task_id
+        ) keys;
+    """)
+
+    op.execute("""
+        CREATE FUNCTION bump_dependency_graph_versions(family_keys INTEGER[])
+        RETURNS void AS $$
+            INSERT INTO dependency_graph_versions AS v (family_key, version)
+            SELECT k, nextval('dependency_graph_version_seq')
+            FROM (SELECT DISTINCT unnest(family_keys) AS k) keys
+            ON CONFLICT (family_key) DO UPDATE
+            SET previous_version = v.version,
+                version = EXCLUDED.version;
+        $$ LANGUAGE sql;
+
+        CREATE FUNCTION dependencies_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM changed_rows c LEFT JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM removed_rows c LEFT JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSE
+                -- TRUNCATE: every graph is empty again
+                DELETE FROM dependency_graph_versions;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER dependencies_graph_version_insert
+            AFTER INSERT ON dependencies
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_bump_graph_version();
+
+        CREATE TRIGGER dependencies_graph_version_delete
+            AFTER DELETE ON dependencies
+            REFERENCING OLD TABLE AS removed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_bump_graph_version();
+
+        CREATE TRIGGER dependencies_graph_version_truncate
+            AFTER TRUNCATE ON dependencies
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_bump_graph_version();
+    """)
+
+    # Edges removed by ON DELETE CASCADE no longer find their task, so
+    # deleting tasks bumps the families they belonged to directly.
+    op.execute("""
+        CREATE FUNCTION tasks_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM bump_dependency_graph_versions(ARRAY(
+                SELECT COALESCE(family_id, 0) FROM removed_tasks
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER tasks_graph_version_delete
+            AFTER DELETE ON tasks
+            REFERENCING OLD TABLE AS removed_tasks
+            FOR EACH STATEMENT EXECUTE FUNCTION tasks_bump_graph_version();
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS tasks_graph_version_delete ON tasks;
+        DROP FUNCTION IF EXISTS tasks_bump_graph_version();
+        DROP TRIGGER IF EXISTS dependencies_graph_version_truncate ON dependencies;
+        DROP TRIGGER IF EXISTS dependencies_graph_version_delete ON dependencies;
+        DROP TRIGGER IF EXISTS dependencies_graph_version_insert ON dependencies;
+        DROP FUNCTION IF EXISTS dependencies_bump_graph_version();
+        DROP FUNCTION IF EXISTS bump_dependency_graph_versions(INTEGER[]);
+        DROP TABLE IF EXISTS dependency_graph_versions;
+        DROP SEQUENCE IF EXISTS dependency_graph_version_seq;
+        DROP INDEX IF EXISTS idx_tasks_family_id;
+        ALTER TABLE tasks DROP COLUMN IF EXISTS family_id;
+    """)
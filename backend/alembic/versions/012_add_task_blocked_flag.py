@@ -0,0 +1,103 @@
+"""Maintain a blocked flag on tasks with unfinished prerequisites
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS blocked BOOLEAN NOT NULL DEFAULT FALSE;
+
+        UPDATE tasks t
+        SET blocked = TRUE
+        WHERE EXISTS (
+            SELECT 1 FROM dependencies d
+            JOIN tasks p ON p.id = d.depends_on_task_id
+            WHERE d.task_id = t.id AND p.status <> 'done'
+        );
+
+        CREATE INDEX idx_tasks_ready ON tasks(due_date)
+            WHERE NOT blocked AND status <> 'done';
+    """)
+
+    # Recompute the flag for a set of tasks from their remaining prerequisites
+    op.execute("""
+        CREATE FUNCTION refresh_tasks_blocked(task_ids INTEGER[]) RETURNS void AS $$
+            UPDATE tasks t
+            SET blocked = EXISTS (
+                SELECT 1 FROM dependencies d
+                JOIN tasks p ON p.id = d.depends_on_task_id
+                WHERE d.task_id = t.id AND p.status <> 'done'
+            )
+            WHERE t.id = ANY(task_ids)
+              AND t.blocked IS DISTINCT FROM EXISTS (
+                  SELECT 1 FROM dependencies d
+                  JOIN tasks p ON p.id = d.depends_on_task_id
+                  WHERE d.task_id = t.id AND p.status <> 'done'
+              );
+        $$ LANGUAGE sql;
+
+        CREATE FUNCTION dependencies_refresh_blocked() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_tasks_blocked(ARRAY(SELECT DISTINCT task_id FROM changed_rows));
+            ELSE
+                PERFORM refresh_tasks_blocked(ARRAY(SELECT DISTINCT task_id FROM removed_rows));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER dependencies_blocked_insert
+            AFTER INSERT ON dependencies
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_refresh_blocked();
+
+        CREATE TRIGGER dependencies_blocked_delete
+            AFTER DELETE ON dependencies
+            REFERENCING OLD TABLE AS removed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_refresh_blocked();
+    """)
+
+    # Only transitions into or out of 'done' can change dependents' flags
+    op.execute("""
+        CREATE FUNCTION tasks_refresh_dependents_blocked() RETURNS trigger AS $$
+        BEGIN
+            PERFORM refresh_tasks_blocked(ARRAY(
+                SELECT DISTINCT d.task_id
+                FROM new_tasks n
+                JOIN old_tasks o ON o.id = n.id
+                JOIN dependencies d ON d.depends_on_task_id = n.id
+                WHERE (n.status = 'done') <> (o.status = 'done')
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER tasks_blocked_status_update
+            AFTER UPDATE ON tasks
+            REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks
+            FOR EACH STATEMENT EXECUTE FUNCTION tasks_refresh_dependents_blocked();
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS tasks_blocked_status_update ON tasks;
+        DROP FUNCTION IF EXISTS tasks_refresh_dependents_blocked();
+        DROP TRIGGER IF EXISTS dependencies_blocked_delete ON dependencies;
+        DROP TRIGGER IF EXISTS dependencies_blocked_insert ON dependencies;
+        DROP FUNCTION IF EXISTS dependencies_refresh_blocked();
+        DROP FUNCTION IF EXISTS refresh_tasks_blocked(INTEGER[]);
+        DROP INDEX IF EXISTS idx_tasks_ready;
+        ALTER TABLE tasks DROP COLUMN IF EXISTS blocked;
+    """)
@@ -0,0 +1,77 @@
+"""Store the transitive closure of the dependency graph
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per (ancestor, descendant) pair where descendant transitively
+    # depends on ancestor; depth is the length of the shortest chain.
+    op.execute("""
+        CREATE TABLE dependency_closure (
+            ancestor INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            descendant INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            depth INTEGER NOT NULL CHECK (depth > 0),
+            PRIMARY KEY (ancestor, descendant)
+        );
+
+        CREATE INDEX idx_dependency_closure_descendant
+            ON dependency_closure(descendant, ancestor);
+    """)
+
+    # Graph version each family's closure rows were last brought up to
+    op.execute("""
+        ALTER TABLE dependency_graph_versions
+            ADD COLUMN closure_version BIGINT NOT NULL DEFAULT 0;
+    """)
+
+    op.execute("""
+        INSERT INTO dependency_closure (ancestor, descendant, depth)
+        WITH RECURSIVE paths(ancestor, descendant, depth) AS (
+            SELECT depends_on_task_id, task_id, 1 FROM dependencies
+            UNION
+            SELECT p.ancestor, d.task_id, p.depth + 1
+            FROM paths p
+            JOIN dependencies d ON d.depends_on_task_id = p.descendant
+            WHERE p.depth < 10000
+        )
+        SELECT ancestor, descendant, MIN(depth)
+        FROM paths
+        WHERE ancestor <> descendant
+        GROUP BY ancestor, descendant;
+
+        UPDATE dependency_graph_versions SET closure_version = version;
+    """)
+
+    # TRUNCATE fires no row or statement DELETE triggers and clears the
+    # versions table, so it has to empty the closure as well.
+    op.execute("""
+        CREATE FUNCTION dependencies_clear_closure() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM dependency_closure;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER dependencies_closure_truncate
+            AFTER TRUNCATE ON dependencies
+            FOR EACH STATEMENT EXECUTE FUNCTION dependencies_clear_closure();
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP TRIGGER IF EXISTS dependencies_closure_truncate ON dependencies;
+        DROP FUNCTION IF EXISTS dependencies_clear_closure();
+        ALTER TABLE dependency_graph_versions DROP COLUMN IF EXISTS closure_version;
+        DROP TABLE IF EXISTS dependency_closure;
+    """)
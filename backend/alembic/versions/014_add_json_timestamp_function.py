@@ -0,0 +1,33 @@
+"""Format timestamps in SQL-rendered JSON the way the API does
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ISO 8601 in UTC with a Z suffix, microseconds only when non-zero:
+    # the same text pydantic produces for the API's datetime fields.
+    op.execute("""
+        CREATE FUNCTION json_timestamp(ts TIMESTAMPTZ) RETURNS TEXT AS $$
+            SELECT to_char(ts AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS')
+                || CASE
+                    WHEN date_part('microseconds', ts)::INTEGER % 1000000 <> 0
+                    THEN to_char(ts AT TIME ZONE 'UTC', '.US')
+                    ELSE ''
+                END
+                || 'Z';
+        $$ LANGUAGE sql STABLE;
+    """)
+
+
+def downgrade():
+    op.execute("DROP FUNCTION IF EXISTS json_timestamp(TIMESTAMPTZ);")
@@ -0,0 +1,21 @@
+"""Index users by family
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE INDEX IF NOT EXISTS idx_users_family_id ON users(family_id);")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_users_family_id;")
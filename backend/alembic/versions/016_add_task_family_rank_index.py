@@ -0,0 +1,26 @@
+"""Index rank keys per family board
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Each family's columns are ranked on their own; idx_tasks_status_rank
+    # stays for board listings across families
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_family_status_rank
+            ON tasks(family_id, status, rank);
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_tasks_family_status_rank;")
@@ -0,0 +1,103 @@
+"""Only bump a family's graph version when a deleted task had edges
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Edges removed by ON DELETE CASCADE can no longer find their deleted
+    # task, so the task's family is bumped before the row goes, and only
+    # if the task had edges: deleting an unlinked task leaves the graph,
+    # its closure and everything cached from it valid.
+    op.execute("""
+        DROP TRIGGER IF EXISTS tasks_graph_version_delete ON tasks;
+        DROP FUNCTION IF EXISTS tasks_bump_graph_version();
+
+        CREATE FUNCTION tasks_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM dependencies WHERE task_id = OLD.id)
+               OR EXISTS (SELECT 1 FROM dependencies WHERE depends_on_task_id = OLD.id)
+            THEN
+                PERFORM bump_dependency_graph_versions(ARRAY[COALESCE(OLD.family_id, 0)]);
+            END IF;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER tasks_graph_version_delete
+            BEFORE DELETE ON tasks
+            FOR EACH ROW EXECUTE FUNCTION tasks_bump_graph_version();
+    """)
+
+    # Cascaded edge deletes are covered above; don't charge them to family 0
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dependencies_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM changed_rows c LEFT JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM removed_rows c JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSE
+                -- TRUNCATE: every graph is empty again
+                DELETE FROM dependency_graph_versions;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dependencies_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM changed_rows c LEFT JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM bump_dependency_graph_versions(ARRAY(
+                    SELECT COALESCE(t.family_id, 0)
+                    FROM removed_rows c LEFT JOIN tasks t ON t.id = c.task_id
+                ));
+            ELSE
+                -- TRUNCATE: every graph is empty again
+                DELETE FROM dependency_graph_versions;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS tasks_graph_version_delete ON tasks;
+        DROP FUNCTION IF EXISTS tasks_bump_graph_version();
+
+        CREATE FUNCTION tasks_bump_graph_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM bump_dependency_graph_versions(ARRAY(
+                SELECT COALESCE(family_id, 0) FROM removed_tasks
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER tasks_graph_version_delete
+            AFTER DELETE ON tasks
+            REFERENCING OLD TABLE AS removed_tasks
+            FOR EACH STATEMENT EXECUTE FUNCTION tasks_bump_graph_version();
+    """)
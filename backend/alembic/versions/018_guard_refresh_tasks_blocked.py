@@ -0,0 +1,70 @@
+"""Stop refresh_tasks_blocked from re-triggering itself and lock dependents
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "018"
+down_revision = "017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Statement triggers fire even for zero-row UPDATEs, so refreshing an
+    # empty set must not run one: its own tasks_blocked_status_update would
+    # call back in with an empty set again, without end.
+    #
+    # The dependents are locked before their flags are recomputed. Two
+    # transactions completing different prerequisites of one task then
+    # take turns, and the later one re-reads (each statement of a plpgsql
+    # function takes a fresh snapshot) the other's committed status
+    # instead of both leaving the task blocked.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_tasks_blocked(task_ids INTEGER[]) RETURNS void AS $$
+        BEGIN
+            IF cardinality(task_ids) = 0 THEN
+                RETURN;
+            END IF;
+
+            PERFORM 1 FROM tasks WHERE id = ANY(task_ids) ORDER BY id FOR UPDATE;
+
+            UPDATE tasks t
+            SET blocked = EXISTS (
+                SELECT 1 FROM dependencies d
+                JOIN tasks p ON p.id = d.depends_on_task_id
+                WHERE d.task_id = t.id AND p.status <> 'done'
+            )
+            WHERE t.id = ANY(task_ids)
+              AND t.blocked IS DISTINCT FROM EXISTS (
+                  SELECT 1 FROM dependencies d
+                  JOIN tasks p ON p.id = d.depends_on_task_id
+                  WHERE d.task_id = t.id AND p.status <> 'done'
+              );
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        DROP FUNCTION IF EXISTS refresh_tasks_blocked(INTEGER[]);
+
+        CREATE FUNCTION refresh_tasks_blocked(task_ids INTEGER[]) RETURNS void AS $$
+            UPDATE tasks t
+            SET blocked = EXISTS (
+                SELECT 1 FROM dependencies d
+                JOIN tasks p ON p.id = d.depends_on_task_id
+                WHERE d.task_id = t.id AND p.status <> 'done'
+            )
+            WHERE t.id = ANY(task_ids)
+              AND t.blocked IS DISTINCT FROM EXISTS (
+                  SELECT 1 FROM dependencies d
+                  JOIN tasks p ON p.id = d.depends_on_task_id
+                  WHERE d.task_id = t.id AND p.status <> 'done'
+              );
+        $$ LANGUAGE sql;
+    """)
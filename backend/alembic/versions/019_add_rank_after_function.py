@@ -0,0 +1,39 @@
+"""Derive the rank key after a given one in SQL
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "019"
+down_revision = "018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mirrors app.utils.ranking.key_after: bump the first digit below "z"
+    # and drop the rest, or append "1" to a run of "z"s. NULL (an empty
+    # column) gives the middle key "V".
+    op.execute("""
+        CREATE FUNCTION rank_after(key TEXT) RETURNS TEXT AS $$
+            SELECT CASE
+                WHEN key IS NULL THEN 'V'
+                WHEN key ~ '^z+$' THEN key || '1'
+                ELSE substring(key FROM '^z*') || substr(
+                    digits,
+                    strpos(digits, substr(key, length(substring(key FROM '^z*')) + 1, 1)) + 1,
+                    1
+                )
+            END
+            FROM (
+                SELECT '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'::TEXT
+            ) AS d(digits);
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+
+def downgrade():
+    op.execute("DROP FUNCTION IF EXISTS rank_after(TEXT);")
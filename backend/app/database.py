@@ -1,65 +1,411 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
+from collections.abc import Awaitable
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
 from typing import Any
 
 import asyncpg
 
 from app.config import settings
+from app.utils import metrics as m
 
-# Global connection pool
+logger = logging.getLogger(__name__)
+
+# Global connection pool (the primary)
 pool: asyncpg.Pool | None = None
 
+# Optional pool on a streaming replica, used for reads in read-only units of work
+replica_pool: asyncpg.Pool | None = None
 
-async def init_db() -> None:
-    """Initialize the database connection pool on startup."""
-    global pool
-    pool = await asyncpg.create_pool(
-        host=settings.DB_HOST,
-        port=settings.DB_PORT,
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became free within the acquire timeout."""
+
+
+@dataclass
+class PoolMetrics:
+    """Cumulative connection acquisition counters since startup."""
+
+    acquires: int = 0
+    acquire_wait_seconds: float = 0.0  # Total time callers waited
+    acquire_wait_max_seconds: float = 0.0
+    acquire_timeouts: int = 0
+    waiting: int = 0  # Callers waiting for a connection right now
+
+
+metrics = PoolMetrics()
+
+
+async def _acquire(source: asyncpg.Pool | None = None) -> asyncpg.Connection:
+    """Check a connection out of a pool (the primary by default), timing the wait."""
+    source = source or pool
+    if source is None:
+        raise RuntimeError("Database pool is not initialized")
+
+    metrics.waiting += 1
+    started = time.perf_counter()
+    try:
+        conn = await source.acquire(timeout=settings.DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.acquire_timeouts += 1
+        raise PoolTimeoutError(
+            f"No database connection available after {settings.DB_POOL_ACQUIRE_TIMEOUT}s"
+        ) from None
+    finally:
+        metrics.waiting -= 1
+
+    waited = time.perf_counter() - started
+    metrics.acquires += 1
+    metrics.acquire_wait_seconds += waited
+    metrics.acquire_wait_max_seconds = max(metrics.acquire_wait_max_seconds, waited)
+    return conn
+
+
+def pool_stats() -> dict[str, Any]:
+    """Current pool occupancy plus the cumulative acquisition metrics."""
+    size = pool.get_size() if pool is not None else 0
+    idle = pool.get_idle_size() if pool is not None else 0
+    return {
+        "min_size": settings.DB_POOL_MIN_SIZE,
+        "max_size": settings.DB_POOL_MAX_SIZE,
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        **asdict(metrics),
+    }
+
+
+class _UnitOfWork:
+    """
+    Pooled connections checked out lazily and held for one unit of work.
+
+    Read-only units of work send reads to the replica (if configured)
+    until anything touches the primary; from then on every read is pinned
+    to the primary so the unit of work sees its own writes.
+    """
+
+    def __init__(
+        self,
+        read_only: bool = False,
+        min_lsn: str | None = None,
+        parent: "_UnitOfWork | None" = None,
+    ) -> None:
+        self.conn: asyncpg.Connection | None = None
+        self.replica_conn: asyncpg.Connection | None = None
+        self.read_only = read_only
+        # Primary WAL position the replica must have replayed to serve reads
+        self.min_lsn = min_lsn
+        # Unit of work this one runs a concurrent lookup for (see gather)
+        self.parent = parent
+        self._lock = asyncio.Lock()
+
+    @property
+    def held(self) -> int:
+        """Connections currently checked out."""
+        return (self.conn is not None) + (self.replica_conn is not None)
+
+    def in_transaction(self) -> bool:
+        return self.conn is not None and self.conn.is_in_transaction()
+
+    def child(self) -> "_UnitOfWork":
+        """A unit of work for a concurrent read on behalf of this one."""
+        # Reads stay on the primary once this unit of work is pinned to it
+        read_only = self.read_only and self.conn is None
+        return _UnitOfWork(read_only=read_only, min_lsn=self.min_lsn, parent=self)
+
+    async def connection(self) -> asyncpg.Connection:
+        """The primary connection."""
+        if self.conn is None:
+            async with self._lock:
+                if self.conn is None:
+                    self.conn = await _acquire()
+        return self.conn
+
+    async def reader(self) -> asyncpg.Connection:
+        """The replica connection if reads may go there, else the primary."""
+        if replica_pool is None or not self.read_only or self.conn is not None:
+            return await self.connection()
+
+        if self.replica_conn is None:
+            async with self._lock:
+                if self.replica_conn is None:
+                    conn = await _acquire(replica_pool)
+                    if self.min_lsn is not None and not await conn.fetchval(
+                        "SELECT COALESCE(pg_last_wal_replay_lsn() >= $1::pg_lsn, FALSE)",
+                        self.min_lsn,
+                    ):
+                        # Replica has not caught up with this client's last write
+                        await replica_pool.release(conn)
+                        self.read_only = False
+                        self.conn = await _acquire()
+                        return self.conn
+                    self.replica_conn = conn
+        return self.replica_conn
+
+    async def release(self) -> None:
+        if self.replica_conn is not None:
+            conn, self.replica_conn = self.replica_conn, None
+            if replica_pool is not None:
+                await replica_pool.release(conn)
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            if pool is not None:
+                await pool.release(conn)
+
+
+# Unit of work bound to the current request/task, if any
+_current_uow: ContextVar[_UnitOfWork | None] = ContextVar("current_uow", default=None)
+
+
+async def _create_pool(host: str, port: int) -> asyncpg.Pool:
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+    return await asyncpg.create_pool(
+        host=host,
+        port=port,
         user=settings.DB_USER,
         password=settings.DB_PASSWORD,
         database=settings.DB_NAME,
-        min_size=5,
-        max_size=20,
-        command_timeout=60,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_queries=settings.DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=settings.DB_POOL_MAX_IDLE_SECONDS,
+        command_timeout=settings.DB_COMMAND_TIMEOUT,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        server_settings=server_settings,
     )
 
 
+async def init_db() -> None:
+    """Initialize the database connection pools on startup."""
+    global pool, replica_pool
+    pool = await _create_pool(settings.DB_HOST, settings.DB_PORT)
+    if settings.DB_REPLICA_HOST:
+        replica_pool = await _create_pool(
+            settings.DB_REPLICA_HOST, settings.DB_REPLICA_PORT or settings.DB_PORT
+        )
+
+
 async def close_db() -> None:
-    """Close the database connection pool on shutdown."""
-    global pool
+    """Close the database connection pools on shutdown."""
+    global pool, replica_pool
+    if replica_pool:
+        await replica_pool.close()
+        replica_pool = None
     if pool:
         await pool.close()
         pool = None
 
 
 @asynccontextmanager
-async def get_connection():
-    """Context manager for acquiring a connection from the pool."""
-    if pool is None:
-        raise RuntimeError("Database pool is not initialized")
-    async with pool.acquire() as conn:
+async def get_connection(read_only: bool = False):
+    """
+    Context manager for acquiring a connection from the pool.
+
+    Inside a unit of work this yields the connection bound to it, so all
+    helpers called during a request share one connection and snapshot;
+    with read_only=True a read-only unit of work may yield its replica
+    connection instead. Outside one, a primary connection is checked out
+    for the duration of the block.
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        yield await (uow.reader() if read_only else uow.connection())
+        return
+
+    conn = await _acquire()
+    try:
         yield conn
+    finally:
+        if pool is not None:
+            await pool.release(conn)
+
+
+@asynccontextmanager
+async def unit_of_work(
+    transaction: bool = False,
+    read_only: bool = False,
+    min_lsn: str | None = None,
+):
+    """
+    Bind one pooled connection to every query issued inside the block.
+
+    The connection is only acquired on first use, so blocks that never
+    touch the database cost nothing. Nested units of work reuse the outer
+    connection; a nested transaction becomes a savepoint.
+
+    Queries inside a unit of work must not run concurrently (e.g. via
+    asyncio.gather), since they share a single connection.
+
+    Args:
+        transaction: Run the block inside a transaction that commits on
+            success and rolls back on any exception
+        read_only: Route fetch_* reads to the replica pool, if one is
+            configured, until execute() or a transaction pins the unit of
+            work to the primary. Statements that write through fetch_*
+            (UPDATE ... RETURNING) must then run inside a transaction.
+        min_lsn: Only use the replica if it has replayed the primary's WAL
+            up to this position (the caller's last write)
+    """
+    uow = _current_uow.get()
+    token = None
+    if uow is None:
+        uow = _UnitOfWork(read_only=read_only, min_lsn=min_lsn)
+        token = _current_uow.set(uow)
+
+    try:
+        if transaction:
+            conn = await uow.connection()
+            async with conn.transaction():
+                yield
+        else:
+            yield
+    finally:
+        if token is not None:
+            _current_uow.reset(token)
+            await uow.release()
+
+
+def _spare_connections(source: asyncpg.Pool | None) -> int:
+    """Connections a pool can hand out right now without anyone waiting."""
+    if source is None:
+        return 0
+    return source.get_idle_size() + settings.DB_POOL_MAX_SIZE - source.get_size()
+
+
+async def _run_isolated(aw: Awaitable, uow: _UnitOfWork, slots: asyncio.Semaphore) -> Any:
+    async with slots:
+        # Runs in its own task, so this binding is invisible to the caller
+        _current_uow.set(uow)
+        try:
+            return await aw
+        finally:
+            await uow.release()
+
+
+async def gather(*aws: Awaitable) -> list[Any]:
+    """
+    Await independent reads concurrently, each on its own pooled connection.
+
+    A unit of work's connection cannot run statements concurrently, so each
+    awaitable gets a child unit of work with a connection of its own; the
+    elapsed time approaches the slowest read rather than the sum of them.
+    Every read runs in its own snapshot, as consecutive statements outside
+    a transaction do anyway.
+
+    One request holds at most DB_MAX_CONNECTIONS_PER_REQUEST connections,
+    its own included, and never more than the pool can spare without
+    queueing; the remaining awaitables wait for a free slot. The reads run
+    one after another on the current connection instead when fewer than
+    two slots are available, inside a transaction (whose uncommitted
+    writes other connections cannot see) and within a concurrent read.
+    """
+    uow = _current_uow.get()
+    if uow is None:
+        uow = _UnitOfWork()
+
+    child = uow.child()
+    source = replica_pool if replica_pool is not None and child.read_only else pool
+    slots = min(
+        settings.DB_MAX_CONNECTIONS_PER_REQUEST - uow.held,
+        _spare_connections(source),
+        len(aws),
+    )
+    if slots < 2 or uow.parent is not None or uow.in_transaction():
+        results = []
+        for index, aw in enumerate(aws):
+            try:
+                results.append(await aw)
+            except BaseException:
+                # Close the reads that will never run
+                for pending in aws[index + 1:]:
+                    if asyncio.iscoroutine(pending):
+                        pending.close()
+                raise
+        return results
+
+    semaphore = asyncio.Semaphore(slots)
+    return list(
+        await asyncio.gather(*(_run_isolated(aw, uow.child(), semaphore) for aw in aws))
+    )
+
+
+async def primary_lsn() -> str | None:
+    """
+    Current primary WAL position if this unit of work wrote and a replica
+    is configured; clients send it back so later reads wait for the replica.
+    """
+    uow = _current_uow.get()
+    if replica_pool is None or uow is None or uow.conn is None:
+        return None
+    return await uow.conn.fetchval("SELECT pg_current_wal_lsn()::text")
+
+
+def transaction():
+    """Run the block in a transaction on the current unit of work's connection."""
+    return unit_of_work(transaction=True)
+
+
+def _record_query(query: str, started: float) -> None:
+    """Feed one statement's latency into the metrics and the slow-query log."""
+    elapsed = time.perf_counter() - started
+    request = m.current_request.get()
+    route = "-"
+    if request is not None:
+        request.queries += 1
+        route = request.route
+
+    statement = m.fingerprint(query)
+    m.query_latency.observe((statement, route), elapsed)
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        m.slow_queries.inc((statement, route))
+        logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, route, statement)
 
 
 async def execute(query: str, *args) -> str:
     """Execute a query (INSERT, UPDATE, DELETE) and return status."""
     async with get_connection() as conn:
-        return await conn.execute(query, *args)
+        started = time.perf_counter()
+        try:
+            return await conn.execute(query, *args)
+        finally:
+            if settings.METRICS_ENABLED:
+                _record_query(query, started)
 
 
 async def fetch_one(query: str, *args) -> asyncpg.Record | None:
     """Fetch a single row from the database."""
-    async with get_connection() as conn:
-        return await conn.fetchrow(query, *args)
+    async with get_connection(read_only=True) as conn:
+        started = time.perf_counter()
+        try:
+            return await conn.fetchrow(query, *args)
+        finally:
+            if settings.METRICS_ENABLED:
+                _record_query(query, started)
 
 
 async def fetch_all(query: str, *args) -> list[asyncpg.Record]:
     """Fetch multiple rows from the database."""
-    async with get_connection() as conn:
-        return await conn.fetch(query, *args)
+    async with get_connection(read_only=True) as conn:
+        started = time.perf_counter()
+        try:
+            return await conn.fetch(query, *args)
+        finally:
+            if settings.METRICS_ENABLED:
+                _record_query(query, started)
 
 
 async def fetch_val(query: str, *args) -> Any:
     """Fetch a single value from the database."""
-    async with get_connection() as conn:
-        return await conn.fetchval(query, *args)
+    async with get_connection(read_only=True) as conn:
+        started = time.perf_counter()
+        try:
+            return await conn.fetchval(query, *args)
+        finally:
+            if settings.METRICS_ENABLED:
+                _record_query(query, started)
@@ -1,10 +1,17 @@
+import asyncio
+import math
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app import database as db
-from app.routers import auth, dependencies, subtasks, task_links, tasks, users
+from app.config import settings
+from app.utils import loop_monitor, metrics
+from app.middleware import AdmissionMiddleware, MetricsMiddleware, UnitOfWorkMiddleware
+from app.routers import auth, dependencies, events, subtasks, task_links, tasks, users
 
 
 @asynccontextmanager
@@ -12,8 +19,10 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
     # Startup
     await db.init_db()
+    loop_monitor.start(settings.LOOP_LAG_INTERVAL, settings.LOOP_LAG_WARN_MS)
     yield
     # Shutdown
+    await loop_monitor.stop()
     await db.close_db()
 
 
@@ -24,7 +33,18 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# CORS configuration for frontend
+# One pooled connection per request, shared by all service helpers
+app.add_middleware(UnitOfWorkMiddleware)
+
+# Refuse requests before they take a connection when a client or the pool is overloaded
+app.add_middleware(AdmissionMiddleware)
+
+# Route latency includes admission, connection checkout and release
+app.add_middleware(MetricsMiddleware)
+
+# CORS configuration for frontend. Outermost, so refusals from the layers
+# inside (429, 503) still carry the headers the browser needs to read them,
+# and preflights are answered before they reach admission.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -36,8 +56,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+@app.exception_handler(db.PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: db.PoolTimeoutError):
+    """Every connection stayed busy for the whole acquire timeout."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(settings.DB_POOL_ACQUIRE_TIMEOUT))},
+    )
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -47,6 +78,7 @@ app.include_router(
 )
 app.include_router(subtasks.router, prefix="/api", tags=["subtasks"])
 app.include_router(task_links.router, prefix="/api", tags=["links"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
 
 @app.get("/health")
@@ -55,6 +87,65 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: can this worker serve database-backed requests now?
+
+    Not ready (503) when every pooled connection is in use with callers
+    already queueing for one, or when a database round trip fails or
+    exceeds READINESS_TIMEOUT. The pool numbers are included either way.
+    """
+    pool = db.pool_stats()
+    pool["saturation"] = round(pool["in_use"] / pool["max_size"], 3)
+    body = {"status": "ready", "pool": pool, "db_latency_ms": None}
+
+    if pool["in_use"] >= pool["max_size"] and pool["waiting"] > 0:
+        body["status"] = "pool_exhausted"
+    else:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.fetch_val("SELECT 1"), settings.READINESS_TIMEOUT)
+            body["db_latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        except Exception:
+            body["status"] = "database_unavailable"
+
+    code = status.HTTP_200_OK if body["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(body, status_code=code)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Route, query and connection pool metrics in Prometheus text format."""
+    pool = db.pool_stats()
+    gauges = {
+        "db_pool_size": ("Open pooled connections.", pool["size"]),
+        "db_pool_max_size": ("Configured maximum pool size.", pool["max_size"]),
+        "db_pool_in_use": ("Connections checked out.", pool["in_use"]),
+        "db_pool_idle": ("Idle pooled connections.", pool["idle"]),
+        "db_pool_waiting": ("Callers waiting for a connection.", pool["waiting"]),
+    }
+    counters = {
+        "db_pool_acquires_total": ("Connections checked out since startup.", pool["acquires"]),
+        "db_pool_acquire_wait_seconds_total": (
+            "Total time spent waiting for a connection.",
+            pool["acquire_wait_seconds"],
+        ),
+        "db_pool_acquire_timeouts_total": (
+            "Checkouts that gave up after the acquire timeout.",
+            pool["acquire_timeouts"],
+        ),
+    }
+    lines = []
+    for kind, family in (("gauge", gauges), ("counter", counters)):
+        for name, (help_text, value) in family.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+    return PlainTextResponse(
+        metrics.render(lines), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API info."""
@@ -63,4 +154,5 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
     }
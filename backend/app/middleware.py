@@ -0,0 +1,213 @@
+import asyncio
+import math
+import re
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import database as db
+from app.config import settings
+from app.utils import admission, metrics
+
+
+# Cookie carrying the primary WAL position of a client's last write
+LSN_COOKIE = "primary_lsn"
+_LSN_PATTERN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+# Requests whose reads may be served by the replica
+_READ_METHODS = {"GET", "HEAD"}
+
+# Probes and scrapes that must answer even while the API sheds load
+_UNTHROTTLED_PATHS = {"/", "/health", "/ready", "/metrics"}
+
+
+class UnitOfWorkMiddleware:
+    """
+    Run every HTTP request inside a database unit of work.
+
+    Implemented as plain ASGI (not BaseHTTPMiddleware) so the endpoint and
+    its background tasks run in the same context as the unit of work and
+    the connection is released only after the response has fully finished.
+
+    With a replica configured, GET/HEAD requests read from it, and other
+    requests stay on the primary. A request that wrote gets a short-lived
+    cookie with the primary's WAL position. That client's next reads use
+    the replica only once it has replayed that far, so a board refresh
+    right after an edit never shows the board from before it.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        read_only = scope["method"] in _READ_METHODS
+        min_lsn = None
+        if read_only and db.replica_pool is not None:
+            cookie = cookie_parser(Headers(scope=scope).get("cookie", "")).get(LSN_COOKIE)
+            if cookie and _LSN_PATTERN.match(cookie):
+                min_lsn = cookie
+
+        async def send_with_lsn(message: Message) -> None:
+            if message["type"] == "http.response.start" and not read_only:
+                lsn = await db.primary_lsn()
+                if lsn is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "set-cookie",
+                        f"{LSN_COOKIE}={lsn}; Max-Age={settings.DB_REPLICA_STICKY_SECONDS}; "
+                        "Path=/; HttpOnly; SameSite=Lax",
+                    )
+            await send(message)
+
+        async with db.unit_of_work(read_only=read_only, min_lsn=min_lsn):
+            await self.app(scope, receive, send_with_lsn)
+
+
+class MetricsMiddleware:
+    """
+    Record latency and database statement count for every HTTP request.
+
+    Routes are labelled by their template (/api/tasks/{task_id}), read
+    from the scope after routing, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request = metrics.RequestStats(scope)
+        token = metrics.current_request.set(request)
+        metrics.in_flight.add(request)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.current_request.reset(token)
+            metrics.in_flight.discard(request)
+            route = request.route
+            metrics.request_latency.observe(
+                (scope["method"], route, status), time.perf_counter() - started
+            )
+            metrics.request_queries.observe((route,), request.queries)
+
+
+class AdmissionMiddleware:
+    """
+    Turn requests away early instead of letting them queue for connections.
+
+    In order, a request is refused:
+      - 503 while ADMISSION_MAX_DB_WAITING callers already wait for a
+        pooled connection, so the backlog drains instead of growing
+      - 429 when its client's token bucket is empty
+      - 429 when its client already has ADMISSION_MAX_IN_FLIGHT requests
+        running and ADMISSION_MAX_QUEUED waiting, or no slot frees up
+        within ADMISSION_QUEUE_TIMEOUT
+    Every refusal carries Retry-After. Health, readiness and metrics
+    endpoints skip admission entirely, so probes keep answering under
+    load, and so do CORS preflights (OPTIONS). Sits outside the unit of work: a refused request never holds a
+    connection.
+
+    A slot is given back as soon as the response starts: the work it
+    caps is done by then, and long-lived streams such as /api/events
+    would otherwise hold one for as long as the tab stays open.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.ADMISSION_ENABLED
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in _UNTHROTTLED_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        shed_at = settings.ADMISSION_MAX_DB_WAITING
+        if shed_at and db.metrics.waiting >= shed_at:
+            await self._refuse(scope, receive, send, 503, "overloaded", 1.0)
+            return
+
+        tenant = admission.get_tenant(
+            admission.tenant_key(scope),
+            settings.ADMISSION_RATE,
+            settings.ADMISSION_BURST,
+            settings.ADMISSION_MAX_IN_FLIGHT,
+        )
+        retry_after = tenant.bucket.take()
+        if retry_after:
+            await self._refuse(scope, receive, send, 429, "rate_limited", retry_after)
+            return
+
+        if tenant.slots.locked():
+            if tenant.waiting >= settings.ADMISSION_MAX_QUEUED:
+                await self._refuse(scope, receive, send, 429, "queue_full", 1.0)
+                return
+            tenant.waiting += 1
+            try:
+                await asyncio.wait_for(tenant.slots.acquire(), settings.ADMISSION_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self._refuse(scope, receive, send, 429, "queue_timeout", 1.0)
+                return
+            finally:
+                tenant.waiting -= 1
+        else:
+            await tenant.slots.acquire()
+
+        tenant.in_flight += 1
+        held = True
+
+        def release() -> None:
+            nonlocal held
+            if held:
+                held = False
+                tenant.in_flight -= 1
+                tenant.slots.release()
+
+        async def send_releasing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_releasing)
+        finally:
+            release()
+
+    @staticmethod
+    async def _refuse(
+        scope: Scope, receive: Receive, send: Send, status: int, reason: str, retry_after: float
+    ) -> None:
+        metrics.admission_rejections.inc((reason,))
+        detail = (
+            "Too many requests from this client"
+            if status == 429
+            else "Server is overloaded, try again shortly"
+        )
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status,
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 60))))},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, EmailStr
+
+from app.models.family import FamilyResponse
+from app.models.user import UserResponse
+
+
+class GoogleProfile(BaseModel):
+    """Google identity as verified by NextAuth."""
+
+    google_id: str
+    email: EmailStr
+    name: str
+    image: str | None = None
+
+
+class AuthResponse(BaseModel):
+    """The signed-in user with their family."""
+
+    user: UserResponse
+    family: FamilyResponse
+    is_new_user: bool
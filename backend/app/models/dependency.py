@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, model_validator
 
+from app.models.task import Status
+
 
 class DependencyBase(BaseModel):
     """Base dependency fields."""
@@ -31,3 +33,63 @@ class DependencyResponse(DependencyBase):
 
     class Config:
         from_attributes = True
+
+
+class DependencyEdge(BaseModel):
+    """One edge in a bulk request; self-dependencies are reported, not raised."""
+
+    task_id: int
+    depends_on_task_id: int
+
+
+class DependencyBulkCreate(BaseModel):
+    """Edges to create together."""
+
+    dependencies: list[DependencyEdge]
+
+
+class RejectedDependency(DependencyEdge):
+    """An edge from a bulk request that was not created."""
+
+    reason: str
+
+
+class DependencyBulkResponse(BaseModel):
+    """Outcome of a bulk dependency request."""
+
+    created: list[DependencyResponse]
+    rejected: list[RejectedDependency]
+
+
+class GraphNode(BaseModel):
+    """A task in a dependency neighbourhood."""
+
+    id: int
+    status: Status
+    # Hops from the root: negative for prerequisites, positive for dependents
+    depth: int
+
+
+class TaskGraph(BaseModel):
+    """Transitive dependency neighbourhood of a task."""
+
+    root: int
+    nodes: list[GraphNode]
+    # [task_id, depends_on_task_id] pairs among the returned nodes
+    edges: list[tuple[int, int]]
+
+
+class GraphExport(BaseModel):
+    """
+    A family's dependency graph in compressed sparse row form.
+
+    `nodes` lists task ids in topological order; the dependents of
+    nodes[i] are nodes[j] for j in targets[offsets[i]:offsets[i + 1]].
+    Tasks without any dependency are omitted.
+    """
+
+    family_id: int | None
+    graph_version: int
+    nodes: list[int]
+    offsets: list[int]
+    targets: list[int]
@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.models.task import Status
+
+
+class DependentsChangedEvent(BaseModel):
+    """
+    Published when a task entering or leaving done flips the blocked
+    state of some of its dependents.
+    """
+
+    type: Literal["dependents_unblocked", "dependents_blocked"]
+    task_id: int
+    family_id: int | None = None
+    status: Status
+    dependent_ids: list[int]
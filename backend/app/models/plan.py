@@ -0,0 +1,32 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from app.models.task import Status
+
+
+class PlanEntry(BaseModel):
+    """Schedule information for one task in a plan."""
+
+    task_id: int
+    status: Status
+    due_date: date | None = None
+    # Latest due date among unfinished prerequisites, i.e. the earliest
+    # date the task can start if everything before it lands on time
+    earliest_start: date | None = None
+    # Unfinished tasks on the longest prerequisite chain ending here
+    chain_length: int
+    at_risk: bool = False  # earliest_start falls after due_date
+    on_critical_path: bool = False
+
+
+class TaskPlan(BaseModel):
+    """Topological schedule of a task's prerequisites or a whole family."""
+
+    family_id: int | None = None
+    graph_version: int
+    order: list[int]  # Task IDs, prerequisites first
+    critical_path: list[int]  # Longest chain of unfinished tasks, first step first
+    tasks: list[PlanEntry]
+    # Single-task plans: unfinished prerequisites scheduled after its due date
+    blockers: list[int] = []
@@ -22,12 +22,20 @@ class SubtaskUpdate(BaseModel):
     completed: bool | None = None
 
 
+class SubtaskBulkToggle(BaseModel):
+    """Set completion on several subtasks in one request."""
+
+    subtask_ids: list[int]
+    completed: bool
+
+
 class SubtaskResponse(SubtaskBase):
     """Subtask data returned from API."""
 
     id: int
     task_id: int
     completed: bool
+    version: int
     created_at: datetime
     updated_at: datetime
 
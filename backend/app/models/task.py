@@ -37,6 +37,7 @@ class TaskBase(BaseModel):
     priority: Priority = "none"
     task_type: TaskType = "other"
     tags: list[str] | None = None
+    family_id: int | None = None
 
 
 class TaskCreate(TaskBase):
@@ -63,11 +64,17 @@ class TaskResponse(TaskBase):
     """Task data returned from API."""
 
     id: int
+    version: int
+    rank: str | None = None
     created_at: datetime
     updated_at: datetime
     assignee: UserResponse | None = None
     assignees: list[UserResponse] = []
     blocking: list[int] = []  # Task IDs this task blocks
+    blocked_by: list[int] = []  # Task IDs this task depends on
+    blocked: bool = False  # Some task in blocked_by is not done yet
+    subtask_total: int = 0
+    subtask_completed: int = 0
     subtasks: list[SubtaskInTask] = []
     links: list[LinkInTask] = []
 
@@ -75,6 +82,30 @@ class TaskResponse(TaskBase):
         from_attributes = True
 
 
+class TaskUpdateResponse(TaskResponse):
+    """
+    A task after a write, plus the dependents whose blocked state the
+    write flipped by moving the task into or out of done.
+    """
+
+    unblocked_task_ids: list[int] = []  # Dependents that just became ready
+    reblocked_task_ids: list[int] = []  # Dependents blocked again by a reopen
+
+
+class TaskMove(BaseModel):
+    """
+    Where to drop a task on the board.
+
+    Give the neighbours the card lands between; either may be omitted at
+    the top or bottom of a column. With no neighbours the task goes to the
+    bottom of the target status column.
+    """
+
+    status: Status | None = None
+    previous_task_id: int | None = None
+    next_task_id: int | None = None
+
+
 class TaskFilterParams(BaseModel):
     """Query parameters for filtering and sorting tasks."""
 
@@ -83,5 +114,6 @@ class TaskFilterParams(BaseModel):
     due_date_from: date | None = None
     due_date_to: date | None = None
     priority: Priority | None = None
-    sort_by: Literal["due_date", "priority", "created_at"] = "created_at"
+    sort_by: Literal["due_date", "priority", "created_at", "rank"] = "created_at"
     sort_order: Literal["asc", "desc"] = "desc"
+    include_subtasks: bool = True
@@ -43,6 +43,7 @@ class UserResponse(UserBase):
     """User data returned from API."""
 
     id: int
+    version: int
     created_at: datetime
     updated_at: datetime
 
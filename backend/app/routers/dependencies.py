@@ -1,7 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
+from typing import Literal
 
-from app.models.dependency import DependencyCreate, DependencyResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+
+from app.models.dependency import (
+    DependencyBulkCreate,
+    DependencyBulkResponse,
+    DependencyCreate,
+    DependencyResponse,
+    GraphExport,
+)
 from app.services import dependency_service
+from app.utils.concurrency import if_none_match_hits
+from app.utils.responses import model_list_response, model_response
 
 router = APIRouter()
 
@@ -9,13 +19,47 @@ router = APIRouter()
 @router.get("", response_model=list[DependencyResponse])
 async def list_dependencies():
     """Get all dependencies."""
-    return await dependency_service.get_dependencies()
+    return await model_list_response(await dependency_service.get_dependencies())
+
+
+@router.get(
+    "/graph",
+    response_model=GraphExport,
+    responses={200: {"content": {"application/octet-stream": {}}}},
+)
+async def export_graph(
+    family_id: int | None = Query(
+        None, description="Family to export (omit for tasks without a family)"
+    ),
+    format: Literal["json", "binary"] = Query("json", description="Response encoding"),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Export a family's dependency graph as compressed sparse row arrays.
+
+    `nodes` holds task ids in topological order and the dependents of
+    nodes[i] are nodes[targets[offsets[i]]] .. nodes[targets[offsets[i+1]-1]].
+
+    `format=binary` returns `application/octet-stream`, little-endian:
+    a 20-byte header (magic `CSR1`, uint32 node count N, uint32 edge count
+    M, int64 graph version), then int32[N] task ids, uint32[N+1] offsets
+    and uint32[M] targets. The ETag is the graph version plus the format,
+    so unchanged graphs revalidate with 304 in either encoding.
+    """
+    export = await dependency_service.get_graph_export(family_id)
+    etag = f'"{export.version}-{format}"'
+    if if_none_match_hits(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    if format == "binary":
+        return Response(export.binary, media_type="application/octet-stream", headers={"ETag": etag})
+    return Response(export.json, media_type="application/json", headers={"ETag": etag})
 
 
 @router.get("/task/{task_id}", response_model=list[DependencyResponse])
 async def get_dependencies_for_task(task_id: int):
     """Get all dependencies for a specific task."""
-    return await dependency_service.get_dependencies_for_task(task_id)
+    return await model_list_response(await dependency_service.get_dependencies_for_task(task_id))
 
 
 @router.post("", response_model=DependencyResponse, status_code=status.HTTP_201_CREATED)
@@ -32,12 +76,25 @@ async def create_dependency(dependency: DependencyCreate):
     - Adding the dependency won't create a cycle
     """
     try:
-        return await dependency_service.create_dependency(dependency)
+        created = await dependency_service.create_dependency(dependency)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
+    return model_response(created, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=DependencyBulkResponse)
+async def create_dependencies(request: DependencyBulkCreate):
+    """
+    Create many dependencies in one transaction.
+
+    Edges are validated like single creates, but the cycle check runs once
+    over the combined graph. Invalid edges don't fail the request; they
+    are listed in `rejected` with the reason.
+    """
+    return model_response(await dependency_service.create_dependencies(request.dependencies))
 
 
 @router.delete("/{dependency_id}", status_code=status.HTTP_204_NO_CONTENT)
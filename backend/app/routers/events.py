@@ -0,0 +1,42 @@
+import asyncio
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.services import event_service
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+
+@router.get("")
+async def stream_events(
+    family_id: int | None = Query(None, description="Only events for this family"),
+):
+    """
+    Stream change events as server-sent events.
+
+    A `dependents_unblocked` event lists tasks that just became ready
+    because a prerequisite was completed; `dependents_blocked` lists
+    tasks blocked again because one was reopened. Clients can apply them
+    to the ready queue without refetching the board.
+    """
+    queue = event_service.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if family_id is not None and event.family_id != family_id:
+                    continue
+                yield f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+        finally:
+            event_service.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, status
 
-from app.models.subtask import SubtaskCreate, SubtaskResponse, SubtaskUpdate
+from app.models.subtask import (
+    SubtaskBulkToggle,
+    SubtaskCreate,
+    SubtaskResponse,
+    SubtaskUpdate,
+)
 from app.services import subtask_service
+from app.utils.concurrency import PreconditionFailedError, format_etag, parse_if_match
+from app.utils.responses import model_list_response, model_response
 
 router = APIRouter()
 
@@ -9,7 +16,7 @@ router = APIRouter()
 @router.get("/tasks/{task_id}/subtasks", response_model=list[SubtaskResponse])
 async def list_subtasks(task_id: int):
     """Get all subtasks for a task."""
-    return await subtask_service.get_subtasks_for_task(task_id)
+    return await model_list_response(await subtask_service.get_subtasks_for_task(task_id))
 
 
 @router.post(
@@ -20,24 +27,49 @@ async def list_subtasks(task_id: int):
 async def create_subtask(task_id: int, subtask: SubtaskCreate):
     """Create a new subtask for a task."""
     try:
-        return await subtask_service.create_subtask(task_id, subtask)
+        created = await subtask_service.create_subtask(task_id, subtask)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    return model_response(created, status_code=status.HTTP_201_CREATED)
+
+
+@router.patch("/subtasks", response_model=list[SubtaskResponse])
+async def toggle_subtasks(toggle: SubtaskBulkToggle):
+    """Mark many subtasks complete or incomplete in one statement."""
+    toggled = await subtask_service.toggle_subtasks(toggle.subtask_ids, toggle.completed)
+    return await model_list_response(toggled)
 
 
 @router.patch("/subtasks/{subtask_id}", response_model=SubtaskResponse)
-async def update_subtask(subtask_id: int, update: SubtaskUpdate):
+async def update_subtask(
+    subtask_id: int,
+    update: SubtaskUpdate,
+    if_match: str | None = Header(None),
+):
     """Update a subtask (toggle completion or change title)."""
-    result = await subtask_service.update_subtask(subtask_id, update)
+    try:
+        expected_versions = parse_if_match(if_match)
+        result = await subtask_service.update_subtask(subtask_id, update, expected_versions)
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
     if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Subtask {subtask_id} not found",
         )
-    return result
+    return model_response(result, headers={"ETag": format_etag(result.version)})
 
 
 @router.delete("/subtasks/{subtask_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, status
 
 from app.models.task_link import TaskLinkCreate, TaskLinkResponse
 from app.services import task_link_service
+from app.utils.responses import model_list_response, model_response
 
 router = APIRouter()
 
@@ -9,7 +10,7 @@ router = APIRouter()
 @router.get("/tasks/{task_id}/links", response_model=list[TaskLinkResponse])
 async def list_links(task_id: int):
     """Get all links for a task."""
-    return await task_link_service.get_links_for_task(task_id)
+    return await model_list_response(await task_link_service.get_links_for_task(task_id))
 
 
 @router.post(
@@ -20,12 +21,13 @@ async def list_links(task_id: int):
 async def create_link(task_id: int, link: TaskLinkCreate):
     """Create a new link for a task."""
     try:
-        return await task_link_service.create_link(task_id, link)
+        created = await task_link_service.create_link(task_id, link)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         )
+    return model_response(created, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/links/{link_id}", status_code=status.HTTP_204_NO_CONTENT)
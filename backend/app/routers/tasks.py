@@ -1,21 +1,35 @@
 from datetime import date
 from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Response, status
 
+from app.config import settings
+from app.models.dependency import TaskGraph
+from app.models.plan import TaskPlan
 from app.models.task import (
     Priority,
     Status,
     TaskCreate,
     TaskFilterParams,
+    TaskMove,
     TaskResponse,
     TaskUpdate,
+    TaskUpdateResponse,
 )
-from app.services import task_service
+from app.services import dependency_service, plan_service, task_service
+from app.utils.concurrency import PreconditionFailedError, format_etag, parse_if_match
+from app.utils.ranking import needs_rebalance
+from app.utils.responses import model_list_response, model_response
 
 router = APIRouter()
 
 
+def _schedule_rebalance(background_tasks: BackgroundTasks, task: TaskResponse) -> None:
+    """Respace the task's column after the response if its rank key grew too long."""
+    if needs_rebalance(task.rank):
+        background_tasks.add_task(task_service.rebalance_column, task.status, task.family_id)
+
+
 @router.get("", response_model=list[TaskResponse])
 async def list_tasks(
     status: Status | None = Query(None, description="Filter by status"),
@@ -23,10 +37,13 @@ async def list_tasks(
     due_date_from: date | None = Query(None, description="Filter by due date (from)"),
     due_date_to: date | None = Query(None, description="Filter by due date (to)"),
     priority: Priority | None = Query(None, description="Filter by priority"),
-    sort_by: Literal["due_date", "priority", "created_at"] = Query(
+    sort_by: Literal["due_date", "priority", "created_at", "rank"] = Query(
         "created_at", description="Sort by field"
     ),
     sort_order: Literal["asc", "desc"] = Query("desc", description="Sort order"),
+    include_subtasks: bool = Query(
+        True, description="Embed subtask rows (counters are always included)"
+    ),
 ):
     """Get all tasks with optional filtering and sorting."""
     filters = TaskFilterParams(
@@ -37,8 +54,39 @@ async def list_tasks(
         priority=priority,
         sort_by=sort_by,
         sort_order=sort_order,
+        include_subtasks=include_subtasks,
     )
-    return await task_service.get_tasks(filters)
+    if settings.DB_RENDERED_LISTS:
+        return Response(await task_service.get_tasks_json(filters), media_type="application/json")
+    return await model_list_response(await task_service.get_tasks(filters))
+
+
+@router.get("/plan", response_model=TaskPlan)
+async def get_family_plan(
+    family_id: int | None = Query(
+        None, description="Family to plan (omit for tasks without a family)"
+    ),
+):
+    """
+    Schedule every task in a family over its dependency graph.
+
+    Returns a topological order, the critical path (longest chain of
+    unfinished tasks), each task's earliest possible start and whether it
+    is at risk of missing its due date.
+    """
+    return await plan_service.get_family_plan(family_id)
+
+
+@router.get("/ready", response_model=list[TaskResponse])
+async def list_ready_tasks(
+    assignee: int | None = Query(None, description="Only tasks assigned to this user"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of tasks"),
+):
+    """
+    Get the ready-to-work queue: unfinished tasks with every prerequisite
+    done, most urgent first and then by due date.
+    """
+    return await model_list_response(await task_service.get_ready_tasks(assignee, limit))
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
@@ -50,26 +98,83 @@ async def get_task(task_id: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Task {task_id} not found",
         )
-    return task
+    return model_response(task, headers={"ETag": format_etag(task.version)})
+
+
+@router.get("/{task_id}/plan", response_model=TaskPlan)
+async def get_task_plan(task_id: int):
+    """
+    Schedule a task's transitive prerequisites.
+
+    `blockers` lists unfinished prerequisites that are due (or can only
+    start) after the task's own due date.
+    """
+    plan = await plan_service.get_task_plan(task_id)
+    if plan is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found",
+        )
+    return plan
+
+
+@router.get("/{task_id}/graph", response_model=TaskGraph)
+async def get_task_graph(
+    task_id: int,
+    direction: Literal["up", "down", "both"] = Query(
+        "both", description="up: blocked by, down: blocking"
+    ),
+    depth: int | None = Query(None, ge=1, description="Maximum hops from the task"),
+):
+    """Get every task transitively blocking or blocked by a task, with edges."""
+    graph = await dependency_service.get_task_graph(task_id, direction, depth)
+    if graph is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found",
+        )
+    return graph
 
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(task: TaskCreate):
-    """Create a new task."""
+async def create_task(task: TaskCreate, background_tasks: BackgroundTasks):
+    """Create a new task at the bottom of its status column."""
     try:
-        return await task_service.create_task(task)
+        created = await task_service.create_task(task)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
+    _schedule_rebalance(background_tasks, created)
+    return model_response(created, status_code=status.HTTP_201_CREATED)
+
+
+@router.put("/{task_id}", response_model=TaskUpdateResponse)
+async def update_task(
+    task_id: int,
+    task: TaskUpdate,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
+):
+    """
+    Update a task.
 
+    Send the task's ETag in If-Match to reject the write with 412 if
+    someone else changed the task in the meantime.
 
-@router.put("/{task_id}", response_model=TaskResponse)
-async def update_task(task_id: int, task: TaskUpdate):
-    """Update a task."""
+    Moving the task into or out of done lists the dependents that became
+    ready (`unblocked_task_ids`) or blocked again (`reblocked_task_ids`);
+    the same sets are published on /api/events.
+    """
     try:
-        updated = await task_service.update_task(task_id, task)
+        expected_versions = parse_if_match(if_match)
+        updated = await task_service.update_task(task_id, task, expected_versions)
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -81,7 +186,44 @@ async def update_task(task_id: int, task: TaskUpdate):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Task {task_id} not found",
         )
-    return updated
+    _schedule_rebalance(background_tasks, updated)
+    return model_response(updated, headers={"ETag": format_etag(updated.version)})
+
+
+@router.post("/{task_id}/move", response_model=TaskUpdateResponse)
+async def move_task(
+    task_id: int,
+    move: TaskMove,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
+):
+    """
+    Move a task between two neighbouring cards, optionally changing column.
+
+    Only the moved task is written; its rank key is computed from the
+    neighbours' keys.
+    """
+    try:
+        expected_versions = parse_if_match(if_match)
+        moved = await task_service.move_task(task_id, move, expected_versions)
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    if moved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found",
+        )
+    _schedule_rebalance(background_tasks, moved)
+    return model_response(moved, headers={"ETag": format_etag(moved.version)})
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
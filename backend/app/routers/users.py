@@ -1,15 +1,24 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
 
+from app.config import settings
 from app.models.user import UserCreate, UserResponse, UserUpdate
 from app.services import user_service
+from app.utils.concurrency import PreconditionFailedError, format_etag, parse_if_match
+from app.utils.responses import model_list_response, model_response
 
 router = APIRouter()
 
 
 @router.get("", response_model=list[UserResponse])
-async def list_users():
-    """Get all users."""
-    return await user_service.get_users()
+async def list_users(
+    family_id: int | None = Query(None, description="Only users of this family"),
+):
+    """Get all users, optionally only those of one family."""
+    if settings.DB_RENDERED_LISTS:
+        return Response(
+            await user_service.get_users_json(family_id), media_type="application/json"
+        )
+    return await model_list_response(await user_service.get_users(family_id))
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -21,7 +30,7 @@ async def get_user(user_id: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User {user_id} not found",
         )
-    return user
+    return model_response(user, headers={"ETag": format_etag(user.version)})
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -35,11 +44,16 @@ async def create_user(user: UserCreate):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"User with email {user.email} already exists",
             )
-    return await user_service.create_user(user)
+    created = await user_service.create_user(user)
+    return model_response(created, status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user: UserUpdate):
+async def update_user(
+    user_id: int,
+    user: UserUpdate,
+    if_match: str | None = Header(None),
+):
     """Update a user."""
     # Check for duplicate email if email is being updated (and not null)
     if user.email is not None:
@@ -50,13 +64,26 @@ async def update_user(user_id: int, user: UserUpdate):
                 detail=f"User with email {user.email} already exists",
             )
 
-    updated = await user_service.update_user(user_id, user)
+    try:
+        expected_versions = parse_if_match(if_match)
+        updated = await user_service.update_user(user_id, user, expected_versions)
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
     if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User {user_id} not found",
         )
-    return updated
+    return model_response(updated, headers={"ETag": format_etag(updated.version)})
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,153 @@
+import logging
+
+from app import database as db
+from app.models.auth import AuthResponse, GoogleProfile
+from app.services import identity_service, user_dimension_service
+
+logger = logging.getLogger(__name__)
+
+# Resolve a Google identity to its user and family in one statement:
+#   existing  the user already signed in with this Google account
+#   linked    a user with the same email gets the Google ID (and a family if
+#             it had none), replacing any Google ID it was linked to before
+#   created   otherwise a new family and user
+# A concurrent first login that wins the race makes the users insert hit
+# the unique google_id index and return nothing; see sync_google_user.
+_SYNC_SQL = """
+    WITH existing AS (
+        SELECT id, name, first_name, last_name, email, avatar, google_id, family_id,
+               version, created_at, updated_at
+        FROM users
+        WHERE google_id = $1
+    ), linkable AS (
+        SELECT id, family_id
+        FROM users
+        WHERE email = $2
+          AND NOT EXISTS (SELECT 1 FROM existing)
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE
+    ), new_family AS (
+        INSERT INTO family_accounts (name)
+        SELECT $4
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+          AND NOT EXISTS (SELECT 1 FROM linkable WHERE family_id IS NOT NULL)
+        RETURNING id, name, created_at, updated_at
+    ), linked AS (
+        UPDATE users u
+        SET google_id = $1,
+            family_id = COALESCE(u.family_id, (SELECT id FROM new_family)),
+            avatar = COALESCE(u.avatar, $3),
+            version = u.version + 1
+        FROM linkable l
+        WHERE u.id = l.id
+        RETURNING u.id, u.name, u.first_name, u.last_name, u.email, u.avatar,
+                  u.google_id, u.family_id, u.version, u.created_at, u.updated_at
+    ), created AS (
+        INSERT INTO users (name, email, google_id, avatar, family_id)
+        SELECT $5, $2, $1, $3, id
+        FROM new_family
+        WHERE NOT EXISTS (SELECT 1 FROM linkable)
+        ON CONFLICT (google_id) DO NOTHING
+        RETURNING id, name, first_name, last_name, email, avatar, google_id, family_id,
+                  version, created_at, updated_at
+    ), synced AS (
+        SELECT *, 'existing' AS outcome FROM existing
+        UNION ALL
+        SELECT *, 'linked' FROM linked
+        UNION ALL
+        SELECT *, 'created' FROM created
+    )
+    -- Rows inserted by new_family are not visible to this statement's
+    -- family_accounts scan, so a new family comes from its RETURNING
+    SELECT
+        s.*,
+        COALESCE(nf.name, f.name) AS family_name,
+        COALESCE(nf.created_at, f.created_at) AS family_created_at,
+        COALESCE(nf.updated_at, f.updated_at) AS family_updated_at,
+        nf.id IS NOT NULL AS family_created
+    FROM synced s
+    LEFT JOIN new_family nf ON nf.id = s.family_id
+    LEFT JOIN family_accounts f ON f.id = s.family_id
+"""
+
+
+class _LostRace(Exception):
+    """A concurrent first login created the user while this one ran."""
+
+
+def _family_name(name: str) -> str:
+    """Default family name: 'The <Lastname> Family' or "<Name>'s Family"."""
+    return f"The {name.split()[-1]} Family" if " " in name else f"{name}'s Family"
+
+
+async def sync_google_user(profile: GoogleProfile) -> AuthResponse | None:
+    """
+    Find or create the user and family for a verified Google identity.
+
+    A returning user's sync writes nothing, so it is answered from the
+    identity cache (one indexed read on a miss) and the sync statement
+    only runs for accounts not yet linked to a user.
+
+    Returns None if the user exists but has no family, which should never
+    happen. Safe under concurrent logins: google_id is unique, so a login
+    racing another first login for the same account rolls back (family
+    included) and resolves again, now finding the winner's user.
+    """
+    identity = await identity_service.resolve(profile.google_id)
+    if identity is not None and identity.family is not None:
+        return AuthResponse.model_construct(
+            user=identity.user, family=identity.family, is_new_user=False
+        )
+
+    for attempt in range(2):
+        try:
+            async with db.transaction():
+                row = await db.fetch_one(
+                    _SYNC_SQL,
+                    profile.google_id,
+                    profile.email,
+                    profile.image,
+                    _family_name(profile.name),
+                    profile.name,
+                )
+                if row is None:
+                    raise _LostRace()
+            break
+        except _LostRace:
+            if attempt:
+                raise RuntimeError(
+                    f"Could not resolve Google user {profile.google_id}"
+                ) from None
+
+    # Sign-in is the authoritative lookup; later requests resolve from cache.
+    # A linked user may have carried another Google ID, now released.
+    if row["outcome"] == "linked":
+        identity_service.forget_user(row["id"])
+    identity = identity_service.remember(profile.google_id, row)
+
+    if identity.family is None:
+        logger.error(f"Integrity Error: User {row['id']} has no associated family.")
+        return None
+
+    if row["family_created"]:
+        reason = ", reason: 'legacy_migration'" if row["outcome"] == "linked" else ""
+        logger.info(
+            f"family.created {{ family_id: {row['family_id']}, user_id: {row['id']}, "
+            f"email: '{profile.email}'{reason} }}"
+        )
+    if row["outcome"] != "existing":
+        # A new member (or one moved out of no family) changes the family's users
+        user_dimension_service.invalidate(row["family_id"])
+        if row["outcome"] == "linked":
+            user_dimension_service.invalidate(None)
+    if row["outcome"] == "linked":
+        logger.info(f"user.linked {{ user_id: {row['id']}, google_id: '{profile.google_id}' }}")
+    elif row["outcome"] == "created":
+        logger.info(f"user.created {{ user_id: {row['id']}, google_id: '{profile.google_id}' }}")
+
+    return AuthResponse.model_construct(
+        user=identity.user,
+        family=identity.family,
+        is_new_user=row["outcome"] == "created",
+    )
@@ -0,0 +1,312 @@
+"""
+Transitive closure of the dependency graph, stored in dependency_closure.
+
+Every (ancestor, descendant) pair where the descendant transitively
+depends on the ancestor has a row holding the length of the shortest
+chain between them, so a task's upstream or downstream graph
+(dependency_service.get_task_graph) is one index scan instead of a
+recursive walk. Cycle checks use the cached in-memory graph, which the
+dependency service has to update for each edge anyway. The service
+updates the closure rows incrementally for each edge it writes.
+
+Like the cached graphs, a family's closure records the graph version it
+matches (dependency_graph_versions.closure_version). Writes the service
+did not see - scripts, or edges cascading away with a deleted task -
+leave it behind the graph version, and the family is rebuilt before its
+closure is next read or updated.
+"""
+
+from dataclasses import dataclass
+
+from app import database as db
+from app.services import graph_service
+from app.utils.cycle_detection import MAX_SEARCH_DEPTH
+
+# Shortest chain length for every pair reachable over the selected edges
+_PATHS_SQL = """
+    WITH RECURSIVE edges AS (
+        SELECT d.depends_on_task_id AS ancestor, d.task_id AS descendant
+        FROM dependencies d
+        JOIN tasks t ON t.id = d.task_id
+        WHERE {where}
+    ), paths(ancestor, descendant, depth) AS (
+        SELECT ancestor, descendant, 1 FROM edges
+        UNION
+        SELECT p.ancestor, e.descendant, p.depth + 1
+        FROM paths p
+        JOIN edges e ON e.ancestor = p.descendant
+        WHERE p.depth < {max_depth}
+    )
+    SELECT ancestor, descendant, MIN(depth) AS depth
+    FROM paths
+    WHERE ancestor <> descendant
+    GROUP BY ancestor, descendant
+"""
+
+
+@dataclass
+class ClosureMismatch:
+    """A pair whose stored depth differs from the one the edges imply."""
+
+    ancestor: int
+    descendant: int
+    expected_depth: int | None  # None: the pair should not be stored
+    stored_depth: int | None  # None: the pair is missing
+
+
+async def _set_version(family_id: int | None, version: int) -> None:
+    await db.execute(
+        "UPDATE dependency_graph_versions SET closure_version = $2 WHERE family_key = $1",
+        graph_service.family_key(family_id),
+        version,
+    )
+
+
+async def rebuild(family_id: int | None) -> None:
+    """
+    Recompute a family's closure rows from its edges.
+
+    Runs under the family's advisory lock, so concurrent readers catching
+    up and dependency writers never rewrite the same rows at once. A
+    caller that waited for the lock finds the closure already current and
+    skips the rebuild.
+    """
+    async with db.transaction():
+        await graph_service.lock_families([family_id])
+        row = await db.fetch_one(
+            "SELECT version, closure_version FROM dependency_graph_versions WHERE family_key = $1",
+            graph_service.family_key(family_id),
+        )
+        if row is not None and row["closure_version"] == row["version"]:
+            return
+        # Read the version first: if edges change while rebuilding, the
+        # closure is stamped older than what it holds and simply rebuilt again.
+        version = row["version"] if row is not None else 0
+        await db.execute(
+            """
+            DELETE FROM dependency_closure c
+            USING tasks t
+            WHERE t.id = c.descendant AND t.family_id IS NOT DISTINCT FROM $1
+            """,
+            family_id,
+        )
+        await db.execute(
+            "INSERT INTO dependency_closure (ancestor, descendant, depth) "
+            + _PATHS_SQL.format(
+                where="t.family_id IS NOT DISTINCT FROM $1",
+                max_depth=MAX_SEARCH_DEPTH,
+            ),
+            family_id,
+        )
+        await _set_version(family_id, version)
+
+
+async def rebuild_all() -> None:
+    """Recompute the whole closure table from the dependencies table."""
+    async with db.transaction():
+        # Every family with edges has a version row; hold all their locks
+        keys = await db.fetch_all("SELECT family_key FROM dependency_graph_versions")
+        await graph_service.lock_families([row["family_key"] for row in keys])
+        versions = await db.fetch_all(
+            "SELECT family_key, version FROM dependency_graph_versions"
+        )
+        await db.execute("DELETE FROM dependency_closure")
+        await db.execute(
+            "INSERT INTO dependency_closure (ancestor, descendant, depth) "
+            + _PATHS_SQL.format(where="TRUE", max_depth=MAX_SEARCH_DEPTH)
+        )
+        await db.execute(
+            """
+            UPDATE dependency_graph_versions v
+            SET closure_version = s.version
+            FROM UNNEST($1::int[], $2::bigint[]) AS s(family_key, version)
+            WHERE v.family_key = s.family_key
+            """,
+            [row["family_key"] for row in versions],
+            [row["version"] for row in versions],
+        )
+
+
+async def check() -> list[ClosureMismatch]:
+    """
+    Compare the closure table with a closure recomputed from the edges.
+
+    Families whose closure is behind their graph version are due for a
+    lazy rebuild anyway, but are still reported.
+    """
+    rows = await db.fetch_all(
+        f"""
+        WITH expected AS ({_PATHS_SQL.format(where="TRUE", max_depth=MAX_SEARCH_DEPTH)})
+        SELECT
+            COALESCE(e.ancestor, c.ancestor) AS ancestor,
+            COALESCE(e.descendant, c.descendant) AS descendant,
+            e.depth AS expected_depth,
+            c.depth AS stored_depth
+        FROM expected e
+        FULL JOIN dependency_closure c
+            ON c.ancestor = e.ancestor AND c.descendant = e.descendant
+        WHERE e.depth IS DISTINCT FROM c.depth
+        ORDER BY 1, 2
+        """
+    )
+    return [
+        ClosureMismatch(
+            ancestor=row["ancestor"],
+            descendant=row["descendant"],
+            expected_depth=row["expected_depth"],
+            stored_depth=row["stored_depth"],
+        )
+        for row in rows
+    ]
+
+
+async def ensure_current(family_id: int | None) -> None:
+    """Rebuild a family's closure if edges changed without it being updated."""
+    row = await db.fetch_one(
+        "SELECT version, closure_version FROM dependency_graph_versions WHERE family_key = $1",
+        graph_service.family_key(family_id),
+    )
+    if row is not None and row["closure_version"] != row["version"]:
+        await rebuild(family_id)
+
+
+async def _after_write(family_id: int | None) -> int | None:
+    """
+    Version to stamp after applying a write incrementally, or None if the
+    closure missed an earlier write and the family was rebuilt instead.
+
+    Must run after the write: its statement moved the family's version and
+    kept the one it replaced in previous_version.
+    """
+    row = await db.fetch_one(
+        """
+        SELECT version, previous_version, closure_version
+        FROM dependency_graph_versions WHERE family_key = $1
+        """,
+        graph_service.family_key(family_id),
+    )
+    if row is None or row["closure_version"] != row["previous_version"]:
+        await rebuild(family_id)
+        return None
+    return row["version"]
+
+
+async def edges_added(family_id: int | None, edges: list[tuple[int, int]]) -> None:
+    """
+    Extend a family's closure with newly inserted (prerequisite, dependent)
+    edges, all written by one statement.
+
+    Each edge connects every ancestor of its prerequisite (and the
+    prerequisite) to every descendant of its dependent (and the dependent).
+    """
+    version = await _after_write(family_id)
+    if version is None:
+        return
+
+    for prerequisite, dependent in edges:
+        await db.execute(
+            """
+            INSERT INTO dependency_closure (ancestor, descendant, depth)
+            SELECT up.node, down.node, MIN(up.depth + 1 + down.depth)
+            FROM (
+                SELECT ancestor AS node, depth FROM dependency_closure WHERE descendant = $1
+                UNION ALL
+                SELECT $1, 0
+            ) up
+            CROSS JOIN (
+                SELECT descendant AS node, depth FROM dependency_closure WHERE ancestor = $2
+                UNION ALL
+                SELECT $2, 0
+            ) down
+            GROUP BY up.node, down.node
+            ON CONFLICT (ancestor, descendant) DO UPDATE
+            SET depth = LEAST(dependency_closure.depth, EXCLUDED.depth)
+            """,
+            prerequisite,
+            dependent,
+        )
+    await _set_version(family_id, version)
+
+
+async def edge_removed(family_id: int | None, prerequisite: int, dependent: int) -> None:
+    """
+    Update a family's closure after one edge was deleted.
+
+    Only pairs from the prerequisite's side (it and its ancestors) to the
+    dependent's side (it and its descendants) can lose their chain or get
+    a longer one. Those are recomputed from the remaining edges, visiting
+    the affected ancestors dependents-first so each one combines its
+    direct dependents' already final rows.
+    """
+    version = await _after_write(family_id)
+    if version is None:
+        return
+
+    upper = [prerequisite] + [
+        row["ancestor"]
+        for row in await db.fetch_all(
+            "SELECT ancestor FROM dependency_closure WHERE descendant = $1", prerequisite
+        )
+    ]
+    lower = [dependent] + [
+        row["descendant"]
+        for row in await db.fetch_all(
+            "SELECT descendant FROM dependency_closure WHERE ancestor = $1", dependent
+        )
+    ]
+    upper_set, lower_set = set(upper), set(lower)
+
+    graph = await graph_service.get_graph(family_id)
+    position = {task_id: index for index, task_id in enumerate(graph.topological_order())}
+    upper.sort(key=lambda task_id: position.get(task_id, -1), reverse=True)
+    successors = {task_id: graph.dependents(task_id) for task_id in upper}
+
+    # Rows of dependents outside the affected side are unaffected by the deletion
+    outside = {s for targets in successors.values() for s in targets if s not in upper_set}
+    trusted: dict[int, dict[int, int]] = {}
+    for row in await db.fetch_all(
+        """
+        SELECT ancestor, descendant, depth FROM dependency_closure
+        WHERE ancestor = ANY($1::int[]) AND descendant = ANY($2::int[])
+        """,
+        list(outside),
+        lower,
+    ):
+        trusted.setdefault(row["ancestor"], {})[row["descendant"]] = row["depth"]
+
+    recomputed: dict[int, dict[int, int]] = {}
+    for ancestor in upper:
+        reach: dict[int, int] = {}
+        for successor in successors[ancestor]:
+            if successor in lower_set:
+                reach[successor] = 1
+            below = recomputed.get(successor) if successor in upper_set else trusted.get(successor)
+            for descendant, depth in (below or {}).items():
+                if depth + 1 < reach.get(descendant, depth + 2):
+                    reach[descendant] = depth + 1
+        recomputed[ancestor] = reach
+
+    pairs = [
+        (ancestor, descendant, depth)
+        for ancestor, reach in recomputed.items()
+        for descendant, depth in reach.items()
+    ]
+    await db.execute(
+        """
+        DELETE FROM dependency_closure
+        WHERE ancestor = ANY($1::int[]) AND descendant = ANY($2::int[])
+        """,
+        upper,
+        lower,
+    )
+    await db.execute(
+        """
+        INSERT INTO dependency_closure (ancestor, descendant, depth)
+        SELECT * FROM UNNEST($1::int[], $2::int[], $3::int[])
+        """,
+        [pair[0] for pair in pairs],
+        [pair[1] for pair in pairs],
+        [pair[2] for pair in pairs],
+    )
+    await _set_version(family_id, version)
+
@@ -1,11 +1,43 @@
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+
 from app import database as db
-from app.models.dependency import DependencyCreate, DependencyResponse
-from app.utils.cycle_detection import would_create_cycle
+from app.models.dependency import (
+    DependencyBulkResponse,
+    DependencyCreate,
+    DependencyEdge,
+    DependencyResponse,
+    GraphExport,
+    GraphNode,
+    RejectedDependency,
+    TaskGraph,
+)
+from app.services import closure_service, graph_service
+from app.utils.cycle_detection import MAX_SEARCH_DEPTH, format_cycle
+
+# Binary export header: magic, node count, edge count, graph version
+GRAPH_EXPORT_MAGIC = b"CSR1"
+_GRAPH_EXPORT_HEADER = struct.Struct("<4sIIq")
+
+
+@dataclass
+class _Export:
+    """A family's encoded graph export, valid for one graph version."""
+
+    version: int
+    json: bytes
+    binary: bytes
+
+
+# Encoded exports by family key
+_exports: dict[int, _Export] = {}
 
 
 def _record_to_dependency(record) -> DependencyResponse:
     """Convert a database record to a DependencyResponse."""
-    return DependencyResponse(
+    return DependencyResponse.model_construct(
         id=record["id"],
         task_id=record["task_id"],
         depends_on_task_id=record["depends_on_task_id"],
@@ -45,60 +77,327 @@ async def get_dependency_by_id(dependency_id: int) -> DependencyResponse | None:
     return _record_to_dependency(row)
 
 
-async def create_dependency(dependency: DependencyCreate) -> DependencyResponse:
-    """Create a new dependency with cycle detection."""
-    # Validate that both tasks exist
-    task = await db.fetch_one(
-        "SELECT id FROM tasks WHERE id = $1",
-        dependency.task_id,
-    )
-    if task is None:
-        raise ValueError(f"Task {dependency.task_id} not found")
+async def get_task_graph(
+    task_id: int,
+    direction: str = "both",
+    depth: int | None = None,
+) -> TaskGraph | None:
+    """
+    Get the transitive dependency neighbourhood of a task.
 
-    depends_on_task = await db.fetch_one(
-        "SELECT id FROM tasks WHERE id = $1",
-        dependency.depends_on_task_id,
-    )
-    if depends_on_task is None:
-        raise ValueError(f"Task {dependency.depends_on_task_id} not found")
+    Ancestors and descendants come straight from the closure table, so
+    no graph walk is needed however deep the chains are.
+
+    Args:
+        task_id: The root task
+        direction: "up" for what it is blocked by, "down" for what it
+            blocks, or "both"
+        depth: Maximum hops from the root (unbounded if None)
+
+    Returns:
+        Nodes with their status and hop distance, and the dependency edges
+        among them; None if the task does not exist
+    """
+    family = await db.fetch_one("SELECT family_id FROM tasks WHERE id = $1", task_id)
+    if family is None:
+        return None
+    await closure_service.ensure_current(family["family_id"])
 
-    # Check for existing dependency
-    existing = await db.fetch_one(
+    max_depth = min(depth or MAX_SEARCH_DEPTH, MAX_SEARCH_DEPTH)
+    rows = await db.fetch_all(
         """
-        SELECT id FROM dependencies
-        WHERE task_id = $1 AND depends_on_task_id = $2
+        WITH nodes AS (
+            SELECT ancestor AS node, -depth AS depth FROM dependency_closure
+            WHERE $2 AND descendant = $1 AND depth <= $4
+            UNION ALL
+            SELECT descendant, depth FROM dependency_closure
+            WHERE $3 AND ancestor = $1 AND depth <= $4
+            UNION ALL
+            SELECT $1::int, 0
+        )
+        SELECT t.id, t.status, n.depth,
+               ARRAY(
+                   SELECT d.depends_on_task_id FROM dependencies d
+                   WHERE d.task_id = t.id
+                     AND d.depends_on_task_id IN (SELECT node FROM nodes)
+               ) AS depends_on
+        FROM nodes n
+        JOIN tasks t ON t.id = n.node
+        ORDER BY n.depth, t.id
         """,
-        dependency.task_id,
-        dependency.depends_on_task_id,
+        task_id,
+        direction in ("up", "both"),
+        direction in ("down", "both"),
+        max_depth,
     )
-    if existing is not None:
-        raise ValueError("Dependency already exists")
-
-    # Check for cycle
-    if await would_create_cycle(dependency.task_id, dependency.depends_on_task_id):
-        raise ValueError(
-            "Adding this dependency would create a cycle. "
-            f"Task {dependency.depends_on_task_id} already depends on task {dependency.task_id} "
-            "directly or indirectly."
-        )
+    if not any(row["id"] == task_id for row in rows):
+        return None
 
-    row = await db.fetch_one(
-        """
-        INSERT INTO dependencies (task_id, depends_on_task_id)
-        VALUES ($1, $2)
-        RETURNING *
-        """,
-        dependency.task_id,
-        dependency.depends_on_task_id,
+    return TaskGraph(
+        root=task_id,
+        nodes=[GraphNode(id=row["id"], status=row["status"], depth=row["depth"]) for row in rows],
+        edges=[(row["id"], depends_on) for row in rows for depends_on in row["depends_on"]],
+    )
+
+
+def _encode_binary(export: GraphExport) -> bytes:
+    """
+    Little-endian layout: header (magic, node count N, edge count M,
+    graph version), then int32[N] task ids, uint32[N + 1] offsets and
+    uint32[M] target indexes.
+    """
+    parts = [
+        array("i", export.nodes),
+        array("I", export.offsets),
+        array("I", export.targets),
+    ]
+    if sys.byteorder != "little":
+        for part in parts:
+            part.byteswap()
+    header = _GRAPH_EXPORT_HEADER.pack(
+        GRAPH_EXPORT_MAGIC, len(export.nodes), len(export.targets), export.graph_version
+    )
+    return header + b"".join(part.tobytes() for part in parts)
+
+
+async def get_graph_export(family_id: int | None) -> _Export:
+    """
+    Get a family's dependency graph as CSR arrays, encoded as JSON and binary.
+
+    Built from the cached graph and reused until its version changes, so
+    repeated loads of a large board cost one version lookup.
+    """
+    graph = await graph_service.get_graph(family_id)
+    key = graph_service.family_key(family_id)
+    cached = _exports.get(key)
+    if cached is not None and cached.version == graph.version:
+        return cached
+
+    nodes, offsets, targets = graph.to_csr()
+    export = GraphExport(
+        family_id=family_id,
+        graph_version=graph.version,
+        nodes=nodes.tolist(),
+        offsets=offsets.tolist(),
+        targets=targets.tolist(),
+    )
+    encoded = _Export(
+        version=graph.version,
+        json=export.model_dump_json().encode(),
+        binary=_encode_binary(export),
+    )
+    _exports[key] = encoded
+    return encoded
+
+
+async def create_dependency(dependency: DependencyCreate) -> DependencyResponse:
+    """
+    Create a new dependency with cycle detection.
+
+    The cycle check inserts the edge into the family's cached graph, whose
+    topological order either absorbs it or names the cycle it would close.
+    The check and the insert run in one transaction under the family's
+    advisory lock, so two members adding A→B and B→A at the same time
+    cannot both pass. The family's closure is then updated incrementally
+    with the new edge.
+    """
+    # Validate that both tasks exist
+    rows = await db.fetch_all(
+        "SELECT id, family_id FROM tasks WHERE id = ANY($1::int[])",
+        [dependency.task_id, dependency.depends_on_task_id],
     )
+    families = {row["id"]: row["family_id"] for row in rows}
+    for task_id in (dependency.task_id, dependency.depends_on_task_id):
+        if task_id not in families:
+            raise ValueError(f"Task {task_id} not found")
+
+    family_id = families[dependency.task_id]
+    if families[dependency.depends_on_task_id] != family_id:
+        raise ValueError("Tasks in different families cannot depend on each other")
+
+    async with db.transaction():
+        # Held until commit: a concurrent writer in this family can only
+        # check for cycles once this edge is visible
+        await graph_service.lock_families([family_id])
+        graph = await graph_service.get_graph(family_id)
+
+        # Check for existing dependency
+        if graph.has_edge(dependency.depends_on_task_id, dependency.task_id):
+            raise ValueError("Dependency already exists")
+
+        # Check for cycle; on success the edge is already in the cached graph
+        cycle = graph.add_edge(dependency.depends_on_task_id, dependency.task_id)
+        if cycle is not None:
+            raise ValueError(
+                f"Adding this dependency would create a cycle: {format_cycle(cycle)} "
+                "(each task depends on the next)."
+            )
+
+        try:
+            row = await db.fetch_one(
+                """
+                INSERT INTO dependencies (task_id, depends_on_task_id)
+                VALUES ($1, $2)
+                ON CONFLICT (task_id, depends_on_task_id) DO NOTHING
+                RETURNING *
+                """,
+                dependency.task_id,
+                dependency.depends_on_task_id,
+            )
+            if row is None:
+                # The table had an edge the cached graph did not
+                raise ValueError("Dependency already exists")
+
+            await closure_service.edges_added(
+                family_id, [(dependency.depends_on_task_id, dependency.task_id)]
+            )
+            await graph_service.record_write(family_id, graph)
+        except Exception:
+            graph_service.invalidate(family_id)
+            raise
 
     return _record_to_dependency(row)
 
 
+async def create_dependencies(edges: list[DependencyEdge]) -> DependencyBulkResponse:
+    """
+    Create many dependencies at once.
+
+    Tasks and duplicates are validated with set operations over a single
+    task lookup, each family's graph is checked for cycles once with all
+    new edges combined, and the accepted edges are inserted in a single
+    statement, all under the involved families' advisory locks. Every
+    edge that is not created is reported with a reason.
+    """
+    rejected: list[RejectedDependency] = []
+
+    def reject(edge: tuple[int, int], reason: str) -> None:
+        rejected.append(
+            RejectedDependency(task_id=edge[0], depends_on_task_id=edge[1], reason=reason)
+        )
+
+    # (task_id, depends_on_task_id) pairs in request order, first one wins
+    requested: list[tuple[int, int]] = []
+    seen: set[tuple[int, int]] = set()
+    for edge in edges:
+        pair = (edge.task_id, edge.depends_on_task_id)
+        if pair[0] == pair[1]:
+            reject(pair, "A task cannot depend on itself")
+        elif pair in seen:
+            reject(pair, "Duplicate edge in request")
+        else:
+            seen.add(pair)
+            requested.append(pair)
+
+    task_ids = {task_id for pair in requested for task_id in pair}
+    rows = await db.fetch_all(
+        "SELECT id, family_id FROM tasks WHERE id = ANY($1::int[])",
+        list(task_ids),
+    )
+    families = {row["id"]: row["family_id"] for row in rows}
+    missing = task_ids - families.keys()
+
+    by_family: dict[int | None, list[tuple[int, int]]] = {}
+    for pair in requested:
+        missing_ids = [task_id for task_id in pair if task_id in missing]
+        if missing_ids:
+            reject(pair, f"Task {missing_ids[0]} not found")
+        elif families[pair[0]] != families[pair[1]]:
+            reject(pair, "Tasks in different families cannot depend on each other")
+        else:
+            by_family.setdefault(families[pair[0]], []).append(pair)
+
+    created: list[DependencyResponse] = []
+    graphs = {}
+    try:
+        async with db.transaction():
+            await graph_service.lock_families(by_family)
+
+            accepted: list[tuple[int, int]] = []
+            for family_id, pairs in by_family.items():
+                graph = await graph_service.get_graph(family_id)
+                graphs[family_id] = graph
+
+                existing = {pair for pair in pairs if graph.has_edge(pair[1], pair[0])}
+                for pair in pairs:
+                    if pair in existing:
+                        reject(pair, "Dependency already exists")
+                fresh = [pair for pair in pairs if pair not in existing]
+
+                cycles = graph.add_edges([(dep, task) for task, dep in fresh])
+                for pair in fresh:
+                    cycle = cycles.get((pair[1], pair[0]))
+                    if cycle is not None:
+                        reject(pair, f"Would create a cycle: {format_cycle(cycle)}")
+                    else:
+                        accepted.append(pair)
+
+            if accepted:
+                rows = await db.fetch_all(
+                    """
+                    INSERT INTO dependencies (task_id, depends_on_task_id)
+                    SELECT * FROM UNNEST($1::int[], $2::int[])
+                    ON CONFLICT (task_id, depends_on_task_id) DO NOTHING
+                    RETURNING *
+                    """,
+                    [pair[0] for pair in accepted],
+                    [pair[1] for pair in accepted],
+                )
+                added: dict[int | None, list[tuple[int, int]]] = {}
+                for row in rows:
+                    added.setdefault(families[row["task_id"]], []).append(
+                        (row["depends_on_task_id"], row["task_id"])
+                    )
+                for family_id, family_edges in added.items():
+                    await closure_service.edges_added(family_id, family_edges)
+                for family_id in {families[pair[0]] for pair in accepted}:
+                    await graph_service.record_write(family_id, graphs[family_id])
+
+                created = [_record_to_dependency(row) for row in rows]
+                inserted = {(row["task_id"], row["depends_on_task_id"]) for row in rows}
+                for pair in accepted:
+                    if pair not in inserted:
+                        # The table had an edge the cached graph did not
+                        graph_service.invalidate(families[pair[0]])
+                        reject(pair, "Dependency already exists")
+    except Exception:
+        for family_id in graphs:
+            graph_service.invalidate(family_id)
+        raise
+
+    return DependencyBulkResponse(created=created, rejected=rejected)
+
+
 async def delete_dependency(dependency_id: int) -> bool:
     """Delete a dependency. Returns True if dependency was deleted."""
-    result = await db.execute(
-        "DELETE FROM dependencies WHERE id = $1",
+    family = await db.fetch_one(
+        """
+        SELECT t.family_id FROM dependencies d
+        JOIN tasks t ON t.id = d.task_id
+        WHERE d.id = $1
+        """,
         dependency_id,
     )
-    return result == "DELETE 1"
+    if family is None:
+        return False
+
+    async with db.transaction():
+        await graph_service.lock_families([family["family_id"]])
+        row = await db.fetch_one(
+            """
+            DELETE FROM dependencies
+            WHERE id = $1
+            RETURNING task_id, depends_on_task_id
+            """,
+            dependency_id,
+        )
+        if row is None:
+            return False
+
+        await graph_service.edge_removed(
+            family["family_id"], row["depends_on_task_id"], row["task_id"]
+        )
+        await closure_service.edge_removed(
+            family["family_id"], row["depends_on_task_id"], row["task_id"]
+        )
+    return True
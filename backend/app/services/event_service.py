@@ -0,0 +1,36 @@
+"""
+In-process publish/subscribe for change events.
+
+Each subscriber gets its own bounded queue. Publishing never waits: a
+subscriber that falls behind loses its oldest events rather than
+slowing down the request that published them.
+"""
+
+import asyncio
+
+from app.models.event import DependentsChangedEvent
+
+# Events buffered per subscriber before the oldest are dropped
+MAX_QUEUED_EVENTS = 100
+
+_subscribers: set[asyncio.Queue] = set()
+
+
+def subscribe() -> asyncio.Queue:
+    """Register a subscriber; events published from now on land in its queue."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+    _subscribers.add(queue)
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue) -> None:
+    """Stop delivering events to a subscriber."""
+    _subscribers.discard(queue)
+
+
+def publish(event: DependentsChangedEvent) -> None:
+    """Deliver an event to every subscriber without blocking."""
+    for queue in _subscribers:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
@@ -0,0 +1,117 @@
+"""
+Per-family dependency graphs cached in process.
+
+Each family's graph is loaded lazily from the dependencies table and kept
+in memory between requests. Triggers on dependencies and tasks bump a
+per-family version in dependency_graph_versions on every write, so a
+cached graph is reused only while its version matches the database; any
+write from another worker or from outside the services forces a reload.
+"""
+
+from app import database as db
+from app.utils.dependency_graph import DependencyGraph
+
+# Cached graphs by family key (0 holds tasks without a family)
+_graphs: dict[int, DependencyGraph] = {}
+
+# First key of the two-key advisory locks that serialize graph writers
+_LOCK_NAMESPACE = 31_001
+
+
+def family_key(family_id: int | None) -> int:
+    """Key a family's graph is versioned and cached under."""
+    return family_id or 0
+
+
+async def lock_families(family_ids) -> None:
+    """
+    Serialize dependency writes per family until the current transaction ends.
+
+    Takes a transaction-scoped advisory lock on each family key, in key
+    order so writers spanning several families cannot deadlock. Writers
+    in other families never wait on each other. Must be called inside
+    db.transaction().
+    """
+    for key in sorted({family_key(family_id) for family_id in family_ids}):
+        await db.execute("SELECT pg_advisory_xact_lock($1, $2)", _LOCK_NAMESPACE, key)
+
+
+async def get_version(family_id: int | None) -> int:
+    """Current graph version of a family (0 if its graph has never changed)."""
+    version = await db.fetch_val(
+        "SELECT version FROM dependency_graph_versions WHERE family_key = $1",
+        family_key(family_id),
+    )
+    return version or 0
+
+
+async def get_graph(family_id: int | None) -> DependencyGraph:
+    """Get a family's dependency graph, reloading it if the table changed."""
+    graph = _graphs.get(family_key(family_id))
+    if graph is not None and graph.version == await get_version(family_id):
+        return graph
+    return await rebuild(family_id)
+
+
+async def rebuild(family_id: int | None) -> DependencyGraph:
+    """Reload a family's graph from the dependencies table."""
+    # One statement, so the edges and the version come from one snapshot
+    row = await db.fetch_one(
+        """
+        SELECT
+            COALESCE(
+                (SELECT version FROM dependency_graph_versions WHERE family_key = $2),
+                0
+            ) AS version,
+            COALESCE(array_agg(d.depends_on_task_id ORDER BY d.id), '{}') AS prerequisites,
+            COALESCE(array_agg(d.task_id ORDER BY d.id), '{}') AS dependents
+        FROM dependencies d
+        JOIN tasks t ON t.id = d.task_id
+        WHERE t.family_id IS NOT DISTINCT FROM $1
+        """,
+        family_id,
+        family_key(family_id),
+    )
+    graph = DependencyGraph.from_edges(
+        list(zip(row["prerequisites"], row["dependents"])),
+        version=row["version"],
+    )
+    _graphs[family_key(family_id)] = graph
+    return graph
+
+
+async def record_write(family_id: int | None, graph: DependencyGraph) -> None:
+    """
+    Adopt the database version after a write already applied to graph.
+
+    The write's own statement bumped the version; if the version it
+    replaced is the one the graph was loaded at, nobody else changed the
+    family in between and the incrementally updated graph is current.
+    Otherwise the cache is dropped and the next read reloads.
+    """
+    row = await db.fetch_one(
+        """
+        SELECT version, previous_version FROM dependency_graph_versions
+        WHERE family_key = $1
+        """,
+        family_key(family_id),
+    )
+    if row is not None and row["previous_version"] == graph.version:
+        graph.version = row["version"]
+    else:
+        invalidate(family_id)
+
+
+async def edge_removed(family_id: int | None, prerequisite: int, dependent: int) -> None:
+    """Apply a deleted edge to the family's cached graph, if one is loaded."""
+    graph = _graphs.get(family_key(family_id))
+    if graph is None:
+        return
+    graph.remove_edge(prerequisite, dependent)
+    await record_write(family_id, graph)
+
+
+def invalidate(family_id: int | None) -> None:
+    """Drop one family's cached graph so the next read reloads it."""
+    _graphs.pop(family_key(family_id), None)
+
@@ -0,0 +1,143 @@
+"""
+Verified Google identities cached in process.
+
+Every session refresh re-syncs the Google account, and for a returning
+user that sync is a pure read: the user and family it resolves are kept
+in a bounded LRU with a TTL, so auth_service answers from here instead of
+running the sync statement. Sign-in stores the identity it resolved;
+user_service drops it whenever it updates or deletes the user. Other
+workers only learn of such writes when their entry expires, so
+IDENTITY_CACHE_TTL bounds how stale an identity can be.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app import database as db
+from app.config import settings
+from app.models.family import FamilyResponse
+from app.models.user import UserResponse
+
+
+@dataclass(frozen=True)
+class Identity:
+    """Who a verified Google account is in this app."""
+
+    user_id: int
+    family_id: int | None
+    name: str  # Display name, as user_service computes it
+    email: str | None
+    avatar: str | None
+    user: UserResponse
+    family: FamilyResponse | None  # None only for a user without a family
+
+
+# (identity, expiry on the monotonic clock) by google_id, least recently used first
+_identities: OrderedDict[str, tuple[Identity, float]] = OrderedDict()
+
+# google_id of each cached user, for invalidation by user ID
+_google_ids: dict[int, str] = {}
+
+# Bumped by every invalidation; a lookup that overlapped one is not cached
+_generation = 0
+
+
+# A user with its family, in the columns auth_service's sync statement returns
+_IDENTITY_SQL = """
+    SELECT u.id, u.name, u.first_name, u.last_name, u.email, u.avatar, u.google_id,
+           u.family_id, u.version, u.created_at, u.updated_at,
+           f.name AS family_name,
+           f.created_at AS family_created_at,
+           f.updated_at AS family_updated_at
+    FROM users u
+    LEFT JOIN family_accounts f ON f.id = u.family_id
+    WHERE u.google_id = $1
+"""
+
+
+def _record_to_identity(record) -> Identity:
+    """Convert a users row joined with its family (see _IDENTITY_SQL) to an Identity."""
+    # Deferred: user_service imports this module
+    from app.services.user_service import _compute_display_name
+
+    family = None
+    if record["family_name"] is not None:
+        family = FamilyResponse.model_construct(
+            id=record["family_id"],
+            name=record["family_name"],
+            created_at=record["family_created_at"],
+            updated_at=record["family_updated_at"],
+        )
+    return Identity(
+        user_id=record["id"],
+        family_id=record["family_id"],
+        name=_compute_display_name(record),
+        email=record["email"],
+        avatar=record["avatar"],
+        user=UserResponse.model_construct(
+            id=record["id"],
+            name=record["name"],
+            email=record["email"],
+            avatar=record["avatar"],
+            google_id=record["google_id"],
+            family_id=record["family_id"],
+            version=record["version"],
+            created_at=record["created_at"],
+            updated_at=record["updated_at"],
+        ),
+        family=family,
+    )
+
+
+def remember(google_id: str, record) -> Identity:
+    """Cache the identity of a users row joined with its family."""
+    identity = _record_to_identity(record)
+    previous = _identities.pop(google_id, None)
+    if previous is not None and previous[0].user_id != identity.user_id:
+        _google_ids.pop(previous[0].user_id, None)
+
+    _identities[google_id] = (identity, time.monotonic() + settings.IDENTITY_CACHE_TTL)
+    _google_ids[identity.user_id] = google_id
+    while len(_identities) > settings.IDENTITY_CACHE_SIZE:
+        _, (evicted, _) = _identities.popitem(last=False)
+        _google_ids.pop(evicted.user_id, None)
+    return identity
+
+
+def forget_user(user_id: int) -> None:
+    """Drop a user's cached identity after the user changed or was deleted."""
+    global _generation
+    _generation += 1
+    google_id = _google_ids.pop(user_id, None)
+    if google_id is not None:
+        _identities.pop(google_id, None)
+
+
+def clear() -> None:
+    """Drop every cached identity."""
+    global _generation
+    _generation += 1
+    _identities.clear()
+    _google_ids.clear()
+
+
+async def resolve(google_id: str) -> Identity | None:
+    """The identity for a verified google_id, or None if no user has it."""
+    entry = _identities.get(google_id)
+    if entry is not None:
+        identity, expires_at = entry
+        if expires_at > time.monotonic():
+            _identities.move_to_end(google_id)
+            return identity
+        _identities.pop(google_id, None)
+        _google_ids.pop(identity.user_id, None)
+
+    generation = _generation
+    row = await db.fetch_one(_IDENTITY_SQL, google_id)
+    if row is None:
+        return None
+    if generation != _generation:
+        # A user changed while this lookup ran; the row may predate it
+        return _record_to_identity(row)
+    return remember(google_id, row)
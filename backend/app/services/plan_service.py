@@ -0,0 +1,206 @@
+"""
+Critical path and schedule computation over a family's dependency DAG.
+
+Schedules are computed in one pass over the cached graph's topological
+order, so the cost is linear in tasks plus edges. The result is cached per
+family and reused until the graph version or the family's tasks change.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+
+from app import database as db
+from app.models.plan import PlanEntry, TaskPlan
+from app.services import graph_service
+from app.utils.dependency_graph import DependencyGraph
+
+
+@dataclass
+class _Schedule:
+    """Per-family schedule with the longest-chain predecessor of each task."""
+
+    graph_version: int
+    order: list[int]
+    entries: dict[int, PlanEntry]
+    chain_parent: dict[int, int | None] = field(default_factory=dict)
+
+
+# Cached schedules by family key, with the stamp they were computed at
+_schedules: dict[int, tuple[tuple, _Schedule]] = {}
+
+
+def _family_filter(family_id: int | None) -> tuple[str, list]:
+    """WHERE clause (index-friendly for both cases) selecting a family's tasks."""
+    if family_id is None:
+        return "family_id IS NULL", []
+    return "family_id = $1", [family_id]
+
+
+async def _tasks_stamp(family_id: int | None) -> tuple:
+    """Cheap fingerprint that changes whenever a family's tasks change."""
+    where, args = _family_filter(family_id)
+    row = await db.fetch_one(
+        f"SELECT COUNT(*) AS total, MAX(updated_at) AS last_update FROM tasks WHERE {where}",
+        *args,
+    )
+    return row["total"], row["last_update"]
+
+
+def _compute(graph: DependencyGraph, rows) -> _Schedule:
+    """Earliest starts and longest unfinished chains in one topological pass."""
+    tasks = {row["id"]: row for row in rows}
+
+    # Graph order first, then tasks without any dependencies
+    order = [task_id for task_id in graph.topological_order() if task_id in tasks]
+    in_graph = set(order)
+    order += [task_id for task_id in tasks if task_id not in in_graph]
+
+    entries: dict[int, PlanEntry] = {}
+    chain_parent: dict[int, int | None] = {}
+    for task_id in order:
+        row = tasks[task_id]
+        done = row["status"] == "done"
+        earliest_start: date | None = None
+        best_length, best_parent = 0, None
+
+        for prerequisite in graph.prerequisites(task_id):
+            before = entries.get(prerequisite)
+            if before is None or before.status == "done":
+                continue
+            for candidate in (before.due_date, before.earliest_start):
+                if candidate is not None and (earliest_start is None or candidate > earliest_start):
+                    earliest_start = candidate
+            if before.chain_length > best_length:
+                best_length, best_parent = before.chain_length, prerequisite
+
+        due_date = row["due_date"]
+        entries[task_id] = PlanEntry(
+            task_id=task_id,
+            status=row["status"],
+            due_date=due_date,
+            earliest_start=earliest_start,
+            chain_length=best_length + (0 if done else 1),
+            at_risk=(
+                not done
+                and due_date is not None
+                and earliest_start is not None
+                and earliest_start > due_date
+            ),
+        )
+        chain_parent[task_id] = best_parent
+
+    return _Schedule(
+        graph_version=graph.version,
+        order=order,
+        entries=entries,
+        chain_parent=chain_parent,
+    )
+
+
+async def _get_schedule(family_id: int | None) -> tuple[_Schedule, DependencyGraph]:
+    """Family schedule and its graph; recomputed only if either changed."""
+    graph = await graph_service.get_graph(family_id)
+    stamp = (graph.version, *await _tasks_stamp(family_id))
+
+    cached = _schedules.get(graph_service.family_key(family_id))
+    if cached is not None and cached[0] == stamp:
+        return cached[1], graph
+
+    where, args = _family_filter(family_id)
+    rows = await db.fetch_all(
+        f"SELECT id, status, due_date FROM tasks WHERE {where}",
+        *args,
+    )
+    schedule = _compute(graph, rows)
+    _schedules[graph_service.family_key(family_id)] = (stamp, schedule)
+    return schedule, graph
+
+
+def _chain_to(schedule: _Schedule, task_id: int) -> list[int]:
+    """Longest unfinished chain ending at task_id, first step first."""
+    chain = []
+    current: int | None = task_id
+    while current is not None:
+        if schedule.entries[current].status != "done":
+            chain.append(current)
+        current = schedule.chain_parent[current]
+    chain.reverse()
+    return chain
+
+
+async def get_family_plan(family_id: int | None) -> TaskPlan:
+    """Plan every task in a family, with the family-wide critical path."""
+    schedule, _ = await _get_schedule(family_id)
+
+    critical_path: list[int] = []
+    if schedule.entries:
+        end = max(schedule.order, key=lambda task_id: schedule.entries[task_id].chain_length)
+        critical_path = _chain_to(schedule, end)
+    on_path = set(critical_path)
+
+    return TaskPlan(
+        family_id=family_id,
+        graph_version=schedule.graph_version,
+        order=schedule.order,
+        critical_path=critical_path,
+        tasks=[
+            schedule.entries[task_id].model_copy(
+                update={"on_critical_path": task_id in on_path}
+            )
+            for task_id in schedule.order
+        ],
+    )
+
+
+async def get_task_plan(task_id: int) -> TaskPlan | None:
+    """
+    Plan a single task: its transitive prerequisites in order, the longest
+    chain that must finish first, and which prerequisites are scheduled
+    after its due date.
+    """
+    row = await db.fetch_one("SELECT family_id FROM tasks WHERE id = $1", task_id)
+    if row is None:
+        return None
+    family_id = row["family_id"]
+
+    schedule, graph = await _get_schedule(family_id)
+
+    # Transitive prerequisites of the task, plus the task itself
+    included = {task_id}
+    stack = [task_id]
+    while stack:
+        for prerequisite in graph.prerequisites(stack.pop()):
+            if prerequisite not in included:
+                included.add(prerequisite)
+                stack.append(prerequisite)
+
+    critical_path = _chain_to(schedule, task_id)
+    on_path = set(critical_path)
+
+    due_date = schedule.entries[task_id].due_date
+    blockers = []
+    if due_date is not None:
+        blockers = [
+            other
+            for other in schedule.order
+            if other != task_id
+            and other in included
+            and schedule.entries[other].status != "done"
+            and any(
+                day is not None and day > due_date
+                for day in (schedule.entries[other].due_date, schedule.entries[other].earliest_start)
+            )
+        ]
+
+    order = [other for other in schedule.order if other in included]
+    return TaskPlan(
+        family_id=family_id,
+        graph_version=schedule.graph_version,
+        order=order,
+        critical_path=critical_path,
+        tasks=[
+            schedule.entries[other].model_copy(update={"on_critical_path": other in on_path})
+            for other in order
+        ],
+        blockers=blockers,
+    )
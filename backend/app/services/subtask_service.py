@@ -2,15 +2,17 @@ from datetime import datetime, timezone
 
 from app import database as db
 from app.models.subtask import SubtaskCreate, SubtaskResponse, SubtaskUpdate
+from app.utils.concurrency import VersionConflictError, raise_if_version_conflict
 
 
 def _record_to_subtask(record) -> SubtaskResponse:
     """Convert a database record to a SubtaskResponse."""
-    return SubtaskResponse(
+    return SubtaskResponse.model_construct(
         id=record["id"],
         task_id=record["task_id"],
         title=record["title"],
         completed=record["completed"],
+        version=record["version"],
         created_at=record["created_at"],
         updated_at=record["updated_at"],
     )
@@ -26,30 +28,41 @@ async def get_subtasks_for_task(task_id: int) -> list[SubtaskResponse]:
 
 
 async def create_subtask(task_id: int, subtask: SubtaskCreate) -> SubtaskResponse:
-    """Create a new subtask for a task."""
-    # Verify task exists
-    task = await db.fetch_one("SELECT id FROM tasks WHERE id = $1", task_id)
-    if task is None:
-        raise ValueError(f"Task {task_id} not found")
-
+    """Create a new subtask for a task and bump its progress counters."""
+    # Inserting from the tasks row doubles as the existence check
     row = await db.fetch_one(
         """
-        INSERT INTO subtasks (task_id, title, completed)
-        VALUES ($1, $2, FALSE)
-        RETURNING *
+        WITH inserted AS (
+            INSERT INTO subtasks (task_id, title, completed)
+            SELECT id, $2, FALSE FROM tasks WHERE id = $1
+            RETURNING *
+        ), counted AS (
+            UPDATE tasks t
+            SET subtask_total = t.subtask_total + 1
+            FROM inserted i
+            WHERE t.id = i.task_id
+        )
+        SELECT * FROM inserted
         """,
         task_id,
         subtask.title,
     )
+    if row is None:
+        raise ValueError(f"Task {task_id} not found")
     return _record_to_subtask(row)
 
 
-async def update_subtask(subtask_id: int, update: SubtaskUpdate) -> SubtaskResponse | None:
-    """Update a subtask."""
-    existing = await db.fetch_one("SELECT * FROM subtasks WHERE id = $1", subtask_id)
-    if existing is None:
-        return None
+async def update_subtask(
+    subtask_id: int,
+    update: SubtaskUpdate,
+    expected_versions: list[int] | None = None,
+) -> SubtaskResponse | None:
+    """
+    Update a subtask.
 
+    Raises:
+        VersionConflictError: If none of expected_versions is current
+    """
     updates = []
     values = []
     param_idx = 1
@@ -65,26 +78,144 @@ async def update_subtask(subtask_id: int, update: SubtaskUpdate) -> SubtaskRespo
         param_idx += 1
 
     if not updates:
-        return _record_to_subtask(existing)
+        row = await db.fetch_one("SELECT * FROM subtasks WHERE id = $1", subtask_id)
+        if row is None:
+            return None
+        if expected_versions is not None and row["version"] not in expected_versions:
+            raise VersionConflictError("Subtask", subtask_id, expected_versions)
+        return _record_to_subtask(row)
 
     updates.append(f"updated_at = ${param_idx}")
     values.append(datetime.now(timezone.utc))
     param_idx += 1
+    updates.append("version = s.version + 1")
 
+    id_param = f"${param_idx}"
     values.append(subtask_id)
+    param_idx += 1
 
+    where = "s.id = old.id"
+    if expected_versions is not None:
+        where += f" AND s.version = ANY(${param_idx}::int[])"
+        values.append(expected_versions)
+        param_idx += 1
+
+    # Join the pre-update row so the task's completed counter moves by the
+    # actual change, in the same statement as the write.
     query = f"""
-        UPDATE subtasks
-        SET {', '.join(updates)}
-        WHERE id = ${param_idx}
-        RETURNING *
+        WITH updated AS (
+            UPDATE subtasks s
+            SET {', '.join(updates)}
+            FROM (
+                SELECT id, COALESCE(completed, FALSE) AS completed
+                FROM subtasks
+                WHERE id = {id_param}
+                FOR UPDATE
+            ) old
+            WHERE {where}
+            RETURNING s.*, old.completed AS was_completed
+        ), counted AS (
+            UPDATE tasks t
+            SET subtask_completed = t.subtask_completed
+                + CASE WHEN u.completed THEN 1 ELSE -1 END
+            FROM updated u
+            WHERE t.id = u.task_id AND u.completed <> u.was_completed
+        )
+        SELECT * FROM updated
     """
 
     row = await db.fetch_one(query, *values)
+    if row is None:
+        await raise_if_version_conflict("subtasks", "Subtask", subtask_id, expected_versions)
+        return None
     return _record_to_subtask(row)
 
 
+async def toggle_subtasks(subtask_ids: list[int], completed: bool) -> list[SubtaskResponse]:
+    """
+    Set completion on many subtasks at once.
+
+    One statement updates the subtasks that actually change and moves each
+    parent task's completed counter by the net difference. Returns every
+    requested subtask that exists, in creation order.
+    """
+    rows = await db.fetch_all(
+        """
+        WITH targets AS (
+            SELECT id, COALESCE(completed, FALSE) AS was_completed
+            FROM subtasks
+            WHERE id = ANY($1::int[])
+            FOR UPDATE
+        ), updated AS (
+            UPDATE subtasks s
+            SET completed = $2, updated_at = $3, version = s.version + 1
+            FROM targets t
+            WHERE s.id = t.id AND t.was_completed <> $2
+            RETURNING s.*
+        ), counted AS (
+            UPDATE tasks t
+            SET subtask_completed = t.subtask_completed + c.delta
+            FROM (
+                SELECT task_id,
+                       COUNT(*) * (CASE WHEN $2 THEN 1 ELSE -1 END) AS delta
+                FROM updated
+                GROUP BY task_id
+            ) c
+            WHERE t.id = c.task_id
+        )
+        SELECT * FROM updated
+        UNION ALL
+        SELECT s.* FROM subtasks s
+        JOIN targets t ON t.id = s.id
+        WHERE t.was_completed = $2
+        ORDER BY created_at ASC, id ASC
+        """,
+        subtask_ids,
+        completed,
+        datetime.now(timezone.utc),
+    )
+    return [_record_to_subtask(row) for row in rows]
+
+
 async def delete_subtask(subtask_id: int) -> bool:
-    """Delete a subtask. Returns True if subtask was deleted."""
-    result = await db.execute("DELETE FROM subtasks WHERE id = $1", subtask_id)
-    return result == "DELETE 1"
+    """Delete a subtask and decrement its task's counters. Returns True if deleted."""
+    deleted = await db.fetch_val(
+        """
+        WITH deleted AS (
+            DELETE FROM subtasks WHERE id = $1
+            RETURNING task_id, COALESCE(completed, FALSE) AS completed
+        ), counted AS (
+            UPDATE tasks t
+            SET subtask_total = t.subtask_total - 1,
+                subtask_completed = t.subtask_completed
+                    - CASE WHEN d.completed THEN 1 ELSE 0 END
+            FROM deleted d
+            WHERE t.id = d.task_id
+        )
+        SELECT COUNT(*) FROM deleted
+        """,
+        subtask_id,
+    )
+    return deleted == 1
+
+
+async def recount_progress() -> None:
+    """Recompute every task's subtask counters from the subtasks table."""
+    await db.execute(
+        """
+        UPDATE tasks t
+        SET subtask_total = COALESCE(c.total, 0),
+            subtask_completed = COALESCE(c.completed, 0)
+        FROM tasks base
+        LEFT JOIN (
+            SELECT task_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE completed) AS completed
+            FROM subtasks
+            GROUP BY task_id
+        ) c ON c.task_id = base.id
+        WHERE t.id = base.id
+          AND (t.subtask_total, t.subtask_completed)
+              IS DISTINCT FROM (COALESCE(c.total, 0), COALESCE(c.completed, 0))
+        """
+    )
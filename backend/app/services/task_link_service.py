@@ -4,7 +4,7 @@ from app.models.task_link import TaskLinkCreate, TaskLinkResponse
 
 def _record_to_link(record) -> TaskLinkResponse:
     """Convert a database record to a TaskLinkResponse."""
-    return TaskLinkResponse(
+    return TaskLinkResponse.model_construct(
         id=record["id"],
         task_id=record["task_id"],
         url=record["url"],
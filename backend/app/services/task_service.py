@@ -1,15 +1,21 @@
 from datetime import datetime, timezone
 
 from app import database as db
+from app.models.event import DependentsChangedEvent
 from app.models.task import (
     LinkInTask,
     SubtaskInTask,
     TaskCreate,
     TaskFilterParams,
+    TaskMove,
     TaskResponse,
     TaskUpdate,
+    TaskUpdateResponse,
 )
 from app.models.user import UserResponse
+from app.services import event_service, user_dimension_service
+from app.utils.concurrency import VersionConflictError, raise_if_version_conflict
+from app.utils.ranking import evenly_spaced_keys, key_after, key_between
 
 
 def _record_to_task(
@@ -19,8 +25,13 @@ def _record_to_task(
     subtasks: list[SubtaskInTask] | None = None,
     links: list[LinkInTask] | None = None,
 ) -> TaskResponse:
-    """Convert a database record to a TaskResponse."""
-    return TaskResponse(
+    """
+    Convert a database record to a TaskResponse.
+
+    Rows are typed by Postgres, so the model is constructed without
+    validation; see app.utils.responses for the matching response path.
+    """
+    return TaskResponse.model_construct(
         id=record["id"],
         title=record["title"],
         description=record["description"],
@@ -30,23 +41,60 @@ def _record_to_task(
         priority=record["priority"],
         task_type=record["task_type"],
         tags=record["tags"] or [],
+        family_id=record["family_id"],
+        version=record["version"],
+        blocked=record["blocked"],
+        rank=record["rank"],
         created_at=record["created_at"],
         updated_at=record["updated_at"],
         assignee=assignee,
         assignees=assignees or [],
         blocking=[],
+        subtask_total=record["subtask_total"],
+        subtask_completed=record["subtask_completed"],
         subtasks=subtasks or [],
         links=links or [],
     )
 
 
-async def _get_task_dependencies(task_id: int) -> list[int]:
-    """Get IDs of tasks that this task blocks."""
-    blocking_rows = await db.fetch_all(
-        "SELECT task_id FROM dependencies WHERE depends_on_task_id = $1",
+def _record_to_assignee(record) -> UserResponse:
+    """Convert a users row to the UserResponse embedded in a task."""
+    return UserResponse.model_construct(
+        id=record["id"],
+        name=record["name"],
+        email=record["email"],
+        avatar=record["avatar"],
+        version=record["version"],
+        created_at=record["created_at"],
+        updated_at=record["updated_at"],
+    )
+
+
+# Task row columns plus its assignees' IDs in assignment order, so
+# hydration needs no per-task assignee query
+_TASK_COLUMNS = """
+    t.*,
+    ARRAY(
+        SELECT ta.user_id FROM task_assignees ta
+        WHERE ta.task_id = t.id
+        ORDER BY ta.created_at ASC
+    ) AS assignee_ids
+"""
+
+
+async def _get_task_dependencies(task_id: int) -> tuple[list[int], list[int]]:
+    """Get IDs of tasks this task blocks and of tasks it is blocked by."""
+    rows = await db.fetch_all(
+        """
+        SELECT task_id, depends_on_task_id FROM dependencies
+        WHERE depends_on_task_id = $1 OR task_id = $1
+        ORDER BY created_at ASC
+        """,
         task_id,
     )
-    return [row["task_id"] for row in blocking_rows]
+    blocking = [row["task_id"] for row in rows if row["depends_on_task_id"] == task_id]
+    blocked_by = [row["depends_on_task_id"] for row in rows if row["task_id"] == task_id]
+    return blocking, blocked_by
 
 
 async def _get_task_subtasks(task_id: int) -> list[SubtaskInTask]:
@@ -55,7 +103,10 @@ async def _get_task_subtasks(task_id: int) -> list[SubtaskInTask]:
         "SELECT id, title, completed FROM subtasks WHERE task_id = $1 ORDER BY created_at ASC",
         task_id,
     )
-    return [SubtaskInTask(id=row["id"], title=row["title"], completed=row["completed"]) for row in rows]
+    return [
+        SubtaskInTask.model_construct(id=row["id"], title=row["title"], completed=row["completed"])
+        for row in rows
+    ]
 
 
 async def _get_task_links(task_id: int) -> list[LinkInTask]:
@@ -64,50 +115,32 @@ async def _get_task_links(task_id: int) -> list[LinkInTask]:
         "SELECT id, url, title FROM task_links WHERE task_id = $1 ORDER BY created_at ASC",
         task_id,
     )
-    return [LinkInTask(id=row["id"], url=row["url"], title=row["title"]) for row in rows]
+    return [LinkInTask.model_construct(id=row["id"], url=row["url"], title=row["title"]) for row in rows]
 
 
-async def _get_assignee(user_id: int | None) -> UserResponse | None:
-    """Get assignee user if assigned."""
-    if user_id is None:
-        return None
-
-    row = await db.fetch_one("SELECT * FROM users WHERE id = $1", user_id)
-    if row is None:
-        return None
-
-    return UserResponse(
-        id=row["id"],
-        name=row["name"],
-        email=row["email"],
-        avatar=row["avatar"],
-        created_at=row["created_at"],
-        updated_at=row["updated_at"],
-    )
-
+async def _get_assignees(row) -> tuple[UserResponse | None, list[UserResponse]]:
+    """
+    The assignee and assignees of a task row selected with _TASK_COLUMNS.
 
-async def _get_task_assignees(task_id: int) -> list[UserResponse]:
-    """Get all assignees for a task from the join table."""
-    rows = await db.fetch_all(
-        """
-        SELECT u.* FROM users u
-        JOIN task_assignees ta ON u.id = ta.user_id
-        WHERE ta.task_id = $1
-        ORDER BY ta.created_at ASC
-        """,
-        task_id,
+    Users are looked up among the task family's cached users; only users
+    outside it (or added since it was cached) cost a query.
+    """
+    users = await user_dimension_service.get_family_users(row["family_id"])
+    user_ids = list(row["assignee_ids"])
+    if row["assigned_user_id"] is not None:
+        user_ids.append(row["assigned_user_id"])
+
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    if missing:
+        rows = await db.fetch_all("SELECT * FROM users WHERE id = ANY($1::int[])", missing)
+        users = {**users, **{user["id"]: user for user in rows}}
+
+    assignee = users.get(row["assigned_user_id"])
+    assignees = [users[user_id] for user_id in row["assignee_ids"] if user_id in users]
+    return (
+        _record_to_assignee(assignee) if assignee is not None else None,
+        [_record_to_assignee(user) for user in assignees],
     )
-    return [
-        UserResponse(
-            id=row["id"],
-            name=row["name"],
-            email=row["email"],
-            avatar=row["avatar"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-        )
-        for row in rows
-    ]
 
 
 async def _sync_task_assignees(task_id: int, user_ids: list[int]) -> None:
@@ -123,34 +156,55 @@ async def _sync_task_assignees(task_id: int, user_ids: list[int]) -> None:
         )
 
 
-async def get_tasks(filters: TaskFilterParams) -> list[TaskResponse]:
-    """Get all tasks with optional filtering and sorting."""
-    query = "SELECT * FROM tasks WHERE 1=1"
+def _column_clause(status: str, family_id: int | None) -> tuple[str, list]:
+    """
+    WHERE condition (placeholders $1, $2) selecting one family's status
+    column. Each family's board is ranked on its own.
+    """
+    if family_id is None:
+        return "status = $1 AND family_id IS NULL", [status]
+    return "status = $1 AND family_id = $2", [status, family_id]
+
+
+async def _bottom_rank(status: str, family_id: int | None) -> str:
+    """Rank key that places a task at the bottom of a family's status column."""
+    column, params = _column_clause(status, family_id)
+    last = await db.fetch_val(f"SELECT MAX(rank) FROM tasks WHERE {column}", *params)
+    return key_after(last)
+
+
+def _task_list_clauses(
+    filters: TaskFilterParams, param_idx: int = 1
+) -> tuple[str, str, list]:
+    """
+    WHERE conditions, ORDER BY expression and parameters for a task list,
+    numbering placeholders from param_idx.
+    """
+    conditions = "1=1"
     params: list = []
-    param_idx = 1
 
     if filters.status is not None:
-        query += f" AND status = ${param_idx}"
+        conditions += f" AND status = ${param_idx}"
         params.append(filters.status)
         param_idx += 1
 
     if filters.assigned_user_id is not None:
-        query += f" AND assigned_user_id = ${param_idx}"
+        conditions += f" AND assigned_user_id = ${param_idx}"
         params.append(filters.assigned_user_id)
         param_idx += 1
 
     if filters.due_date_from is not None:
-        query += f" AND due_date >= ${param_idx}"
+        conditions += f" AND due_date >= ${param_idx}"
         params.append(filters.due_date_from)
         param_idx += 1
 
     if filters.due_date_to is not None:
-        query += f" AND due_date <= ${param_idx}"
+        conditions += f" AND due_date <= ${param_idx}"
         params.append(filters.due_date_to)
         param_idx += 1
 
     if filters.priority is not None:
-        query += f" AND priority = ${param_idx}"
+        conditions += f" AND priority = ${param_idx}"
         params.append(filters.priority)
         param_idx += 1
 
@@ -166,41 +220,197 @@ async def get_tasks(filters: TaskFilterParams) -> list[TaskResponse]:
                 WHEN 'none' THEN 5
             END
         """
-        query += f" ORDER BY {priority_order} {filters.sort_order.upper()}"
+        order_by = f"{priority_order} {filters.sort_order.upper()}"
+    elif filters.sort_by == "rank":
+        # Manual board order; unranked tasks fall to the bottom
+        order_by = f"rank {filters.sort_order.upper()} NULLS LAST, created_at ASC"
     elif filters.sort_by == "due_date":
         # NULL dates at the end
         null_order = "NULLS LAST" if filters.sort_order == "asc" else "NULLS FIRST"
-        query += f" ORDER BY due_date {filters.sort_order.upper()} {null_order}"
+        order_by = f"due_date {filters.sort_order.upper()} {null_order}"
     else:
-        query += f" ORDER BY created_at {filters.sort_order.upper()}"
+        order_by = f"created_at {filters.sort_order.upper()}"
+    # Unique tiebreaker so tied rows come back in the same order every time
+    order_by += ", id ASC"
+
+    return conditions, order_by, params
+
+
+async def get_tasks(filters: TaskFilterParams) -> list[TaskResponse]:
+    """Get all tasks with optional filtering and sorting."""
+    conditions, order_by, params = _task_list_clauses(filters)
+    rows = await db.fetch_all(
+        f"SELECT {_TASK_COLUMNS} FROM tasks t WHERE {conditions} ORDER BY {order_by}", *params
+    )
+    return await _hydrate_tasks(rows, include_subtasks=filters.include_subtasks)
+
+
+# A users row (alias u) as the UserResponse embedded in tasks; mirrors
+# _record_to_assignee, which leaves the profile fields unset.
+_ASSIGNEE_JSON = """
+    json_build_object(
+        'name', u.name,
+        'email', u.email,
+        'avatar', u.avatar,
+        'first_name', NULL,
+        'middle_name', NULL,
+        'last_name', NULL,
+        'birthday', NULL,
+        'google_id', NULL,
+        'family_id', NULL,
+        'id', u.id,
+        'version', u.version,
+        'created_at', json_timestamp(u.created_at),
+        'updated_at', json_timestamp(u.updated_at)
+    )
+"""
+
+# A tasks row (alias t) as a TaskResponse document, children included, in
+# the field order of the model; $1 says whether to embed subtask rows.
+_TASK_JSON = f"""
+    json_build_object(
+        'title', t.title,
+        'description', t.description,
+        'assigned_user_id', t.assigned_user_id,
+        'due_date', t.due_date,
+        'status', t.status,
+        'priority', t.priority,
+        'task_type', t.task_type,
+        'tags', COALESCE(t.tags, '{{}}'),
+        'family_id', t.family_id,
+        'id', t.id,
+        'version', t.version,
+        'rank', t.rank,
+        'created_at', json_timestamp(t.created_at),
+        'updated_at', json_timestamp(t.updated_at),
+        'assignee', (SELECT {_ASSIGNEE_JSON} FROM users u WHERE u.id = t.assigned_user_id),
+        'assignees', COALESCE((
+            SELECT json_agg({_ASSIGNEE_JSON} ORDER BY ta.created_at)
+            FROM task_assignees ta JOIN users u ON u.id = ta.user_id
+            WHERE ta.task_id = t.id
+        ), '[]'),
+        'blocking', COALESCE((
+            SELECT json_agg(d.task_id ORDER BY d.created_at)
+            FROM dependencies d WHERE d.depends_on_task_id = t.id
+        ), '[]'),
+        'blocked_by', COALESCE((
+            SELECT json_agg(d.depends_on_task_id ORDER BY d.created_at)
+            FROM dependencies d WHERE d.task_id = t.id
+        ), '[]'),
+        'blocked', t.blocked,
+        'subtask_total', t.subtask_total,
+        'subtask_completed', t.subtask_completed,
+        'subtasks', CASE WHEN $1::boolean THEN COALESCE((
+            SELECT json_agg(
+                json_build_object('id', s.id, 'title', s.title, 'completed', s.completed)
+                ORDER BY s.created_at
+            )
+            FROM subtasks s WHERE s.task_id = t.id
+        ), '[]') ELSE '[]' END,
+        'links', COALESCE((
+            SELECT json_agg(
+                json_build_object('id', l.id, 'url', l.url, 'title', l.title)
+                ORDER BY l.created_at
+            )
+            FROM task_links l WHERE l.task_id = t.id
+        ), '[]')
+    )
+"""
+
+
+async def get_tasks_json(filters: TaskFilterParams) -> bytes:
+    """
+    The get_tasks result as a JSON document rendered by Postgres.
+
+    One statement aggregates every task with its children; the text goes
+    to the client as-is, without building records or models. The document
+    matches what get_tasks serializes to.
+    """
+    conditions, order_by, params = _task_list_clauses(filters, param_idx=2)
+    document = await db.fetch_val(
+        f"""
+        SELECT COALESCE(json_agg({_TASK_JSON} ORDER BY {order_by}), '[]')
+        FROM tasks t
+        WHERE {conditions}
+        """,
+        filters.include_subtasks,
+        *params,
+    )
+    return document.encode()
 
-    rows = await db.fetch_all(query, *params)
 
+async def _hydrate_tasks(rows, include_subtasks: bool = True) -> list[TaskResponse]:
+    """Attach assignees, subtasks, links and dependencies to task rows."""
     tasks = []
     for row in rows:
-        assignee = await _get_assignee(row["assigned_user_id"])
-        assignees = await _get_task_assignees(row["id"])
-        subtasks = await _get_task_subtasks(row["id"])
+        assignee, assignees = await _get_assignees(row)
+        # Board cards only need the counters on the task row
+        subtasks = await _get_task_subtasks(row["id"]) if include_subtasks else []
         links = await _get_task_links(row["id"])
         task = _record_to_task(row, assignee, assignees, subtasks, links)
-        task.blocking = await _get_task_dependencies(row["id"])
+        task.blocking, task.blocked_by = await _get_task_dependencies(row["id"])
         tasks.append(task)
 
     return tasks
 
 
+async def get_ready_tasks(assignee_id: int | None = None, limit: int = 50) -> list[TaskResponse]:
+    """
+    Get unfinished tasks whose prerequisites are all done.
+
+    Reads the trigger-maintained blocked flag through the partial index on
+    ready tasks, so no dependency traversal happens per request. Most
+    urgent first, then earliest due date.
+    """
+    query = f"SELECT {_TASK_COLUMNS} FROM tasks t WHERE NOT t.blocked AND t.status <> 'done'"
+    params: list = []
+
+    if assignee_id is not None:
+        query += """
+            AND (
+                t.assigned_user_id = $1
+                OR EXISTS (
+                    SELECT 1 FROM task_assignees ta
+                    WHERE ta.task_id = t.id AND ta.user_id = $1
+                )
+            )
+        """
+        params.append(assignee_id)
+
+    query += f"""
+        ORDER BY
+            CASE t.priority
+                WHEN 'urgent' THEN 1
+                WHEN 'high' THEN 2
+                WHEN 'med' THEN 3
+                WHEN 'low' THEN 4
+                WHEN 'none' THEN 5
+            END,
+            t.due_date ASC NULLS LAST,
+            t.created_at ASC
+        LIMIT ${len(params) + 1}
+    """
+    params.append(limit)
+
+    rows = await db.fetch_all(query, *params)
+    return await _hydrate_tasks(rows, include_subtasks=False)
+
+
 async def get_task_by_id(task_id: int) -> TaskResponse | None:
     """Get a task by ID with dependencies, subtasks, and links."""
-    row = await db.fetch_one("SELECT * FROM tasks WHERE id = $1", task_id)
+    row = await db.fetch_one(f"SELECT {_TASK_COLUMNS} FROM tasks t WHERE t.id = $1", task_id)
     if row is None:
         return None
 
-    assignee = await _get_assignee(row["assigned_user_id"])
-    assignees = await _get_task_assignees(task_id)
-    subtasks = await _get_task_subtasks(task_id)
-    links = await _get_task_links(task_id)
+    # Independent lookups, run concurrently on separate connections
+    (assignee, assignees), subtasks, links, (blocking, blocked_by) = await db.gather(
+        _get_assignees(row),
+        _get_task_subtasks(task_id),
+        _get_task_links(task_id),
+        _get_task_dependencies(task_id),
+    )
     task = _record_to_task(row, assignee, assignees, subtasks, links)
-    task.blocking = await _get_task_dependencies(task_id)
+    task.blocking, task.blocked_by = blocking, blocked_by
 
     return task
 
@@ -216,41 +426,111 @@ async def create_task(task: TaskCreate) -> TaskResponse:
         if user is None:
             raise ValueError(f"User {task.assigned_user_id} not found")
 
-    row = await db.fetch_one(
-        """
-        INSERT INTO tasks (title, description, assigned_user_id, due_date,
-                          status, priority, task_type, tags)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-        RETURNING *
-        """,
-        task.title,
-        task.description,
-        task.assigned_user_id,
-        task.due_date,
-        task.status,
-        task.priority,
-        task.task_type,
-        task.tags,
-    )
+    if task.family_id is not None:
+        family = await db.fetch_one(
+            "SELECT id FROM family_accounts WHERE id = $1",
+            task.family_id,
+        )
+        if family is None:
+            raise ValueError(f"Family {task.family_id} not found")
+
+    async with db.transaction():
+        row = await db.fetch_one(
+            """
+            INSERT INTO tasks (title, description, assigned_user_id, due_date,
+                              status, priority, task_type, tags, rank, family_id)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+            RETURNING *
+            """,
+            task.title,
+            task.description,
+            task.assigned_user_id,
+            task.due_date,
+            task.status,
+            task.priority,
+            task.task_type,
+            task.tags,
+            await _bottom_rank(task.status, task.family_id),
+            task.family_id,
+        )
 
-    task_id = row["id"]
+        task_id = row["id"]
 
-    # Sync assignees to join table
-    user_ids = list(task.assigned_user_ids)
-    if task.assigned_user_id and task.assigned_user_id not in user_ids:
-        user_ids.append(task.assigned_user_id)
-    if user_ids:
-        await _sync_task_assignees(task_id, user_ids)
+        # Sync assignees to join table
+        user_ids = list(task.assigned_user_ids)
+        if task.assigned_user_id and task.assigned_user_id not in user_ids:
+            user_ids.append(task.assigned_user_id)
+        if user_ids:
+            await _sync_task_assignees(task_id, user_ids)
 
     return await get_task_by_id(task_id)
 
 
-async def update_task(task_id: int, task: TaskUpdate) -> TaskResponse | None:
-    """Update an existing task."""
-    existing = await get_task_by_id(task_id)
-    if existing is None:
-        return None
+async def _flipped_dependents(task_id: int, previous_status: str, status: str) -> list[int]:
+    """
+    Dependents whose blocked state flips because task_id entered or left done.
+
+    Those are exactly the direct dependents with no other unfinished
+    prerequisite, found in one query. Any other status change flips none.
+    """
+    if (previous_status == "done") == (status == "done"):
+        return []
+
+    rows = await db.fetch_all(
+        """
+        SELECT d.task_id FROM dependencies d
+        WHERE d.depends_on_task_id = $1
+          AND NOT EXISTS (
+              SELECT 1 FROM dependencies other
+              JOIN tasks p ON p.id = other.depends_on_task_id
+              WHERE other.task_id = d.task_id
+                AND other.depends_on_task_id <> $1
+                AND p.status <> 'done'
+          )
+        ORDER BY d.task_id
+        """,
+        task_id,
+    )
+    return [row["task_id"] for row in rows]
+
+
+def _announce_dependents(task: TaskResponse, dependent_ids: list[int]) -> TaskUpdateResponse:
+    """Attach flipped dependents to a written task and publish them."""
+    done = task.status == "done"
+    if dependent_ids:
+        event_service.publish(
+            DependentsChangedEvent(
+                type="dependents_unblocked" if done else "dependents_blocked",
+                task_id=task.id,
+                family_id=task.family_id,
+                status=task.status,
+                dependent_ids=dependent_ids,
+            )
+        )
+    return TaskUpdateResponse.model_construct(
+        **dict(task),
+        unblocked_task_ids=dependent_ids if done else [],
+        reblocked_task_ids=[] if done else dependent_ids,
+    )
 
+
+async def update_task(
+    task_id: int,
+    task: TaskUpdate,
+    expected_versions: list[int] | None = None,
+) -> TaskUpdateResponse | None:
+    """
+    Update an existing task.
+
+    When expected_versions is given the write is a single conditional
+    UPDATE on (id, version); no pre-read is done. Every write bumps the
+    row version. A status change into or out of done reports (and
+    publishes) the dependents it unblocked or blocked again.
+
+    Raises:
+        ValueError: If the assigned user does not exist
+        VersionConflictError: If none of expected_versions is current
+    """
     # Validate assigned_user_id if provided
     if task.assigned_user_id is not None:
         user = await db.fetch_one(
@@ -282,30 +562,253 @@ async def update_task(task_id: int, task: TaskUpdate) -> TaskResponse | None:
             values.append(value)
             param_idx += 1
 
-    if not updates:
-        return existing
+    # A task moved to another column lands at the bottom of its family's
+    # column, keyed in SQL (rank_after mirrors key_after) so the UPDATE needs
+    # no pre-read. The CASE sees the pre-update row, so same-column updates
+    # keep their position.
+    if task.status is not None:
+        updates.append(
+            f"""rank = CASE WHEN status = ${param_idx} THEN rank ELSE rank_after(
+                CASE WHEN tasks.family_id IS NULL
+                THEN (
+                    SELECT MAX(c.rank) FROM tasks c
+                    WHERE c.status = ${param_idx} AND c.family_id IS NULL
+                )
+                ELSE (
+                    SELECT MAX(c.rank) FROM tasks c
+                    WHERE c.status = ${param_idx} AND c.family_id = tasks.family_id
+                )
+                END
+            ) END"""
+        )
+        values.append(task.status)
+        param_idx += 1
 
-    # Add updated_at
+    if not updates and task.assigned_user_ids is None:
+        existing = await get_task_by_id(task_id)
+        if existing is None:
+            return None
+        if expected_versions is not None and existing.version not in expected_versions:
+            raise VersionConflictError("Task", task_id, expected_versions)
+        return TaskUpdateResponse.model_construct(**dict(existing))
+
+    # Add updated_at and bump the row version
     updates.append(f"updated_at = ${param_idx}")
     values.append(datetime.now(timezone.utc))
     param_idx += 1
+    updates.append("version = version + 1")
 
+    id_param = f"${param_idx}"
+    where = f"id = {id_param}"
     values.append(task_id)
+    param_idx += 1
 
+    if expected_versions is not None:
+        where += f" AND version = ANY(${param_idx}::int[])"
+        values.append(expected_versions)
+        param_idx += 1
+
+    # Join the pre-update row to learn which status the task left
     query = f"""
         UPDATE tasks
         SET {', '.join(updates)}
-        WHERE id = ${param_idx}
-        RETURNING *
+        FROM (
+            SELECT status AS previous_status FROM tasks WHERE id = {id_param} FOR UPDATE
+        ) old
+        WHERE {where}
+        RETURNING id, status, old.previous_status
     """
 
-    await db.fetch_one(query, *values)
+    async with db.transaction():
+        row = await db.fetch_one(query, *values)
+        if row is None:
+            await raise_if_version_conflict("tasks", "Task", task_id, expected_versions)
+            return None
 
-    # Sync assignees if provided
-    if task.assigned_user_ids is not None:
-        await _sync_task_assignees(task_id, task.assigned_user_ids)
+        # Sync assignees if provided
+        if task.assigned_user_ids is not None:
+            await _sync_task_assignees(task_id, task.assigned_user_ids)
 
-    return await get_task_by_id(task_id)
+        flipped = await _flipped_dependents(task_id, row["previous_status"], row["status"])
+
+    updated = await get_task_by_id(task_id)
+    if updated is None:
+        return None
+    return _announce_dependents(updated, flipped)
+
+
+async def _neighbour_ranks(
+    task_id: int, status: str, family_id: int | None, move: TaskMove
+) -> tuple[str | None, str | None] | None:
+    """
+    Resolve the rank keys a moved task must land between, locking the
+    neighbouring rows. Runs inside the move's transaction.
+
+    A missing neighbour is looked up as the card adjacent to the given one,
+    so clients may send just one side. Returns None if the column needs a
+    rebalance first (unranked neighbours or tied keys).
+    """
+    neighbour_ids = [i for i in (move.previous_task_id, move.next_task_id) if i is not None]
+    neighbours = {}
+    if neighbour_ids:
+        rows = await db.fetch_all(
+            "SELECT id, status, family_id, rank FROM tasks WHERE id = ANY($1::int[]) FOR UPDATE",
+            neighbour_ids,
+        )
+        neighbours = {row["id"]: row for row in rows}
+        for neighbour_id in neighbour_ids:
+            if neighbour_id == task_id:
+                raise ValueError("A task cannot be placed next to itself")
+            if neighbour_id not in neighbours or neighbours[neighbour_id]["family_id"] != family_id:
+                raise ValueError(f"Task {neighbour_id} not found")
+            if neighbours[neighbour_id]["status"] != status:
+                raise ValueError(f"Task {neighbour_id} is not in the '{status}' column")
+            if neighbours[neighbour_id]["rank"] is None:
+                return None
+
+    before = neighbours[move.previous_task_id]["rank"] if move.previous_task_id else None
+    after = neighbours[move.next_task_id]["rank"] if move.next_task_id else None
+
+    column, params = _column_clause(status, family_id)
+    task_param = f"${len(params) + 1}"
+    rank_param = f"${len(params) + 2}"
+    if before is not None and after is None:
+        after = await db.fetch_val(
+            f"""
+            SELECT rank FROM tasks
+            WHERE {column} AND id <> {task_param} AND rank > {rank_param}
+            ORDER BY rank ASC LIMIT 1
+            FOR UPDATE
+            """,
+            *params,
+            task_id,
+            before,
+        )
+    elif after is not None and before is None:
+        before = await db.fetch_val(
+            f"""
+            SELECT rank FROM tasks
+            WHERE {column} AND id <> {task_param} AND rank < {rank_param}
+            ORDER BY rank DESC LIMIT 1
+            FOR UPDATE
+            """,
+            *params,
+            task_id,
+            after,
+        )
+    elif before is None and after is None:
+        before = await db.fetch_val(
+            f"""
+            SELECT rank FROM tasks
+            WHERE {column} AND id <> {task_param} AND rank IS NOT NULL
+            ORDER BY rank DESC LIMIT 1
+            FOR UPDATE
+            """,
+            *params,
+            task_id,
+        )
+
+    if before is not None and after is not None and before >= after:
+        return None
+    return before, after
+
+
+async def move_task(
+    task_id: int,
+    move: TaskMove,
+    expected_versions: list[int] | None = None,
+) -> TaskUpdateResponse | None:
+    """
+    Move a task to a new position, optionally in another status column.
+
+    The new rank is computed from the neighbours' keys, so the move is a
+    single-row UPDATE no matter how many cards are in the column. The
+    moved task and its neighbours stay locked from reading their keys
+    until the move commits, so a concurrent move cannot hand it stale
+    bounds.
+
+    Raises:
+        ValueError: If a neighbour is missing, in another column, or the
+            neighbours are out of order
+        VersionConflictError: If none of expected_versions is current
+    """
+    async with db.transaction():
+        current = await db.fetch_one(
+            "SELECT status, family_id FROM tasks WHERE id = $1 FOR UPDATE", task_id
+        )
+        if current is None:
+            return None
+        status = move.status or current["status"]
+        family_id = current["family_id"]
+
+        bounds = await _neighbour_ranks(task_id, status, family_id, move)
+        if bounds is None:
+            await rebalance_column(status, family_id)
+            bounds = await _neighbour_ranks(task_id, status, family_id, move)
+        if bounds is None:
+            # Freshly spaced keys are unique, so the neighbours were sent
+            # in the wrong order
+            raise ValueError("The previous task must sort above the next task")
+        before, after = bounds
+        rank = key_after(before) if after is None else key_between(before, after)
+
+        values = [status, rank, datetime.now(timezone.utc), task_id]
+        where = "id = $4"
+        if expected_versions is not None:
+            where += " AND version = ANY($5::int[])"
+            values.append(expected_versions)
+
+        row = await db.fetch_one(
+            f"""
+            UPDATE tasks
+            SET status = $1, rank = $2, updated_at = $3, version = version + 1
+            FROM (SELECT status AS previous_status FROM tasks WHERE id = $4) old
+            WHERE {where}
+            RETURNING id, status, old.previous_status
+            """,
+            *values,
+        )
+        if row is None:
+            await raise_if_version_conflict("tasks", "Task", task_id, expected_versions)
+            return None
+
+        flipped = await _flipped_dependents(task_id, row["previous_status"], row["status"])
+
+    moved = await get_task_by_id(task_id)
+    if moved is None:
+        return None
+    return _announce_dependents(moved, flipped)
+
+
+async def rebalance_column(status: str, family_id: int | None) -> None:
+    """
+    Respace every rank key in one family's status column.
+
+    Runs when keys have grown long from repeated inserts into the same gap.
+    Ranks are not user-visible content, so row versions are left alone.
+    """
+    column, params = _column_clause(status, family_id)
+    async with db.transaction():
+        rows = await db.fetch_all(
+            f"""
+            SELECT id FROM tasks
+            WHERE {column}
+            ORDER BY rank ASC NULLS LAST, created_at ASC, id ASC
+            FOR UPDATE
+            """,
+            *params,
+        )
+        ids = [row["id"] for row in rows]
+        await db.execute(
+            """
+            UPDATE tasks t
+            SET rank = r.rank
+            FROM UNNEST($1::int[], $2::text[]) AS r(id, rank)
+            WHERE t.id = r.id
+            """,
+            ids,
+            evenly_spaced_keys(len(ids)),
+        )
 
 
 async def delete_task(task_id: int) -> bool:
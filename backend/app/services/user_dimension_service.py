@@ -0,0 +1,66 @@
+"""
+Users of each family cached in process, for task hydration.
+
+A board embeds the same few family members in every card, so hydration
+looks assignees up in the family's cached users rows instead of querying
+users per task. A family's rows are loaded with one indexed query and
+kept for USER_DIMENSION_TTL seconds; user_service and auth_service drop
+a family's entry whenever they write one of its users. Writes from other
+workers or outside the services show up once the entry expires.
+"""
+
+import time
+from collections import OrderedDict
+
+import asyncpg
+
+from app import database as db
+from app.config import settings
+
+# (users by id, expiry on the monotonic clock) by family key, least recently used first
+_families: OrderedDict[int, tuple[dict[int, asyncpg.Record], float]] = OrderedDict()
+
+# Bumped by every invalidation; a load that overlapped one is not cached
+_generation = 0
+
+
+def _family_key(family_id: int | None) -> int:
+    """Key a family's users are cached under (0 holds users without a family)."""
+    return family_id or 0
+
+
+async def get_family_users(family_id: int | None) -> dict[int, asyncpg.Record]:
+    """A family's users rows by ID, from cache while fresh."""
+    key = _family_key(family_id)
+    entry = _families.get(key)
+    if entry is not None and entry[1] > time.monotonic():
+        _families.move_to_end(key)
+        return entry[0]
+
+    generation = _generation
+    if family_id is None:
+        rows = await db.fetch_all("SELECT * FROM users WHERE family_id IS NULL")
+    else:
+        rows = await db.fetch_all("SELECT * FROM users WHERE family_id = $1", family_id)
+    users = {row["id"]: row for row in rows}
+
+    if generation == _generation:
+        _families[key] = (users, time.monotonic() + settings.USER_DIMENSION_TTL)
+        _families.move_to_end(key)
+        while len(_families) > settings.USER_DIMENSION_MAX_FAMILIES:
+            _families.popitem(last=False)
+    return users
+
+
+def invalidate(family_id: int | None) -> None:
+    """Drop a family's cached users after one of them was written."""
+    global _generation
+    _generation += 1
+    _families.pop(_family_key(family_id), None)
+
+
+def clear() -> None:
+    """Drop every family's cached users."""
+    global _generation
+    _generation += 1
+    _families.clear()
@@ -2,6 +2,8 @@ from datetime import datetime, timezone
 
 from app import database as db
 from app.models.user import UserCreate, UserResponse, UserUpdate
+from app.services import identity_service, user_dimension_service
+from app.utils.concurrency import VersionConflictError, raise_if_version_conflict
 
 
 def _compute_display_name(record) -> str:
@@ -14,7 +16,7 @@ def _compute_display_name(record) -> str:
 
 def _record_to_user(record) -> UserResponse:
     """Convert a database record to a UserResponse."""
-    return UserResponse(
+    return UserResponse.model_construct(
         id=record["id"],
         name=_compute_display_name(record),
         email=record["email"],
@@ -23,19 +25,69 @@ def _record_to_user(record) -> UserResponse:
         middle_name=record.get("middle_name"),
         last_name=record.get("last_name"),
         birthday=record.get("birthday"),
+        version=record["version"],
         created_at=record["created_at"],
         updated_at=record["updated_at"],
     )
 
 
-async def get_users() -> list[UserResponse]:
-    """Get all users."""
-    rows = await db.fetch_all(
-        "SELECT * FROM users ORDER BY created_at DESC"
-    )
+# The users rows matching {where}, as the JSON list get_users would return
+_USERS_JSON_SQL = """
+    SELECT COALESCE(json_agg(json_build_object(
+        'name', COALESCE(
+            NULLIF(btrim(
+                COALESCE(first_name, '') || ' ' || COALESCE(last_name, ''),
+                E' \\t\\n\\r\\f\\x0b'
+            ), ''),
+            NULLIF(name, ''),
+            'Unknown'
+        ),
+        'email', email,
+        'avatar', avatar,
+        'first_name', first_name,
+        'middle_name', middle_name,
+        'last_name', last_name,
+        'birthday', birthday,
+        'google_id', NULL,
+        'family_id', NULL,
+        'id', id,
+        'version', version,
+        'created_at', json_timestamp(created_at),
+        'updated_at', json_timestamp(updated_at)
+    ) ORDER BY created_at DESC), '[]')
+    FROM users
+    WHERE {where}
+"""
+
+
+async def get_users(family_id: int | None = None) -> list[UserResponse]:
+    """Get all users, or only the members of one family."""
+    if family_id is None:
+        rows = await db.fetch_all("SELECT * FROM users ORDER BY created_at DESC")
+    else:
+        rows = await db.fetch_all(
+            "SELECT * FROM users WHERE family_id = $1 ORDER BY created_at DESC",
+            family_id,
+        )
     return [_record_to_user(row) for row in rows]
 
 
+async def get_users_json(family_id: int | None = None) -> bytes:
+    """
+    The get_users result as a JSON document rendered by Postgres.
+
+    Mirrors _record_to_user, display name included, so the text can go
+    to the client as-is.
+    """
+    if family_id is None:
+        document = await db.fetch_val(_USERS_JSON_SQL.format(where="TRUE"))
+    else:
+        document = await db.fetch_val(
+            _USERS_JSON_SQL.format(where="family_id = $1"), family_id
+        )
+    return document.encode()
+
+
 async def get_user_by_id(user_id: int) -> UserResponse | None:
     """Get a user by ID."""
     row = await db.fetch_one("SELECT * FROM users WHERE id = $1", user_id)
@@ -75,15 +127,21 @@ async def create_user(user: UserCreate) -> UserResponse:
         user.last_name,
         user.birthday,
     )
+    user_dimension_service.invalidate(row["family_id"])
     return _record_to_user(row)
 
 
-async def update_user(user_id: int, user: UserUpdate) -> UserResponse | None:
-    """Update an existing user."""
-    existing = await get_user_by_id(user_id)
-    if existing is None:
-        return None
+async def update_user(
+    user_id: int,
+    user: UserUpdate,
+    expected_versions: list[int] | None = None,
+) -> UserResponse | None:
+    """
+    Update an existing user.
 
+    Raises:
+        VersionConflictError: If none of expected_versions is current
+    """
     # Build update query dynamically based on provided fields
     updates = []
     values = []
@@ -105,39 +163,66 @@ async def update_user(user_id: int, user: UserUpdate) -> UserResponse | None:
             values.append(value)
             param_idx += 1
 
-    # Auto-compute display name if first/last changed
-    if user.first_name is not None or user.last_name is not None:
-        first = user.first_name if user.first_name is not None else (existing.first_name or "")
-        last = user.last_name if user.last_name is not None else (existing.last_name or "")
-        computed_name = f"{first} {last}".strip() or "Unknown"
-        if user.name is None:
-            updates.append(f"name = ${param_idx}")
-            values.append(computed_name)
-            param_idx += 1
+    # Auto-compute display name if first/last changed. The right-hand side
+    # sees the pre-update row, so unchanged parts come from the stored values.
+    if user.name is None and (user.first_name is not None or user.last_name is not None):
+        updates.append(
+            f"""name = COALESCE(NULLIF(BTRIM(
+                COALESCE(${param_idx}::text, first_name, '') || ' ' ||
+                COALESCE(${param_idx + 1}::text, last_name, '')
+            ), ''), 'Unknown')"""
+        )
+        values.append(user.first_name)
+        values.append(user.last_name)
+        param_idx += 2
 
     if not updates:
+        existing = await get_user_by_id(user_id)
+        if (
+            existing is not None
+            and expected_versions is not None
+            and existing.version not in expected_versions
+        ):
+            raise VersionConflictError("User", user_id, expected_versions)
         return existing
 
-    # Add updated_at
+    # Add updated_at and bump the row version
     updates.append(f"updated_at = ${param_idx}")
     values.append(datetime.now(timezone.utc))
     param_idx += 1
+    updates.append("version = version + 1")
 
     # Add user_id for WHERE clause
+    where = f"id = ${param_idx}"
     values.append(user_id)
+    param_idx += 1
+
+    if expected_versions is not None:
+        where += f" AND version = ANY(${param_idx}::int[])"
+        values.append(expected_versions)
+        param_idx += 1
 
     query = f"""
         UPDATE users
         SET {', '.join(updates)}
-        WHERE id = ${param_idx}
+        WHERE {where}
         RETURNING *
     """
 
     row = await db.fetch_one(query, *values)
+    if row is None:
+        await raise_if_version_conflict("users", "User", user_id, expected_versions)
+        return None
+    identity_service.forget_user(user_id)
+    user_dimension_service.invalidate(row["family_id"])
     return _record_to_user(row)
 
 
 async def delete_user(user_id: int) -> bool:
     """Delete a user. Returns True if user was deleted."""
-    result = await db.execute("DELETE FROM users WHERE id = $1", user_id)
-    return result == "DELETE 1"
+    row = await db.fetch_one("DELETE FROM users WHERE id = $1 RETURNING family_id", user_id)
+    if row is None:
+        return False
+    identity_service.forget_user(user_id)
+    user_dimension_service.invalidate(row["family_id"])
+    return True
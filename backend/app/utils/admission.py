@@ -0,0 +1,87 @@
+"""
+Per-client admission state: a token bucket for request rate and a cap on
+requests in flight.
+
+Requests are keyed by client address (a household typically shares one),
+so one busy household drains only its own bucket and slots. The
+family_id a request names is not used: it is chosen by the client, so
+keying on it would let anyone drain another family's bucket, or dodge
+their own limit by naming a fresh family each time. Behind a reverse
+proxy, run the server with trusted proxy headers so the address is the
+real client's. State is kept for a bounded number of keys; the least
+recently seen idle ones are dropped first.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+# Most keys tracked at once
+MAX_KEYS = 10_000
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; each request takes one."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token: 0 if one was free, else seconds until the next one."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class Tenant:
+    """Admission state of one client."""
+
+    def __init__(self, rate: float, burst: int, max_in_flight: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0  # Requests holding a slot
+        self.waiting = 0  # Requests queued for a slot
+
+    @property
+    def idle(self) -> bool:
+        return self.in_flight == 0 and self.waiting == 0
+
+
+_tenants: OrderedDict[str, Tenant] = OrderedDict()
+
+
+def tenant_key(scope: dict) -> str:
+    """The client address a request came from."""
+    client = scope.get("client")
+    return f"client:{client[0] if client else 'unknown'}"
+
+
+def get_tenant(key: str, rate: float, burst: int, max_in_flight: int) -> Tenant:
+    """A key's admission state, created on first use."""
+    tenant = _tenants.get(key)
+    if tenant is None:
+        tenant = _tenants[key] = Tenant(rate, burst, max_in_flight)
+        _evict()
+    else:
+        _tenants.move_to_end(key)
+    return tenant
+
+
+def _evict() -> None:
+    for key in list(_tenants):
+        if len(_tenants) <= MAX_KEYS:
+            return
+        if _tenants[key].idle:
+            del _tenants[key]
+
+
+def reset() -> None:
+    """Forget every key's state."""
+    _tenants.clear()
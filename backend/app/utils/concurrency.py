@@ -0,0 +1,94 @@
+from app import database as db
+
+
+class PreconditionFailedError(Exception):
+    """Raised when a conditional request's precondition does not hold."""
+
+
+class VersionConflictError(PreconditionFailedError):
+    """Raised when a conditional update targets a stale row version."""
+
+    def __init__(self, entity: str, entity_id: int, expected_versions: list[int]):
+        self.entity = entity
+        self.entity_id = entity_id
+        self.expected_versions = expected_versions
+        super().__init__(
+            f"{entity} {entity_id} was modified by someone else "
+            f"(expected version {' or '.join(map(str, expected_versions))})"
+        )
+
+
+def parse_if_match(header: str | None) -> list[int] | None:
+    """
+    Parse an If-Match header into the row versions it accepts.
+
+    Accepts the ETags we emit (`"3"`), a comma-separated list of them
+    (`"3", "4"`) and bare integers. `*` and a missing header mean "no
+    precondition".
+
+    If-Match uses strong comparison (RFC 9110 §13.1.1), so a weak
+    validator (`W/"3"`) never matches; a header listing only weak ones
+    cannot succeed.
+
+    Raises:
+        ValueError: If the header is not a version we issued
+        PreconditionFailedError: If the header lists only weak validators
+    """
+    if header is None:
+        return None
+
+    tags = [tag.strip() for tag in header.split(",")]
+    tags = [tag for tag in tags if tag]
+    if not tags or "*" in tags:
+        return None
+
+    versions = []
+    for tag in tags:
+        if tag.startswith("W/"):
+            continue
+        try:
+            versions.append(int(tag.strip('"')))
+        except ValueError:
+            raise ValueError(f"Invalid If-Match header: {header}")
+    if not versions:
+        raise PreconditionFailedError("If-Match needs a strong ETag; weak ones never match")
+    return versions
+
+
+def format_etag(version: int) -> str:
+    """Format a row version as a strong ETag."""
+    return f'"{version}"'
+
+
+def if_none_match_hits(header: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists etag (or is `*`).
+
+    The header is split into its listed tags and compared weakly, as
+    RFC 9110 §13.1.2 requires: `W/"3"` matches `"3"`.
+    """
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+
+async def raise_if_version_conflict(
+    table: str,
+    entity: str,
+    entity_id: int,
+    expected_versions: list[int] | None,
+) -> None:
+    """
+    Explain a conditional UPDATE that matched no rows.
+
+    Only runs on the failure path: if the row exists, the precondition
+    was stale and VersionConflictError is raised; otherwise the caller
+    treats the row as not found.
+    """
+    if expected_versions is None:
+        return
+
+    exists = await db.fetch_val(f"SELECT 1 FROM {table} WHERE id = $1", entity_id)
+    if exists is not None:
+        raise VersionConflictError(entity, entity_id, expected_versions)
@@ -0,0 +1,288 @@
+"""
+In-memory dependency graph with an incrementally maintained topological order.
+
+Edges point from a prerequisite to the task that depends on it, so the
+topological order lists prerequisites first. Inserting an edge uses the
+Pearce–Kelly dynamic topological sort: if the new edge already agrees with
+the current order nothing is searched; otherwise only the nodes whose
+positions lie between the edge's endpoints are visited, which is also
+where a cycle would have to close.
+"""
+
+from array import array
+
+
+class DependencyGraph:
+    """Adjacency stored as per-node integer arrays plus a topological order."""
+
+    def __init__(self, version: int = 0) -> None:
+        self.version = version
+        self._index: dict[int, int] = {}  # task id -> node index
+        self._ids = array("q")  # node index -> task id
+        self._ord = array("q")  # node index -> position in topological order
+        self._succ: list[array] = []  # node index -> dependents
+        self._pred: list[array] = []  # node index -> prerequisites
+        self._edge_count = 0
+
+    @classmethod
+    def from_edges(cls, edges: list[tuple[int, int]], version: int = 0) -> "DependencyGraph":
+        """
+        Build a graph from (prerequisite, dependent) task id pairs.
+
+        The initial order comes from Kahn's algorithm. Edges that would
+        close a cycle (only possible with data written around the service)
+        are skipped rather than breaking the order invariant.
+        """
+        graph = cls(version)
+        for prerequisite, dependent in edges:
+            src = graph._node(prerequisite)
+            dst = graph._node(dependent)
+            graph._succ[src].append(dst)
+            graph._pred[dst].append(src)
+            graph._edge_count += 1
+
+        indegree = array("q", (len(p) for p in graph._pred))
+        ready = [i for i in range(len(indegree)) if indegree[i] == 0]
+        position = 0
+        while ready:
+            node = ready.pop()
+            graph._ord[node] = position
+            position += 1
+            for succ in graph._succ[node]:
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    ready.append(succ)
+
+        if position < len(graph._ids):
+            # Cyclic leftovers: rebuild incrementally so bad edges are dropped
+            clean = cls(version)
+            for prerequisite, dependent in edges:
+                clean.add_edge(prerequisite, dependent)
+            return clean
+
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def _node(self, task_id: int) -> int:
+        """Index for a task, appending it at the end of the order if new."""
+        index = self._index.get(task_id)
+        if index is None:
+            index = len(self._ids)
+            self._index[task_id] = index
+            self._ids.append(task_id)
+            self._ord.append(index)
+            self._succ.append(array("q"))
+            self._pred.append(array("q"))
+        return index
+
+    def has_edge(self, prerequisite: int, dependent: int) -> bool:
+        src = self._index.get(prerequisite)
+        dst = self._index.get(dependent)
+        return src is not None and dst is not None and dst in self._succ[src]
+
+    def add_edge(self, prerequisite: int, dependent: int) -> list[int] | None:
+        """
+        Insert an edge, keeping the topological order valid.
+
+        Returns:
+            None if the edge was added (or already existed). If it would
+            close a cycle the graph is left unchanged and the cycle is
+            returned as task ids starting and ending with `dependent`,
+            where each task depends on the next.
+        """
+        if prerequisite == dependent:
+            return [dependent, dependent]
+
+        src = self._node(prerequisite)
+        dst = self._node(dependent)
+        if dst in self._succ[src]:
+            return None
+
+        lower, upper = self._ord[dst], self._ord[src]
+        if upper > lower:
+            # The edge points backwards in the current order: search the
+            # affected region and move the prerequisite's side in front.
+            forward = self._search_forward(dst, upper, src)
+            if isinstance(forward, list):
+                return [dependent, *reversed(forward)]
+            backward = self._search_backward(src, lower)
+            self._reorder(backward, forward)
+
+        self._succ[src].append(dst)
+        self._pred[dst].append(src)
+        self._edge_count += 1
+        return None
+
+    def add_edges(self, edges: list[tuple[int, int]]) -> dict[tuple[int, int], list[int]]:
+        """
+        Insert many edges with a single acyclicity check over the combined graph.
+
+        One Kahn pass over existing plus new edges both checks for cycles
+        and yields the new order. Only if that pass finds a cycle are the
+        edges inserted one by one, so the ones closing a cycle can be
+        named; earlier edges in the list win.
+
+        Returns:
+            Rejected edges mapped to the cycle each would close (same
+            format as add_edge). Edges already present are ignored.
+        """
+        new_edges = []
+        seen = set()
+        for edge in edges:
+            if edge not in seen and edge[0] != edge[1] and not self.has_edge(*edge):
+                seen.add(edge)
+                new_edges.append(edge)
+        if not new_edges:
+            return {}
+
+        indexed = [(self._node(src), self._node(dst)) for src, dst in new_edges]
+        indegree = array("q", (len(p) for p in self._pred))
+        extra: dict[int, list[int]] = {}
+        for src, dst in indexed:
+            indegree[dst] += 1
+            extra.setdefault(src, []).append(dst)
+
+        # Seed in current order so unaffected nodes keep their relative places
+        ready = sorted(
+            (i for i in range(len(indegree)) if indegree[i] == 0),
+            key=self._ord.__getitem__,
+            reverse=True,
+        )
+        order = []
+        while ready:
+            node = ready.pop()
+            order.append(node)
+            for succ in (*self._succ[node], *extra.get(node, ())):
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    ready.append(succ)
+
+        if len(order) == len(self._ids):
+            for src, dst in indexed:
+                self._succ[src].append(dst)
+                self._pred[dst].append(src)
+            self._edge_count += len(indexed)
+            for position, node in enumerate(order):
+                self._ord[node] = position
+            return {}
+
+        rejected = {}
+        for edge in new_edges:
+            cycle = self.add_edge(*edge)
+            if cycle is not None:
+                rejected[edge] = cycle
+        return rejected
+
+    def remove_edge(self, prerequisite: int, dependent: int) -> bool:
+        """Remove an edge. The current order stays valid, so nothing is reordered."""
+        src = self._index.get(prerequisite)
+        dst = self._index.get(dependent)
+        if src is None or dst is None or dst not in self._succ[src]:
+            return False
+        self._succ[src].remove(dst)
+        self._pred[dst].remove(src)
+        self._edge_count -= 1
+        return True
+
+    def _search_forward(self, start: int, upper: int, target: int) -> set[int] | list[int]:
+        """
+        Collect dependents of start positioned at or before upper.
+
+        Returns the visited set, or the task id path start..target if the
+        target is reachable (i.e. the new edge would close a cycle).
+        """
+        parent = {start: -1}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for succ in self._succ[node]:
+                if succ == target:
+                    path = [self._ids[target]]
+                    while node != -1:
+                        path.append(self._ids[node])
+                        node = parent[node]
+                    path.reverse()
+                    return path
+                if succ not in parent and self._ord[succ] < upper:
+                    parent[succ] = node
+                    stack.append(succ)
+        return set(parent)
+
+    def _search_backward(self, start: int, lower: int) -> set[int]:
+        """Collect prerequisites of start positioned after lower."""
+        visited = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for pred in self._pred[node]:
+                if pred not in visited and self._ord[pred] > lower:
+                    visited.add(pred)
+                    stack.append(pred)
+        return visited
+
+    def _reorder(self, backward: set[int], forward: set[int]) -> None:
+        """Reuse the affected positions: prerequisites first, then dependents."""
+        ord_ = self._ord
+        moved = sorted(backward, key=ord_.__getitem__) + sorted(forward, key=ord_.__getitem__)
+        positions = sorted(ord_[node] for node in moved)
+        for node, position in zip(moved, positions):
+            ord_[node] = position
+
+    def topological_order(self) -> list[int]:
+        """Task ids with every prerequisite before its dependents."""
+        nodes = sorted(range(len(self._ids)), key=self._ord.__getitem__)
+        return [self._ids[node] for node in nodes]
+
+    def prerequisites(self, task_id: int) -> list[int]:
+        """Direct prerequisites of a task."""
+        index = self._index.get(task_id)
+        if index is None:
+            return []
+        return [self._ids[node] for node in self._pred[index]]
+
+    def dependents(self, task_id: int) -> list[int]:
+        """Tasks that directly depend on a task."""
+        index = self._index.get(task_id)
+        if index is None:
+            return []
+        return [self._ids[node] for node in self._succ[index]]
+
+    def edges(self) -> list[tuple[int, int]]:
+        """All (prerequisite, dependent) pairs."""
+        ids = self._ids
+        return [
+            (ids[src], ids[dst])
+            for src in range(len(ids))
+            for dst in self._succ[src]
+        ]
+
+    def to_csr(self) -> tuple[array, array, array]:
+        """
+        Compressed sparse row form of the graph.
+
+        Returns (nodes, offsets, targets): ids of tasks with at least one
+        edge, in topological order; for the node at index i,
+        targets[offsets[i]:offsets[i + 1]] are the indexes (into nodes) of
+        the tasks that depend on it.
+        """
+        order = sorted(
+            (node for node in range(len(self._ids)) if self._succ[node] or self._pred[node]),
+            key=self._ord.__getitem__,
+        )
+        position = array("q", bytes(8 * len(self._ids)))
+        for index, node in enumerate(order):
+            position[node] = index
+
+        nodes = array("q", (self._ids[node] for node in order))
+        offsets = array("q", [0])
+        targets = array("q")
+        for node in order:
+            targets.extend(sorted(position[succ] for succ in self._succ[node]))
+            offsets.append(len(targets))
+        return nodes, offsets, targets
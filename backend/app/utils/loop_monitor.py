@@ -0,0 +1,58 @@
+"""
+Event loop lag monitor.
+
+A heartbeat task asks to wake up every interval and measures how late it
+actually woke up. Lateness means some callback held the loop (a long
+synchronous serialization, a blocking call) and every other request on
+the worker waited that long too. Each measurement goes into the
+event_loop_lag_seconds histogram; stalls above the threshold are logged
+with the routes that were in flight, the usual suspects.
+"""
+
+import asyncio
+import logging
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_task: asyncio.Task | None = None
+
+
+async def _heartbeat(interval: float, threshold: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        metrics.loop_lag.observe((), lag)
+        if lag >= threshold:
+            metrics.loop_stalls.inc()
+            logger.warning(
+                "Event loop blocked for %.0f ms (in flight: %s)",
+                lag * 1000,
+                ", ".join(sorted(metrics.in_flight_routes())) or "none",
+            )
+
+
+def start(interval: float, threshold_ms: float) -> None:
+    """Start the heartbeat on the running loop; a zero threshold disables it."""
+    global _task
+    if threshold_ms <= 0 or _task is not None:
+        return
+    _task = asyncio.get_running_loop().create_task(
+        _heartbeat(interval, threshold_ms / 1000)
+    )
+
+
+async def stop() -> None:
+    """Cancel the heartbeat."""
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -0,0 +1,185 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Only counters and fixed-bucket histograms are needed, so this avoids a
+client library dependency. Observations are plain in-memory updates on
+the event loop thread; nothing is locked or allocated per call beyond
+the first observation of a label set.
+"""
+
+import re
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Seconds; shared by route and query latency histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Longest statement fingerprint kept as a label value
+MAX_FINGERPRINT_LENGTH = 200
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![$\w])\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalize a statement into a label: one line, literals replaced by ?."""
+    normalized = _WHITESPACE.sub(" ", query).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    return normalized[:MAX_FINGERPRINT_LENGTH]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+@dataclass(eq=False)
+class RequestStats:
+    """Per-request bookkeeping shared by the middleware and the query helpers."""
+
+    scope: dict = field(repr=False)
+    queries: int = 0
+
+    @property
+    def route(self) -> str:
+        """Route template once routing has happened (e.g. /api/tasks/{task_id})."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+# Stats of the HTTP request being served, if any
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+# Requests currently being served by this worker
+in_flight: set[RequestStats] = set()
+
+
+def in_flight_routes() -> set[str]:
+    """Route templates of the requests being served right now."""
+    return {request.route for request in in_flight}
+
+
+query_latency = Histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by statement fingerprint and route.",
+    ("statement", "route"),
+)
+slow_queries = Counter(
+    "db_slow_queries_total",
+    "Statements slower than the slow-query threshold.",
+    ("statement", "route"),
+)
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route and status code.",
+    ("method", "route", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "Database statements issued per HTTP request.",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+admission_rejections = Counter(
+    "http_admission_rejections_total",
+    "Requests turned away before reaching a route, by reason.",
+    ("reason",),
+)
+loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop heartbeat woke up.",
+)
+loop_stalls = Counter(
+    "event_loop_stalls_total",
+    "Heartbeats delayed past the lag warning threshold.",
+)
+
+REGISTRY = (
+    query_latency,
+    slow_queries,
+    request_latency,
+    request_queries,
+    admission_rejections,
+    loop_lag,
+    loop_stalls,
+)
+
+
+def render(extra: list[str] | None = None) -> str:
+    """Every registered metric (plus pre-rendered extra lines) as exposition text."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra or [])
+    return "\n".join(lines) + "\n"
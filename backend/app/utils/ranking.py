@@ -0,0 +1,113 @@
+"""
+Fractional rank keys for manual card ordering.
+
+A rank is a base-62 string read as a fraction in [0, 1): "V" is roughly
+0.5, "0V" roughly 0.008. Keys never end in "0", so there is always room
+between two keys, and sorting them bytewise (COLLATE "C") matches their
+numeric order. Moving a card only rewrites that card's key.
+"""
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# Keys longer than this trigger a background rebalance of their column
+MAX_RANK_LENGTH = 16
+
+_DIGIT_INDEX = {digit: i for i, digit in enumerate(DIGITS)}
+
+
+def _validate(key: str) -> None:
+    if not key or key.endswith("0") or any(c not in _DIGIT_INDEX for c in key):
+        raise ValueError(f"Invalid rank key: {key!r}")
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    """Key strictly between low and high ("" and None are the open bounds)."""
+    if high is not None:
+        # Copy the shared prefix, padding low with zeros
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else "0") == high[n]:
+            n += 1
+        if n > 0:
+            return high[:n] + _midpoint(low[n:], high[n:])
+
+    low_digit = _DIGIT_INDEX[low[0]] if low else 0
+    high_digit = _DIGIT_INDEX[high[0]] if high is not None else BASE
+
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+
+    # Adjacent digits: if high has more digits, its first digit alone fits
+    if high is not None and len(high) > 1:
+        return high[0]
+
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def key_between(before: str | None, after: str | None) -> str:
+    """
+    Generate a rank key that sorts strictly between two neighbours.
+
+    Args:
+        before: Key of the card above, or None for the top of the column
+        after: Key of the card below, or None for the bottom of the column
+
+    Raises:
+        ValueError: If a key is malformed or before >= after
+    """
+    if before is not None:
+        _validate(before)
+    if after is not None:
+        _validate(after)
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+
+    return _midpoint(before or "", after)
+
+
+def key_after(key: str | None) -> str:
+    """
+    Generate a short rank key that sorts after key, for appending to a column.
+
+    Bumps the first digit that is not already the largest, dropping the rest,
+    so repeated appends stay short: "V" -> "W", "zV" -> "zW", "z" -> "z1".
+    key_between(key, None) would halve the remaining gap instead and grow the
+    key by a digit every few appends.
+
+    Raises:
+        ValueError: If key is malformed
+    """
+    if key is None:
+        return key_between(None, None)
+    _validate(key)
+
+    for i, digit in enumerate(key):
+        if digit != DIGITS[-1]:
+            return key[:i] + DIGITS[_DIGIT_INDEX[digit] + 1]
+    return key + DIGITS[1]
+
+
+def evenly_spaced_keys(count: int) -> list[str]:
+    """Generate count ascending keys of minimal length, spread evenly over [0, 1)."""
+    if count <= 0:
+        return []
+
+    length = 1
+    while BASE**length <= count:
+        length += 1
+    span = BASE**length
+
+    keys = []
+    for i in range(1, count + 1):
+        value = i * span // (count + 1)
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
+
+
+def needs_rebalance(key: str | None) -> bool:
+    """Whether a key has grown long enough that its column should be respaced."""
+    return key is not None and len(key) > MAX_RANK_LENGTH
@@ -0,0 +1,75 @@
+"""
+Responses for models built from trusted database rows.
+
+Services build response models with model_construct, skipping validation
+of values Postgres already typed. Returning such a model from an endpoint
+would still make FastAPI validate it again against response_model, so
+routers wrap it in model_response instead: the models are serialized
+straight to JSON by their pydantic-core serializers and FastAPI passes the
+Response through untouched. Keep response_model on the route for the
+OpenAPI schema.
+
+pydantic-core's encoder writes the models directly, without the
+intermediate dicts of jsonable_encoder and json.dumps. Each to_json call
+is a single native call that holds the GIL until it returns, so neither
+the event loop nor a thread pool gets a turn meanwhile. Long lists are
+therefore encoded a chunk at a time (model_list_response), yielding to
+the event loop between chunks, so other requests on the worker, health
+checks included, are not stalled for the whole encode.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi import Response
+from pydantic_core import to_json
+
+from app.config import settings
+
+
+def model_response(
+    content: Any,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    JSON response for a model (or list of models) without re-validating it.
+
+    Headers set on an injected Response are not merged into a returned
+    one, so pass them (e.g. ETag) here.
+    """
+    return Response(
+        content=to_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+async def model_list_response(
+    items: Sequence[Any],
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    model_response for a list, encoded RESPONSE_CHUNK_ITEMS items at a time
+    with the event loop free to run other tasks between chunks.
+    """
+    chunk = settings.RESPONSE_CHUNK_ITEMS
+    if not chunk or len(items) <= chunk:
+        body = to_json(items)
+    else:
+        parts = []
+        for start in range(0, len(items), chunk):
+            if start:
+                await asyncio.sleep(0)
+            # Each chunk encodes as "[...]"; keep what is inside the brackets
+            parts.append(to_json(items[start : start + chunk])[1:-1])
+        body = b"[" + b",".join(parts) + b"]"
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,160 @@
+"""
+Microbenchmark: CPU spent turning task rows into a JSON response body.
+
+    python benchmark_serialization.py [--tasks 1000] [--repeat 20]
+
+Compares, on in-memory rows shaped like a hydrated board (no database
+needed):
+
+  validated  validating constructors, then FastAPI's response_model
+             validation and JSONResponse encoding
+  trusted    the services' model_construct path and model_response
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.task import LinkInTask, SubtaskInTask, TaskResponse
+from app.models.user import UserResponse
+from app.services.task_service import _record_to_assignee, _record_to_task
+from app.utils.responses import model_response
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def _user_row(user_id: int) -> dict:
+    return {
+        "id": user_id,
+        "name": f"Parent {user_id}",
+        "email": f"parent{user_id}@example.com",
+        "avatar": None,
+        "version": 1,
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+
+
+def _board(size: int) -> list[dict]:
+    """Task rows plus the child rows hydration would attach to each."""
+    board = []
+    for i in range(size):
+        board.append(
+            {
+                "row": {
+                    "id": i + 1,
+                    "title": f"Task {i + 1}",
+                    "description": "Pick up groceries on the way home",
+                    "assigned_user_id": i % 4 + 1,
+                    "due_date": date(2026, 11, 1) + timedelta(days=i % 30),
+                    "status": ("todo", "in-progress", "done")[i % 3],
+                    "priority": ("urgent", "high", "med", "low", "none")[i % 5],
+                    "task_type": "errand",
+                    "tags": ["home", "weekly"],
+                    "family_id": 1,
+                    "version": 3,
+                    "blocked": i % 7 == 0,
+                    "rank": f"a{i:05d}",
+                    "created_at": NOW,
+                    "updated_at": NOW,
+                    "subtask_total": 3,
+                    "subtask_completed": 1,
+                },
+                "assignee": _user_row(i % 4 + 1),
+                "assignees": [_user_row(i % 4 + 1), _user_row((i + 1) % 4 + 1)],
+                "subtasks": [
+                    {"id": i * 3 + n, "title": f"Step {n}", "completed": n == 0} for n in range(3)
+                ],
+                "links": [{"id": i + 1, "url": "https://example.com/list", "title": "List"}],
+            }
+        )
+    return board
+
+
+def _validated(board: list[dict]) -> list[TaskResponse]:
+    """Tasks built through validating constructors."""
+    tasks = []
+    for entry in board:
+        row = entry["row"]
+        tasks.append(
+            TaskResponse(
+                **{**row, "tags": row["tags"] or []},
+                assignee=UserResponse(**entry["assignee"]),
+                assignees=[UserResponse(**user) for user in entry["assignees"]],
+                subtasks=[SubtaskInTask(**subtask) for subtask in entry["subtasks"]],
+                links=[LinkInTask(**link) for link in entry["links"]],
+            )
+        )
+    return tasks
+
+
+def _trusted(board: list[dict]) -> list[TaskResponse]:
+    """Tasks built the way the services build them."""
+    return [
+        _record_to_task(
+            entry["row"],
+            _record_to_assignee(entry["assignee"]),
+            [_record_to_assignee(user) for user in entry["assignees"]],
+            [SubtaskInTask.model_construct(**subtask) for subtask in entry["subtasks"]],
+            [LinkInTask.model_construct(**link) for link in entry["links"]],
+        )
+        for entry in board
+    ]
+
+
+async def _validated_body(board: list[dict], field) -> bytes:
+    content = await serialize_response(field=field, response_content=_validated(board))
+    return JSONResponse(content).body
+
+
+async def _trusted_body(board: list[dict], field) -> bytes:
+    return model_response(_trusted(board)).body
+
+
+async def _time(render, board: list[dict], field, repeat: int) -> tuple[float, int]:
+    """Best wall time of repeat runs, and the body size."""
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await render(board, field)
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+
+async def main(size: int, repeat: int) -> None:
+    board = _board(size)
+    field = create_response_field(name="Response_List_Tasks", type_=list[TaskResponse])
+
+    validated, validated_size = await _time(_validated_body, board, field, repeat)
+    trusted, trusted_size = await _time(_trusted_body, board, field, repeat)
+
+    print(f"{size} tasks, best of {repeat} runs")
+    for label, seconds, body_size in (
+        ("validated", validated, validated_size),
+        ("trusted", trusted, trusted_size),
+    ):
+        print(
+            f"  {label:<10} {seconds * 1000:8.2f} ms  "
+            f"{seconds / size * 1e6:7.1f} µs/task  {body_size} bytes"
+        )
+    saved = (validated - trusted) / size * 1e6
+    print(f"  saved      {saved:7.1f} µs/task ({validated / trusted:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.repeat))
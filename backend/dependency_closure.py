@@ -0,0 +1,55 @@
+"""
+Maintenance commands for the dependency_closure table.
+
+    python dependency_closure.py check     # report pairs that disagree with the edges
+    python dependency_closure.py rebuild   # recompute the table from the edges
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import init_db, close_db
+from app.services import closure_service
+
+
+async def check() -> int:
+    mismatches = await closure_service.check()
+    for m in mismatches:
+        if m.stored_depth is None:
+            problem = f"missing (expected depth {m.expected_depth})"
+        elif m.expected_depth is None:
+            problem = f"stale (stored depth {m.stored_depth})"
+        else:
+            problem = f"depth {m.stored_depth}, expected {m.expected_depth}"
+        print(f"  Task {m.ancestor} → Task {m.descendant}: {problem}")
+
+    if mismatches:
+        print(f"{len(mismatches)} inconsistent closure rows; run 'rebuild' to repair")
+        return 1
+    print("Closure table is consistent with the dependencies table")
+    return 0
+
+
+async def rebuild() -> int:
+    await closure_service.rebuild_all()
+    print("Closure table rebuilt")
+    return 0
+
+
+async def main(command: str) -> int:
+    await init_db()
+    try:
+        return await (check() if command == "check" else rebuild())
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["check", "rebuild"])
+    sys.exit(asyncio.run(main(parser.parse_args().command)))
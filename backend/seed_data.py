@@ -7,6 +7,7 @@ from datetime import date, timedelta
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import init_db, close_db, execute, fetch_one, fetch_val, fetch_all
+from app.services import subtask_service
 
 
 async def seed():
@@ -373,6 +374,9 @@ async def seed():
             )
         print(f"  Added {len(preschool_items)} subtasks to 'Research preschools'")
 
+        # Subtasks were inserted directly, so sync the task progress counters
+        await subtask_service.recount_progress()
+
         # ── DEPENDENCIES (blocking) ─────────────────────────────────────
         print("Creating dependencies...")
 
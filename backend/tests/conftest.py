@@ -6,6 +6,8 @@ from httpx import ASGITransport, AsyncClient
 
 from app import database as db
 from app.main import app
+from app.services import identity_service, user_dimension_service
+from app.utils import admission
 
 
 @pytest.fixture(scope="session")
@@ -20,6 +22,10 @@ def event_loop():
 async def setup_test_db():
     """Setup and teardown test database for each test."""
     await db.init_db()
+    admission.reset()
+    # Truncation restarts user IDs, so cached users would alias new ones
+    identity_service.clear()
+    user_dimension_service.clear()
 
     # Clean tables before each test
     await db.execute("TRUNCATE dependencies, tasks, users RESTART IDENTITY CASCADE")
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import database as db
+from app.main import app
+from app.middleware import AdmissionMiddleware
+from app.utils import admission
+
+
+@pytest.mark.asyncio
+async def test_empty_bucket_is_rate_limited(client: AsyncClient, monkeypatch):
+    """Test that a client over its burst gets 429 while other clients do not."""
+    monkeypatch.setattr(db.settings, "ADMISSION_BURST", 2)
+    monkeypatch.setattr(db.settings, "ADMISSION_RATE", 0.5)
+
+    statuses = [(await client.get("/api/tasks/plan?family_id=1")).status_code for _ in range(3)]
+    assert statuses[:2] == [200, 200]
+    assert statuses[2] == 429
+
+    # Naming another family does not reset the client's bucket
+    response = await client.get("/api/tasks/plan?family_id=2")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert (await client.get("/health")).status_code == 200
+
+    other = ASGITransport(app=app, client=("10.0.0.2", 123))
+    async with AsyncClient(transport=other, base_url="http://test") as neighbour:
+        assert (await neighbour.get("/api/tasks/plan?family_id=1")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refusals_are_readable_cross_origin(client: AsyncClient, monkeypatch):
+    """Test that preflights skip admission and refusals carry CORS headers."""
+    monkeypatch.setattr(db.settings, "ADMISSION_BURST", 1)
+    monkeypatch.setattr(db.settings, "ADMISSION_RATE", 0.5)
+    origin = {"Origin": "http://localhost:3000"}
+
+    for _ in range(3):
+        preflight = await client.options(
+            "/api/tasks", headers={**origin, "Access-Control-Request-Method": "GET"}
+        )
+        assert preflight.status_code == 200
+
+    assert (await client.get("/api/tasks", headers=origin)).status_code == 200
+    refused = await client.get("/api/tasks", headers=origin)
+    assert refused.status_code == 429
+    assert refused.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert "retry-after" in refused.headers["access-control-expose-headers"].lower()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_limit_queues_then_refuses(client: AsyncClient, monkeypatch):
+    """Test that requests over a client's slots wait, and overflow is refused."""
+    monkeypatch.setattr(db.settings, "ADMISSION_MAX_IN_FLIGHT", 1)
+    monkeypatch.setattr(db.settings, "ADMISSION_MAX_QUEUED", 1)
+
+    tenant = admission.get_tenant("client:127.0.0.1", 50.0, 100, 1)
+    await tenant.slots.acquire()  # Another request of the client is running
+    tenant.in_flight += 1
+
+    queued = asyncio.create_task(client.get("/api/tasks/plan?family_id=1"))
+    await asyncio.sleep(0.05)
+    overflow = await client.get("/api/tasks/plan?family_id=1")
+    assert overflow.status_code == 429
+    assert overflow.headers["retry-after"] == "1"
+
+    tenant.in_flight -= 1
+    tenant.slots.release()
+    assert (await queued).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_deep_connection_queue_sheds_load(client: AsyncClient, monkeypatch):
+    """Test that requests are refused with 503 while callers queue for connections."""
+    monkeypatch.setattr(db.metrics, "waiting", db.settings.ADMISSION_MAX_DB_WAITING)
+
+    response = await client.get("/api/tasks")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert (await client.get("/health")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_releases_its_slot(monkeypatch):
+    """Test that a response that keeps streaming gives its slot back once started."""
+    monkeypatch.setattr(db.settings, "ADMISSION_MAX_IN_FLIGHT", 1)
+    finish = asyncio.Event()
+
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await finish.wait()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/events",
+        "query_string": b"",
+        "headers": [],
+        "client": ("10.0.0.1", 1234),
+    }
+    running = asyncio.create_task(AdmissionMiddleware(stream)(scope, receive, send))
+    await asyncio.sleep(0.05)
+
+    tenant = admission.get_tenant(admission.tenant_key(scope), 50.0, 100, 1)
+    assert tenant.in_flight == 0
+    assert not tenant.slots.locked()
+
+    finish.set()
+    await running
+    assert tenant.in_flight == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app import database as db
+from app.services import identity_service
+
+
+def _profile(google_id: str = "google-1", email: str = "ada@example.com") -> dict:
+    return {"google_id": google_id, "email": email, "name": "Ada Lovelace"}
+
+
+@pytest.mark.asyncio
+async def test_first_login_creates_user_and_family(client: AsyncClient):
+    """Test that a first login creates the user with a new family."""
+    response = await client.post("/api/auth/sync", json=_profile())
+    assert response.status_code == 200
+    data = response.json()
+    assert data["is_new_user"] is True
+    assert data["user"]["google_id"] == "google-1"
+    assert data["family"]["name"] == "The Lovelace Family"
+    assert data["user"]["family_id"] == data["family"]["id"]
+
+    response = await client.post("/api/auth/sync", json=_profile())
+    again = response.json()
+    assert again["is_new_user"] is False
+    assert again["user"]["id"] == data["user"]["id"]
+    assert again["family"] == data["family"]
+
+
+@pytest.mark.asyncio
+async def test_login_links_existing_user_by_email(client: AsyncClient, sample_user: dict):
+    """Test that a user created before Google sign-in is linked, not duplicated."""
+    response = await client.post("/api/auth/sync", json=_profile(email=sample_user["email"]))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["is_new_user"] is False
+    assert data["user"]["id"] == sample_user["id"]
+    assert data["user"]["version"] == sample_user["version"] + 1
+    assert data["user"]["family_id"] == data["family"]["id"]
+
+
+@pytest.mark.asyncio
+async def test_login_relinks_user_with_other_google_id(client: AsyncClient):
+    """Test that an email match is linked even if it had another Google account."""
+    first = (await client.post("/api/auth/sync", json=_profile("google-old"))).json()
+
+    response = await client.post("/api/auth/sync", json=_profile("google-new"))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["is_new_user"] is False
+    assert data["user"]["id"] == first["user"]["id"]
+    assert data["user"]["google_id"] == "google-new"
+    assert data["family"] == first["family"]
+    assert await identity_service.resolve("google-old") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_logins_create_one_family(client: AsyncClient):
+    """Test that racing first logins resolve to one user and one family."""
+    families = await db.fetch_val("SELECT COUNT(*) FROM family_accounts")
+
+    responses = await asyncio.gather(
+        *(client.post("/api/auth/sync", json=_profile("google-race")) for _ in range(5))
+    )
+
+    assert all(response.status_code == 200 for response in responses)
+    results = [response.json() for response in responses]
+    assert len({result["user"]["id"] for result in results}) == 1
+    assert len({result["family"]["id"] for result in results}) == 1
+    assert sum(result["is_new_user"] for result in results) == 1
+    assert await db.fetch_val("SELECT COUNT(*) FROM family_accounts") == families + 1
+
+
+@pytest.mark.asyncio
+async def test_identity_is_cached_until_user_changes(client: AsyncClient, monkeypatch):
+    """Test that identities resolve without the database until the user is written."""
+    identity_service.clear()
+    user = (await client.post("/api/auth/sync", json=_profile())).json()["user"]
+
+    async def no_database(*args):
+        raise AssertionError("identity lookup hit the database")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(db, "fetch_one", no_database)
+        identity = await identity_service.resolve("google-1")
+        # A returning user's sign-in is answered without the sync statement
+        response = await client.post("/api/auth/sync", json=_profile())
+    assert response.status_code == 200
+    assert response.json()["user"] == user
+    assert response.json()["is_new_user"] is False
+    assert identity.user_id == user["id"]
+    assert identity.family_id == user["family_id"]
+    assert identity.name == "Ada Lovelace"
+
+    await client.put(f"/api/users/{user['id']}", json={"first_name": "Augusta"})
+    identity = await identity_service.resolve("google-1")
+    assert identity.name == "Augusta"
+
+    await client.delete(f"/api/users/{user['id']}")
+    assert await identity_service.resolve("google-1") is None
@@ -0,0 +1,138 @@
+import asyncpg
+import pytest
+
+from app import database as db
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_reuses_one_connection():
+    """Test that all helpers inside a unit of work share one connection."""
+    async with db.unit_of_work():
+        first = await db.fetch_val("SELECT pg_backend_pid()")
+        second = await db.fetch_val("SELECT pg_backend_pid()")
+        async with db.get_connection() as conn:
+            third = await conn.fetchval("SELECT pg_backend_pid()")
+    assert first == second == third
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_on_error():
+    """Test that a failing transaction leaves no partial writes."""
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await db.execute("INSERT INTO tasks (title) VALUES ($1)", "Rolled back")
+            raise RuntimeError("boom")
+
+    count = await db.fetch_val("SELECT COUNT(*) FROM tasks")
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_nested_transaction_is_savepoint():
+    """Test that an inner failure only rolls back the inner block."""
+    async with db.transaction():
+        await db.execute("INSERT INTO tasks (title) VALUES ($1)", "Outer")
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.execute("INSERT INTO tasks (title) VALUES ($1)", "Inner")
+                raise RuntimeError("boom")
+
+    titles = [row["title"] for row in await db.fetch_all("SELECT title FROM tasks")]
+    assert titles == ["Outer"]
+
+
+@pytest.mark.asyncio
+async def test_gather_runs_reads_on_bounded_connections(monkeypatch):
+    """Test that gathered reads use separate connections, within the per-request bound."""
+    monkeypatch.setattr(db.settings, "DB_MAX_CONNECTIONS_PER_REQUEST", 3)
+    reads = [db.fetch_val("SELECT pg_backend_pid() FROM pg_sleep(0.05)") for _ in range(6)]
+    async with db.unit_of_work():
+        own = await db.fetch_val("SELECT pg_backend_pid()")
+        pids = await db.gather(*reads)
+        assert await db.fetch_val("SELECT pg_backend_pid()") == own
+
+    assert own not in pids
+    assert len(set(pids)) <= 2  # Three connections, the request's own included
+
+
+@pytest.mark.asyncio
+async def test_gather_in_transaction_stays_on_its_connection():
+    """Test that reads inside a transaction see its uncommitted writes."""
+    async with db.transaction():
+        await db.execute("INSERT INTO tasks (title) VALUES ($1)", "Uncommitted")
+        own = await db.fetch_val("SELECT pg_backend_pid()")
+        pids, count = await db.gather(
+            db.fetch_val("SELECT pg_backend_pid()"),
+            db.fetch_val("SELECT COUNT(*) FROM tasks"),
+        )
+    assert pids == own
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_timeout_is_counted(monkeypatch):
+    """Test that an exhausted pool raises PoolTimeoutError and records it."""
+    monkeypatch.setattr(db.settings, "DB_POOL_ACQUIRE_TIMEOUT", 0.05)
+    held = [await db.pool.acquire() for _ in range(db.pool.get_max_size())]
+    try:
+        timeouts = db.metrics.acquire_timeouts
+        with pytest.raises(db.PoolTimeoutError):
+            await db.fetch_val("SELECT 1")
+        assert db.metrics.acquire_timeouts == timeouts + 1
+        assert db.pool_stats()["in_use"] == len(held)
+    finally:
+        for conn in held:
+            await db.pool.release(conn)
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_pool_and_latency(client):
+    """Test that the readiness probe round-trips to the database."""
+    response = await client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["db_latency_ms"] is not None
+    assert data["pool"]["max_size"] == db.settings.DB_POOL_MAX_SIZE
+
+
+@pytest.fixture
+async def replica(monkeypatch):
+    """Stand in for a replica with a second pool on the same database."""
+    replica_pool = await asyncpg.create_pool(
+        host=db.settings.DB_HOST,
+        port=db.settings.DB_PORT,
+        user=db.settings.DB_USER,
+        password=db.settings.DB_PASSWORD,
+        database=db.settings.DB_NAME,
+        min_size=1,
+        max_size=2,
+        server_settings={"application_name": "replica"},
+    )
+    monkeypatch.setattr(db, "replica_pool", replica_pool)
+    yield replica_pool
+    await replica_pool.close()
+
+
+APPLICATION_NAME = "SELECT current_setting('application_name')"
+
+
+@pytest.mark.asyncio
+async def test_read_only_unit_of_work_reads_replica_until_write(replica):
+    """Test that reads leave the replica once the unit of work writes."""
+    async with db.unit_of_work(read_only=True):
+        assert await db.fetch_val(APPLICATION_NAME) == "replica"
+        await db.execute("INSERT INTO tasks (title) VALUES ($1)", "Written")
+        assert await db.fetch_val(APPLICATION_NAME) == db.settings.DB_APPLICATION_NAME
+        assert await db.fetch_val("SELECT COUNT(*) FROM tasks") == 1
+
+    # Write units of work never touch the replica
+    async with db.unit_of_work():
+        assert await db.fetch_val(APPLICATION_NAME) == db.settings.DB_APPLICATION_NAME
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_pins_reads_to_primary(replica):
+    """Test that a replica behind the client's last write is not used."""
+    async with db.unit_of_work(read_only=True, min_lsn="FFFFFFFF/FFFFFFFF"):
+        assert await db.fetch_val(APPLICATION_NAME) == db.settings.DB_APPLICATION_NAME
@@ -1,7 +1,12 @@
+import asyncio
+import struct
+
 import pytest
 from httpx import AsyncClient
 
 from app import database as db
+from app.services import closure_service, event_service, graph_service
+from app.utils.dependency_graph import DependencyGraph
 
 
 async def create_task(title: str) -> dict:
@@ -19,6 +24,15 @@ async def create_task(title: str) -> dict:
     return dict(row)
 
 
+async def closure_depth(ancestor: dict, descendant: dict) -> int | None:
+    """Helper to read the stored shortest chain length between two tasks."""
+    return await db.fetch_val(
+        "SELECT depth FROM dependency_closure WHERE ancestor = $1 AND descendant = $2",
+        ancestor["id"],
+        descendant["id"],
+    )
+
+
 @pytest.mark.asyncio
 async def test_create_dependency(client: AsyncClient):
     """Test creating a dependency between tasks."""
@@ -228,3 +242,425 @@ async def test_get_dependencies_for_task(client: AsyncClient):
     assert response.status_code == 200
     deps = response.json()
     assert len(deps) == 2
+
+
+@pytest.mark.asyncio
+async def test_cycle_error_shows_path(client: AsyncClient):
+    """Test that the cycle error names every task on the offending path."""
+    task_a = await create_task("Task A")
+    task_b = await create_task("Task B")
+    task_c = await create_task("Task C")
+
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": task_a["id"], "depends_on_task_id": task_b["id"]},
+    )
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": task_b["id"], "depends_on_task_id": task_c["id"]},
+    )
+
+    response = await client.post(
+        "/api/dependencies",
+        json={"task_id": task_c["id"], "depends_on_task_id": task_a["id"]},
+    )
+    assert response.status_code == 400
+    expected = f"Task {task_c['id']} → Task {task_a['id']} → Task {task_b['id']} → Task {task_c['id']}"
+    assert expected in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_cached_graph_sees_external_writes(client: AsyncClient):
+    """Test that edges removed outside the API are visible to the cycle check."""
+    task_a = await create_task("Task A")
+    task_b = await create_task("Task B")
+
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": task_a["id"], "depends_on_task_id": task_b["id"]},
+    )
+
+    # Another worker (or a script) removes the edge behind our back
+    await db.execute("DELETE FROM dependencies")
+
+    response = await client.post(
+        "/api/dependencies",
+        json={"task_id": task_b["id"], "depends_on_task_id": task_a["id"]},
+    )
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_cross_family_dependency_rejected(client: AsyncClient):
+    """Test that tasks from different families cannot be linked."""
+    family_id = await db.fetch_val(
+        "INSERT INTO family_accounts (name) VALUES ($1) RETURNING id", "The Tests"
+    )
+    task_a = await create_task("Task A")
+    task_b = dict(
+        await db.fetch_one(
+            "INSERT INTO tasks (title, family_id) VALUES ($1, $2) RETURNING *",
+            "Task B",
+            family_id,
+        )
+    )
+
+    response = await client.post(
+        "/api/dependencies",
+        json={"task_id": task_a["id"], "depends_on_task_id": task_b["id"]},
+    )
+    assert response.status_code == 400
+    assert "different families" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_dependencies(client: AsyncClient):
+    """Test creating a chain of dependencies in one request."""
+    tasks = [await create_task(f"Step {i}") for i in range(4)]
+    edges = [
+        {"task_id": tasks[i + 1]["id"], "depends_on_task_id": tasks[i]["id"]}
+        for i in range(3)
+    ]
+
+    response = await client.post("/api/dependencies/bulk", json={"dependencies": edges})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["created"]) == 3
+    assert data["rejected"] == []
+
+    response = await client.get("/api/dependencies")
+    assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reports_rejections(client: AsyncClient):
+    """Test that invalid edges are reported while valid ones are created."""
+    task_a = await create_task("Task A")
+    task_b = await create_task("Task B")
+    task_c = await create_task("Task C")
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": task_a["id"], "depends_on_task_id": task_b["id"]},
+    )
+
+    edges = [
+        {"task_id": task_b["id"], "depends_on_task_id": task_c["id"]},  # ok
+        {"task_id": task_a["id"], "depends_on_task_id": task_b["id"]},  # exists
+        {"task_id": task_c["id"], "depends_on_task_id": task_a["id"]},  # cycle
+        {"task_id": task_c["id"], "depends_on_task_id": task_c["id"]},  # self
+        {"task_id": task_c["id"], "depends_on_task_id": 99999},  # missing
+    ]
+    response = await client.post("/api/dependencies/bulk", json={"dependencies": edges})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [(d["task_id"], d["depends_on_task_id"]) for d in data["created"]] == [
+        (task_b["id"], task_c["id"])
+    ]
+    reasons = {(r["task_id"], r["depends_on_task_id"]): r["reason"] for r in data["rejected"]}
+    assert "already exists" in reasons[(task_a["id"], task_b["id"])]
+    assert "cycle" in reasons[(task_c["id"], task_a["id"])]
+    assert "itself" in reasons[(task_c["id"], task_c["id"])]
+    assert "not found" in reasons[(task_c["id"], 99999)]
+
+
+@pytest.mark.asyncio
+async def test_task_plan_critical_path_and_blockers(client: AsyncClient):
+    """Test that a task plan orders prerequisites and flags late ones."""
+    buy = (await client.post("/api/tasks", json={"title": "Buy boxes", "due_date": "2026-05-10"})).json()
+    pack = (await client.post("/api/tasks", json={"title": "Pack", "due_date": "2026-05-03"})).json()
+    move = (await client.post("/api/tasks", json={"title": "Move", "due_date": "2026-05-05"})).json()
+    await client.post("/api/tasks", json={"title": "Unrelated"})
+
+    await client.post(
+        "/api/dependencies/bulk",
+        json={
+            "dependencies": [
+                {"task_id": pack["id"], "depends_on_task_id": buy["id"]},
+                {"task_id": move["id"], "depends_on_task_id": pack["id"]},
+            ]
+        },
+    )
+
+    response = await client.get(f"/api/tasks/{move['id']}/plan")
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["order"] == [buy["id"], pack["id"], move["id"]]
+    assert plan["critical_path"] == [buy["id"], pack["id"], move["id"]]
+    # Boxes arrive after the moving deadline, so packing can't start in time
+    assert plan["blockers"] == [buy["id"], pack["id"]]
+    entries = {entry["task_id"]: entry for entry in plan["tasks"]}
+    assert entries[move["id"]]["earliest_start"] == "2026-05-10"
+    assert entries[move["id"]]["at_risk"] is True
+
+    response = await client.get("/api/tasks/plan")
+    assert response.status_code == 200
+    assert len(response.json()["order"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_task_graph_directions_and_depth(client: AsyncClient):
+    """Test the transitive neighbourhood endpoint in each direction."""
+    a, b, c, d = [await create_task(name) for name in "ABCD"]
+    # A depends on B depends on C; D depends on A
+    for task, dep in ((a, b), (b, c), (d, a)):
+        await client.post(
+            "/api/dependencies",
+            json={"task_id": task["id"], "depends_on_task_id": dep["id"]},
+        )
+
+    response = await client.get(f"/api/tasks/{a['id']}/graph?direction=up")
+    data = response.json()
+    assert {n["id"]: n["depth"] for n in data["nodes"]} == {
+        a["id"]: 0,
+        b["id"]: -1,
+        c["id"]: -2,
+    }
+    assert sorted(map(tuple, data["edges"])) == sorted(
+        [(a["id"], b["id"]), (b["id"], c["id"])]
+    )
+
+    response = await client.get(f"/api/tasks/{a['id']}/graph?direction=both&depth=1")
+    data = response.json()
+    assert {n["id"] for n in data["nodes"]} == {a["id"], b["id"], d["id"]}
+    assert all(n["status"] == "todo" for n in data["nodes"])
+
+    response = await client.get("/api/tasks/99999/graph")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_ready_queue_follows_blocked_flag(client: AsyncClient):
+    """Tasks leave and re-enter the ready queue as prerequisites change."""
+    buy = await create_task("Buy paint")
+    paint = await create_task("Paint fence")
+
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": paint["id"], "depends_on_task_id": buy["id"]},
+    )
+
+    response = await client.get(f"/api/tasks/{paint['id']}")
+    assert response.json()["blocked"] is True
+    ready = [task["id"] for task in (await client.get("/api/tasks/ready")).json()]
+    assert ready == [buy["id"]]
+
+    # Finishing the prerequisite unblocks the dependent
+    await client.put(f"/api/tasks/{buy['id']}", json={"status": "done"})
+    ready = [task["id"] for task in (await client.get("/api/tasks/ready")).json()]
+    assert ready == [paint["id"]]
+
+    # Reopening it blocks the dependent again
+    await client.put(f"/api/tasks/{buy['id']}", json={"status": "in-progress"})
+    response = await client.get(f"/api/tasks/{paint['id']}")
+    assert response.json()["blocked"] is True
+
+    # Deleting the prerequisite removes the edge and the block
+    await client.delete(f"/api/tasks/{buy['id']}")
+    response = await client.get(f"/api/tasks/{paint['id']}")
+    assert response.json()["blocked"] is False
+
+
+@pytest.mark.asyncio
+async def test_moving_prerequisite_to_done_unblocks_dependent(client: AsyncClient):
+    """Moving a prerequisite into done through the board unblocks its dependent."""
+    buy = await create_task("Buy paint")
+    paint = await create_task("Paint fence")
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": paint["id"], "depends_on_task_id": buy["id"]},
+    )
+
+    response = await client.post(f"/api/tasks/{buy['id']}/move", json={"status": "done"})
+    assert response.status_code == 200
+    assert response.json()["unblocked_task_ids"] == [paint["id"]]
+    response = await client.get(f"/api/tasks/{paint['id']}")
+    assert response.json()["blocked"] is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_prerequisite_completion_unblocks(client: AsyncClient):
+    """Finishing two prerequisites at once leaves their dependent unblocked."""
+    for _ in range(5):
+        first, second, dependent = [await create_task(name) for name in ("A", "B", "C")]
+        for prerequisite in (first, second):
+            await client.post(
+                "/api/dependencies",
+                json={"task_id": dependent["id"], "depends_on_task_id": prerequisite["id"]},
+            )
+
+        await asyncio.gather(
+            client.put(f"/api/tasks/{first['id']}", json={"status": "done"}),
+            client.put(f"/api/tasks/{second['id']}", json={"status": "done"}),
+        )
+        response = await client.get(f"/api/tasks/{dependent['id']}")
+        assert response.json()["blocked"] is False
+
+
+@pytest.mark.asyncio
+async def test_closure_follows_edge_writes(client: AsyncClient):
+    """The closure table stays exact through inserts, deletes and task deletion."""
+    a, b, c, d = [await create_task(name) for name in "ABCD"]
+    # Diamond: A depends on B and C, both depend on D; plus A directly on D
+    ids = {}
+    for task, dep in ((a, b), (a, c), (b, d), (c, d), (a, d)):
+        response = await client.post(
+            "/api/dependencies",
+            json={"task_id": task["id"], "depends_on_task_id": dep["id"]},
+        )
+        ids[(task["id"], dep["id"])] = response.json()["id"]
+
+    assert await closure_depth(d, a) == 1
+    assert await closure_service.check() == []
+
+    # Removing the shortcut keeps D upstream of A via B and C
+    await client.delete(f"/api/dependencies/{ids[(a['id'], d['id'])]}")
+    assert await closure_depth(d, a) == 2
+    assert await closure_service.check() == []
+
+    await client.delete(f"/api/dependencies/{ids[(b['id'], d['id'])]}")
+    assert await closure_depth(d, a) == 2
+    assert await closure_depth(d, b) is None
+
+    # Edges cascading away with a task are picked up before the next read
+    await client.delete(f"/api/tasks/{c['id']}")
+    response = await client.get(f"/api/tasks/{a['id']}/graph?direction=up")
+    assert {n["id"] for n in response.json()["nodes"]} == {a["id"], b["id"]}
+    assert await closure_service.check() == []
+
+
+@pytest.mark.asyncio
+async def test_deleting_unlinked_task_keeps_graph_version(client: AsyncClient):
+    """Only deleting a task that had edges invalidates its family's graph."""
+    a, b, loose = [await create_task(name) for name in ("A", "B", "Loose")]
+    await client.post("/api/dependencies", json={"task_id": a["id"], "depends_on_task_id": b["id"]})
+    version = await graph_service.get_version(None)
+
+    await client.delete(f"/api/tasks/{loose['id']}")
+    assert await graph_service.get_version(None) == version
+
+    await client.delete(f"/api/tasks/{b['id']}")
+    assert await graph_service.get_version(None) != version
+
+
+@pytest.mark.asyncio
+async def test_concurrent_graph_reads_rebuild_closure_once(client: AsyncClient):
+    """Readers catching up a stale closure at the same time do not collide."""
+    a, b, c = [await create_task(name) for name in "ABC"]
+    for task, dep in ((a, b), (b, c)):
+        await client.post(
+            "/api/dependencies", json={"task_id": task["id"], "depends_on_task_id": dep["id"]}
+        )
+    # An edge written around the service leaves the closure behind
+    await db.execute(
+        "INSERT INTO dependencies (task_id, depends_on_task_id) VALUES ($1, $2)", a["id"], c["id"]
+    )
+
+    responses = await asyncio.gather(
+        *(client.get(f"/api/tasks/{a['id']}/graph?direction=up") for _ in range(5))
+    )
+    assert [response.status_code for response in responses] == [200] * 5
+    assert await closure_service.check() == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dependency_creation_stays_acyclic(client: AsyncClient):
+    """Racing writers in one family cannot both pass the cycle check."""
+    ids = [(await create_task(f"Task {i}"))["id"] for i in range(6)]
+
+    # Every ordered pair at once, so each pair races against its reverse
+    requests = [(a, b) for a in ids for b in ids if a != b]
+    responses = await asyncio.gather(
+        *(
+            client.post(
+                "/api/dependencies",
+                json={"task_id": task_id, "depends_on_task_id": depends_on},
+            )
+            for task_id, depends_on in requests
+        )
+    )
+    assert {response.status_code for response in responses} <= {201, 400}
+
+    created = {pair for pair, response in zip(requests, responses) if response.status_code == 201}
+    assert created
+    assert not any((b, a) in created for a, b in created)
+
+    # The stored edges form a DAG and the closure agrees with them
+    graph = DependencyGraph()
+    for row in await db.fetch_all("SELECT task_id, depends_on_task_id FROM dependencies"):
+        assert graph.add_edge(row["depends_on_task_id"], row["task_id"]) is None
+    assert await closure_service.check() == []
+
+
+@pytest.mark.asyncio
+async def test_graph_export_csr_and_binary(client: AsyncClient):
+    """The compact export encodes the family's edges in both formats."""
+    a, b, c = [await create_task(name) for name in "ABC"]
+    # A depends on B and C; B depends on C
+    for task, dep in ((a, b), (a, c), (b, c)):
+        await client.post(
+            "/api/dependencies",
+            json={"task_id": task["id"], "depends_on_task_id": dep["id"]},
+        )
+
+    response = await client.get("/api/dependencies/graph")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["nodes"] == [c["id"], b["id"], a["id"]]
+    assert data["offsets"] == [0, 2, 3, 3]
+    assert data["targets"] == [1, 2, 2]
+
+    etag = response.headers["etag"]
+    response = await client.get(
+        "/api/dependencies/graph", headers={"If-None-Match": f'"0", W/{etag}'}
+    )
+    assert response.status_code == 304
+    # Another version or format is not a match, whatever its digits
+    response = await client.get(
+        "/api/dependencies/graph", headers={"If-None-Match": etag.replace('"', '"1', 1)}
+    )
+    assert response.status_code == 200
+
+    # The JSON validator does not revalidate the binary body
+    response = await client.get(
+        "/api/dependencies/graph?format=binary", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.headers["content-type"] == "application/octet-stream"
+    magic, node_count, edge_count, version = struct.unpack_from("<4sIIq", response.content)
+    assert (magic, node_count, edge_count, version) == (b"CSR1", 3, 3, data["graph_version"])
+    body = struct.unpack_from("<3i4I3I", response.content, 20)
+    assert list(body) == data["nodes"] + data["offsets"] + data["targets"]
+
+
+@pytest.mark.asyncio
+async def test_status_change_reports_flipped_dependents(client: AsyncClient):
+    """Completing the last prerequisite unblocks; reopening it blocks again."""
+    a, b, c = [await create_task(name) for name in "ABC"]
+    # A depends on B and C
+    for dep in (b, c):
+        await client.post(
+            "/api/dependencies",
+            json={"task_id": a["id"], "depends_on_task_id": dep["id"]},
+        )
+
+    queue = event_service.subscribe()
+    try:
+        response = await client.put(f"/api/tasks/{b['id']}", json={"status": "done"})
+        assert response.json()["unblocked_task_ids"] == []
+
+        response = await client.put(f"/api/tasks/{c['id']}", json={"status": "done"})
+        assert response.json()["unblocked_task_ids"] == [a["id"]]
+
+        response = await client.post(f"/api/tasks/{c['id']}/move", json={"status": "todo"})
+        assert response.json()["reblocked_task_ids"] == [a["id"]]
+
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+    finally:
+        event_service.unsubscribe(queue)
+
+    assert [(e.type, e.task_id, e.dependent_ids) for e in events] == [
+        ("dependents_unblocked", c["id"], [a["id"]]),
+        ("dependents_blocked", c["id"], [a["id"]]),
+    ]
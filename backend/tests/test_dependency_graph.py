@@ -0,0 +1,94 @@
+import random
+
+from app.utils.dependency_graph import DependencyGraph
+
+
+def reaches(edges: set[tuple[int, int]], start: int, target: int) -> bool:
+    """Brute-force reachability over (prerequisite, dependent) pairs."""
+    stack, seen = [start], {start}
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        for src, dst in edges:
+            if src == node and dst not in seen:
+                seen.add(dst)
+                stack.append(dst)
+    return False
+
+
+def assert_topological(graph: DependencyGraph, edges: set[tuple[int, int]]) -> None:
+    position = {task_id: i for i, task_id in enumerate(graph.topological_order())}
+    for src, dst in edges:
+        assert position[src] < position[dst]
+
+
+def test_incremental_order_matches_brute_force():
+    """Test random inserts and deletes against a brute-force cycle check."""
+    rng = random.Random(7)
+    graph = DependencyGraph()
+    edges: set[tuple[int, int]] = set()
+
+    for _ in range(400):
+        if edges and rng.random() < 0.15:
+            edge = rng.choice(sorted(edges))
+            assert graph.remove_edge(*edge)
+            edges.discard(edge)
+            continue
+
+        src, dst = rng.sample(range(1, 25), 2)
+        cycle = graph.add_edge(src, dst)
+        if (src, dst) in edges:
+            assert cycle is None
+        elif reaches(edges, dst, src):
+            assert cycle is not None
+            assert cycle[0] == cycle[-1] == dst
+            assert cycle[1] == src
+        else:
+            assert cycle is None
+            edges.add((src, dst))
+        assert_topological(graph, edges)
+
+    assert set(graph.edges()) == edges
+
+
+def test_cycle_path_follows_existing_edges():
+    """Test that the reported cycle lists each task then what it depends on."""
+    graph = DependencyGraph.from_edges([(3, 2), (2, 1)])  # 1 depends on 2 depends on 3
+    assert graph.add_edge(1, 3) == [3, 1, 2, 3]
+
+
+def test_from_edges_builds_valid_order():
+    """Test that a bulk load produces a valid topological order."""
+    edges = {(1, 2), (1, 3), (3, 4), (2, 4), (5, 1)}
+    graph = DependencyGraph.from_edges(sorted(edges))
+    assert_topological(graph, edges)
+    assert graph.edge_count == len(edges)
+
+
+def test_csr_export_round_trips_edges():
+    """Test that the CSR arrays encode exactly the graph's edges in order."""
+    rng = random.Random(11)
+    graph = DependencyGraph()
+    edges: set[tuple[int, int]] = set()
+    for _ in range(200):
+        src, dst = rng.sample(range(30), 2)
+        if graph.add_edge(src, dst) is None:
+            edges.add((src, dst))
+    # An isolated node left behind by a removal is not exported
+    graph.add_edge(100, 101)
+    graph.remove_edge(100, 101)
+
+    nodes, offsets, targets = graph.to_csr()
+    assert len(offsets) == len(nodes) + 1
+    assert 100 not in nodes
+    decoded = {
+        (nodes[i], nodes[j])
+        for i in range(len(nodes))
+        for j in targets[offsets[i]:offsets[i + 1]]
+    }
+    assert decoded == edges
+    # Topological order: every target index is after its source
+    assert all(
+        j > i for i in range(len(nodes)) for j in targets[offsets[i]:offsets[i + 1]]
+    )
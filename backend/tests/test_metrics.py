@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app import database as db
+from app.utils import loop_monitor, metrics, responses
+
+
+def test_fingerprint_normalizes_literals_and_whitespace():
+    """Test that statements differing only in literals share a fingerprint."""
+    first = metrics.fingerprint("SELECT *\n  FROM tasks WHERE id = $1 AND status = 'done' LIMIT 10")
+    second = metrics.fingerprint("SELECT * FROM tasks WHERE id = $1 AND status = 'todo' LIMIT 50")
+    assert first == second == "SELECT * FROM tasks WHERE id = $1 AND status = ? LIMIT ?"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_queries_and_pool(client: AsyncClient):
+    """Test that a request shows up in route, query and pool metrics."""
+    await client.get("/api/tasks")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/tasks",status="200"}' in body
+    assert 'http_request_db_queries_count{route="/api/tasks"}' in body
+    assert 'route="/api/tasks"' in body.split("# TYPE db_query_duration_seconds histogram")[1]
+    assert "db_pool_in_use " in body
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged(monkeypatch, caplog):
+    """Test that statements over the threshold are logged with their fingerprint."""
+    monkeypatch.setattr(db.settings, "SLOW_QUERY_MS", 1)
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        await db.fetch_val("SELECT pg_sleep(0.01)")
+    assert any("SELECT pg_sleep(?)" in record.getMessage() for record in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stall_is_logged(caplog):
+    """Test that a callback blocking the loop is logged and counted."""
+    stalls = metrics.loop_stalls._values.get((), 0)
+    loop_monitor.start(interval=0.01, threshold_ms=50)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.utils.loop_monitor"):
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # Block the loop
+            await asyncio.sleep(0.05)
+    finally:
+        await loop_monitor.stop()
+
+    assert metrics.loop_stalls._values[()] > stalls
+    assert any("Event loop blocked" in record.getMessage() for record in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_long_lists_are_encoded_without_stalling_the_loop(monkeypatch):
+    """Test that chunked encoding lets other tasks run and yields the same body."""
+    items = [
+        {"id": i, "title": f"Task {i}", "tags": ["home", "weekly"], "description": "x" * 200}
+        for i in range(20_000)
+    ]
+    monkeypatch.setattr(db.settings, "RESPONSE_CHUNK_ITEMS", 0)
+    whole = await responses.model_list_response(items)
+
+    ticks = 0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0)
+
+    monkeypatch.setattr(db.settings, "RESPONSE_CHUNK_ITEMS", 200)
+    beating = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    chunked = await responses.model_list_response(items)
+    done.set()
+    await beating
+
+    assert chunked.body == whole.body
+    # The heartbeat got a turn between every pair of chunks
+    assert ticks >= len(items) // 200 - 1
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from app.utils.ranking import MAX_RANK_LENGTH, evenly_spaced_keys, key_after, key_between
+
+
+def test_key_between_stays_ordered():
+    """Test that random inserts always produce keys between their neighbours."""
+    rng = random.Random(42)
+    keys: list[str] = []
+    for _ in range(500):
+        i = rng.randint(0, len(keys))
+        before = keys[i - 1] if i > 0 else None
+        after = keys[i] if i < len(keys) else None
+        key = key_between(before, after)
+        assert before is None or before < key
+        assert after is None or key < after
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+
+
+def test_key_between_rejects_unordered_neighbours():
+    """Test that neighbours in the wrong order are rejected."""
+    with pytest.raises(ValueError):
+        key_between("V", "F")
+
+
+def test_key_after_stays_short():
+    """Test that repeated appends produce ascending keys that grow slowly."""
+    keys = [key_after(None)]
+    for _ in range(500):
+        keys.append(key_after(keys[-1]))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert max(len(k) for k in keys) < MAX_RANK_LENGTH
+    assert not any(k.endswith("0") for k in keys)
+
+
+def test_evenly_spaced_keys_are_short_and_sorted():
+    """Test that rebalanced keys are unique, sorted and minimal length."""
+    keys = evenly_spaced_keys(1000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 1000
+    assert max(len(k) for k in keys) == 2
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models.subtask import SubtaskResponse
+
+
+async def get_progress(client: AsyncClient, task_id: int) -> tuple[int, int]:
+    """Helper returning (subtask_completed, subtask_total) for a task."""
+    response = await client.get(f"/api/tasks/{task_id}")
+    data = response.json()
+    return data["subtask_completed"], data["subtask_total"]
+
+
+@pytest.mark.asyncio
+async def test_create_subtask_bumps_total(client: AsyncClient, sample_task: dict):
+    """Test that creating subtasks increments the task's total."""
+    for title in ("Milk", "Eggs"):
+        response = await client.post(
+            f"/api/tasks/{sample_task['id']}/subtasks", json={"title": title}
+        )
+        assert response.status_code == 201
+
+    assert await get_progress(client, sample_task["id"]) == (0, 2)
+
+
+@pytest.mark.asyncio
+async def test_create_subtask_missing_task(client: AsyncClient):
+    """Test that subtasks cannot be added to a missing task."""
+    response = await client.post("/api/tasks/99999/subtasks", json={"title": "Milk"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_toggle_and_delete_keep_counters_exact(client: AsyncClient, sample_task: dict):
+    """Test that completing, re-completing and deleting keep counters exact."""
+    response = await client.post(
+        f"/api/tasks/{sample_task['id']}/subtasks", json={"title": "Milk"}
+    )
+    subtask_id = response.json()["id"]
+
+    await client.patch(f"/api/subtasks/{subtask_id}", json={"completed": True})
+    # Completing twice must not double count
+    await client.patch(f"/api/subtasks/{subtask_id}", json={"completed": True})
+    assert await get_progress(client, sample_task["id"]) == (1, 1)
+
+    response = await client.delete(f"/api/subtasks/{subtask_id}")
+    assert response.status_code == 204
+    assert await get_progress(client, sample_task["id"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_bulk_toggle_subtasks(client: AsyncClient, sample_task: dict):
+    """Test toggling many subtasks updates them and the counters at once."""
+    ids = []
+    for title in ("Milk", "Eggs", "Bread"):
+        response = await client.post(
+            f"/api/tasks/{sample_task['id']}/subtasks", json={"title": title}
+        )
+        ids.append(response.json()["id"])
+    await client.patch(f"/api/subtasks/{ids[0]}", json={"completed": True})
+
+    response = await client.patch(
+        "/api/subtasks", json={"subtask_ids": ids, "completed": True}
+    )
+    assert response.status_code == 200
+    assert [s["id"] for s in response.json()] == ids
+    assert all(s["completed"] for s in response.json())
+    assert await get_progress(client, sample_task["id"]) == (3, 3)
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_without_subtask_rows(client: AsyncClient, sample_task: dict):
+    """Test that list views can skip subtask rows and still get progress."""
+    await client.post(f"/api/tasks/{sample_task['id']}/subtasks", json={"title": "Milk"})
+
+    response = await client.get("/api/tasks?include_subtasks=false")
+    task = response.json()[0]
+    assert task["subtasks"] == []
+    assert task["subtask_total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_subtask_writes_match_schema(client: AsyncClient, sample_task: dict):
+    """Test that unvalidated subtask responses carry every field and the ETag."""
+    response = await client.post(
+        f"/api/tasks/{sample_task['id']}/subtasks", json={"title": "Milk"}
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert SubtaskResponse.model_validate(created).model_dump(mode="json") == created
+
+    response = await client.patch(
+        f"/api/subtasks/{created['id']}",
+        json={"completed": True},
+        headers={"If-Match": f'"{created["version"]}"'},
+    )
+    assert response.status_code == 200
+    updated = response.json()
+    assert SubtaskResponse.model_validate(updated).model_dump(mode="json") == updated
+    assert response.headers["etag"] == f'"{updated["version"]}"'
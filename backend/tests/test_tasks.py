@@ -1,6 +1,11 @@
 import pytest
 from httpx import AsyncClient
 
+from app import database as db
+from app.config import settings
+from app.models.task import TaskResponse
+from app.utils.ranking import key_after
+
 
 @pytest.mark.asyncio
 async def test_create_task(client: AsyncClient):
@@ -103,6 +108,19 @@ async def test_sort_tasks_by_priority(client: AsyncClient):
     assert priorities == ["urgent", "med", "low"]
 
 
+@pytest.mark.asyncio
+async def test_sort_ties_are_ordered_by_id(client: AsyncClient):
+    """Test that tasks with the same sort key come back in id order."""
+    ids = []
+    for n in range(5):
+        response = await client.post("/api/tasks", json={"title": f"Task {n}", "priority": "high"})
+        ids.append(response.json()["id"])
+
+    for sort_order in ("asc", "desc"):
+        response = await client.get(f"/api/tasks?sort_by=priority&sort_order={sort_order}")
+        assert [t["id"] for t in response.json()] == ids
+
+
 @pytest.mark.asyncio
 async def test_get_task_by_id(client: AsyncClient, sample_task: dict):
     """Test getting a task by ID."""
@@ -135,3 +153,286 @@ async def test_delete_task(client: AsyncClient, sample_task: dict):
 
     response = await client.get(f"/api/tasks/{sample_task['id']}")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_update_task_bumps_version(client: AsyncClient, sample_task: dict):
+    """Test that every write bumps the task version and ETag."""
+    response = await client.get(f"/api/tasks/{sample_task['id']}")
+    version = response.json()["version"]
+    assert response.headers["etag"] == f'"{version}"'
+
+    response = await client.put(
+        f"/api/tasks/{sample_task['id']}",
+        json={"title": "Renamed"},
+        headers={"If-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == version + 1
+    assert response.headers["etag"] == f'"{version + 1}"'
+
+
+@pytest.mark.asyncio
+async def test_update_task_stale_if_match(client: AsyncClient, sample_task: dict):
+    """Test that a stale If-Match is rejected instead of overwriting."""
+    response = await client.get(f"/api/tasks/{sample_task['id']}")
+    etag = response.headers["etag"]
+
+    await client.put(
+        f"/api/tasks/{sample_task['id']}",
+        json={"title": "First writer"},
+        headers={"If-Match": etag},
+    )
+    response = await client.put(
+        f"/api/tasks/{sample_task['id']}",
+        json={"title": "Second writer"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 412
+
+    response = await client.get(f"/api/tasks/{sample_task['id']}")
+    assert response.json()["title"] == "First writer"
+
+
+@pytest.mark.asyncio
+async def test_update_task_if_match_list_and_weak(client: AsyncClient, sample_task: dict):
+    """Test that If-Match matches any listed ETag and never a weak one."""
+    response = await client.get(f"/api/tasks/{sample_task['id']}")
+    version = response.json()["version"]
+
+    response = await client.put(
+        f"/api/tasks/{sample_task['id']}",
+        json={"title": "Weak"},
+        headers={"If-Match": f'W/"{version}"'},
+    )
+    assert response.status_code == 412
+
+    response = await client.put(
+        f"/api/tasks/{sample_task['id']}",
+        json={"title": "Listed"},
+        headers={"If-Match": f'"{version + 10}", "{version}"'},
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "Listed"
+
+
+@pytest.mark.asyncio
+async def test_update_missing_task_with_if_match(client: AsyncClient):
+    """Test that a conditional update of a missing task is still a 404."""
+    response = await client.put(
+        "/api/tasks/99999",
+        json={"title": "Ghost"},
+        headers={"If-Match": '"1"'},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_new_tasks_append_to_column(client: AsyncClient):
+    """Test that new tasks land at the bottom of their column in rank order."""
+    for title in ("First", "Second", "Third"):
+        await client.post("/api/tasks", json={"title": title})
+
+    response = await client.get("/api/tasks?status=todo&sort_by=rank&sort_order=asc")
+    assert [t["title"] for t in response.json()] == ["First", "Second", "Third"]
+
+
+@pytest.mark.asyncio
+async def test_status_change_appends_to_new_column(client: AsyncClient):
+    """Test that a task moved by a status update lands at the bottom of its new column."""
+    for title in ("First", "Second"):
+        await client.post("/api/tasks", json={"title": title, "status": "done"})
+    moved = (await client.post("/api/tasks", json={"title": "Moved"})).json()
+
+    response = await client.put(f"/api/tasks/{moved['id']}", json={"status": "done"})
+    assert response.status_code == 200
+
+    response = await client.get("/api/tasks?status=done&sort_by=rank&sort_order=asc")
+    assert [t["title"] for t in response.json()] == ["First", "Second", "Moved"]
+
+
+@pytest.mark.asyncio
+async def test_sql_rank_after_matches_key_after(client: AsyncClient):
+    """Test that the SQL rank_after derives the same keys as key_after."""
+    for key in (None, "V", "0V", "y", "z", "zz", "zV", "V3k", "9", "Zz"):
+        assert await db.fetch_val("SELECT rank_after($1)", key) == key_after(key)
+
+
+@pytest.mark.asyncio
+async def test_move_task_between_neighbours(client: AsyncClient):
+    """Test moving a task between two cards only changes its own rank."""
+    ids = []
+    for title in ("A", "B", "C"):
+        response = await client.post("/api/tasks", json={"title": title})
+        ids.append(response.json()["id"])
+    before = {t["id"]: t["rank"] for t in (await client.get("/api/tasks")).json()}
+
+    # Move C between A and B
+    response = await client.post(
+        f"/api/tasks/{ids[2]}/move",
+        json={"previous_task_id": ids[0], "next_task_id": ids[1]},
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/tasks?sort_by=rank&sort_order=asc")
+    tasks = response.json()
+    assert [t["title"] for t in tasks] == ["A", "C", "B"]
+    after = {t["id"]: t["rank"] for t in tasks}
+    assert after[ids[0]] == before[ids[0]]
+    assert after[ids[1]] == before[ids[1]]
+
+
+@pytest.mark.asyncio
+async def test_ranks_are_scoped_to_family(client: AsyncClient):
+    """Test that each family's columns are ranked independently."""
+    families = []
+    for n in (1, 2):
+        signed_in = await client.post(
+            "/api/auth/sync",
+            json={"google_id": f"google-{n}", "email": f"parent{n}@example.com", "name": "Parent"},
+        )
+        families.append(signed_in.json()["family"]["id"])
+
+    ours = (
+        await client.post("/api/tasks", json={"title": "Ours", "family_id": families[0]})
+    ).json()
+    theirs = (
+        await client.post("/api/tasks", json={"title": "Theirs", "family_id": families[1]})
+    ).json()
+    # Both are the first card of their own board
+    assert theirs["rank"] == ours["rank"]
+
+    response = await client.post(
+        f"/api/tasks/{ours['id']}/move", json={"next_task_id": theirs["id"]}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_move_task_between_swapped_neighbours(client: AsyncClient):
+    """Test that neighbours sent in the wrong order are rejected."""
+    ids = []
+    for title in ("A", "B", "C"):
+        response = await client.post("/api/tasks", json={"title": title})
+        ids.append(response.json()["id"])
+
+    response = await client.post(
+        f"/api/tasks/{ids[2]}/move",
+        json={"previous_task_id": ids[1], "next_task_id": ids[0]},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_move_task_to_other_column(client: AsyncClient):
+    """Test moving a task into another status column next to a card."""
+    todo = (await client.post("/api/tasks", json={"title": "Todo"})).json()
+    doing = (
+        await client.post("/api/tasks", json={"title": "Doing", "status": "in-progress"})
+    ).json()
+
+    response = await client.post(
+        f"/api/tasks/{todo['id']}/move",
+        json={"status": "in-progress", "next_task_id": doing["id"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "in-progress"
+
+    response = await client.get(
+        "/api/tasks?status=in-progress&sort_by=rank&sort_order=asc"
+    )
+    assert [t["title"] for t in response.json()] == ["Todo", "Doing"]
+
+
+@pytest.mark.asyncio
+async def test_move_task_neighbour_in_other_column(client: AsyncClient):
+    """Test that neighbours must be in the target column."""
+    todo = (await client.post("/api/tasks", json={"title": "Todo"})).json()
+    done = (await client.post("/api/tasks", json={"title": "Done", "status": "done"})).json()
+
+    response = await client.post(
+        f"/api/tasks/{todo['id']}/move",
+        json={"previous_task_id": done["id"]},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_unvalidated_responses_match_schema(client: AsyncClient, sample_user: dict):
+    """Test that trusted-path responses carry every field of the response model."""
+    created = await client.post(
+        "/api/tasks",
+        json={"title": "Schema", "assigned_user_ids": [sample_user["id"]], "tags": ["x"]},
+    )
+    assert created.status_code == 201
+    await client.post(f"/api/tasks/{created.json()['id']}/subtasks", json={"title": "Step"})
+
+    response = await client.get("/api/tasks")
+    [task] = response.json()
+    assert TaskResponse.model_validate(task).model_dump(mode="json") == task
+    assert task["assignees"][0]["email"] == sample_user["email"]
+    assert task["subtasks"][0]["title"] == "Step"
+
+
+@pytest.mark.asyncio
+async def test_db_rendered_task_list_matches_response_model(
+    client: AsyncClient, sample_user: dict, monkeypatch
+):
+    """Test that the Postgres-rendered task list is exactly the TaskResponse list."""
+    first = (
+        await client.post(
+            "/api/tasks",
+            json={
+                "title": "First",
+                "assigned_user_id": sample_user["id"],
+                "assigned_user_ids": [sample_user["id"]],
+                "tags": ["home"],
+                "due_date": "2026-11-01",
+            },
+        )
+    ).json()
+    second = (await client.post("/api/tasks", json={"title": "Second"})).json()
+    await client.post(f"/api/tasks/{first['id']}/subtasks", json={"title": "Step"})
+    await client.post(
+        f"/api/tasks/{first['id']}/links", json={"url": "https://example.com", "title": "Doc"}
+    )
+    await client.post(
+        "/api/dependencies",
+        json={"task_id": second["id"], "depends_on_task_id": first["id"]},
+    )
+
+    for query in ("", "?include_subtasks=false", "?sort_by=priority&status=todo"):
+        expected = (await client.get(f"/api/tasks{query}")).json()
+        monkeypatch.setattr(settings, "DB_RENDERED_LISTS", True)
+        response = await client.get(f"/api/tasks{query}")
+        monkeypatch.setattr(settings, "DB_RENDERED_LISTS", False)
+
+        assert response.headers["content-type"] == "application/json"
+        rendered = response.json()
+        assert rendered == expected
+        for task in rendered:
+            assert TaskResponse.model_validate(task).model_dump(mode="json") == task
+
+
+@pytest.mark.asyncio
+async def test_assignee_reflects_user_update(client: AsyncClient, sample_user: dict):
+    """Test that cached family users are refreshed when a user is updated."""
+    created = await client.post(
+        "/api/tasks",
+        json={
+            "title": "Cached",
+            "assigned_user_id": sample_user["id"],
+            "assigned_user_ids": [sample_user["id"]],
+        },
+    )
+    task_id = created.json()["id"]
+    assert (await client.get("/api/tasks")).json()[0]["assignee"]["name"] == "Test User"
+
+    await client.put(f"/api/users/{sample_user['id']}", json={"name": "Renamed"})
+
+    [listed] = (await client.get("/api/tasks")).json()
+    assert listed["assignee"]["name"] == "Renamed"
+    assert [user["name"] for user in listed["assignees"]] == ["Renamed"]
+    single = (await client.get(f"/api/tasks/{task_id}")).json()
+    assert single["assignee"] == listed["assignee"]
+    assert single["assignees"] == listed["assignees"]
@@ -1,6 +1,9 @@
 import pytest
 from httpx import AsyncClient
 
+from app.config import settings
+from app.models.user import UserResponse
+
 
 @pytest.mark.asyncio
 async def test_create_user(client: AsyncClient):
@@ -83,3 +86,67 @@ async def test_delete_user(client: AsyncClient, sample_user: dict):
     # Verify user is deleted
     response = await client.get(f"/api/users/{sample_user['id']}")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_update_user_stale_if_match(client: AsyncClient, sample_user: dict):
+    """Test that a stale If-Match on a user update returns 412."""
+    response = await client.put(
+        f"/api/users/{sample_user['id']}",
+        json={"name": "Updated Name"},
+        headers={"If-Match": f'"{sample_user["version"]}"'},
+    )
+    assert response.status_code == 200
+
+    response = await client.put(
+        f"/api/users/{sample_user['id']}",
+        json={"name": "Lost Update"},
+        headers={"If-Match": f'"{sample_user["version"]}"'},
+    )
+    assert response.status_code == 412
+
+
+@pytest.mark.asyncio
+async def test_db_rendered_user_list_matches_response_model(
+    client: AsyncClient, sample_user: dict, monkeypatch
+):
+    """Test that the Postgres-rendered user list is exactly the UserResponse list."""
+    await client.post(
+        "/api/users",
+        json={"first_name": "Ada", "last_name": "Lovelace", "birthday": "1815-12-10"},
+    )
+    await client.post("/api/users", json={"name": ""})
+
+    expected = (await client.get("/api/users")).json()
+    monkeypatch.setattr(settings, "DB_RENDERED_LISTS", True)
+    rendered = (await client.get("/api/users")).json()
+
+    assert rendered == expected
+    assert [user["name"] for user in rendered] == ["Unknown", "Ada Lovelace", "Test User"]
+    for user in rendered:
+        assert UserResponse.model_validate(user).model_dump(mode="json") == user
+
+
+@pytest.mark.asyncio
+async def test_get_users_by_family(client: AsyncClient, sample_user: dict, monkeypatch):
+    """Test that family_id limits the list to that family's members."""
+    signed_in = (
+        await client.post(
+            "/api/auth/sync",
+            json={"google_id": "google-1", "email": "ada@example.com", "name": "Ada Lovelace"},
+        )
+    ).json()
+    family_id = signed_in["family"]["id"]
+
+    response = await client.get(f"/api/users?family_id={family_id}")
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [signed_in["user"]["id"]]
+
+    other = await client.get(f"/api/users?family_id={family_id + 1}")
+    assert other.json() == []
+    assert len((await client.get("/api/users")).json()) == 2
+
+    monkeypatch.setattr(settings, "DB_RENDERED_LISTS", True)
+    rendered = (await client.get(f"/api/users?family_id={family_id}")).json()
+    assert [user["id"] for user in rendered] == [signed_in["user"]["id"]]
+    assert len((await client.get("/api/users")).json()) == 2